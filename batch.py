@@ -0,0 +1,179 @@
+"""Headless batch training: prepare, train, evaluate and export without the GUI.
+
+    python batch.py --data loans.csv --task-type credit_risk --target default \\
+        --drop id --engine "Random Forest" --param n_estimators=300 --output runs/loans
+
+    python batch.py --config nightly.json --parallel 2
+
+    python batch.py --score runs/loans/model.pkl --data new_loans.csv --output scores.csv
+
+A config file holds one job or a list of jobs using the keys of
+``core.pipeline.DEFAULTS`` plus ``data``, ``task_type``, ``target`` and
+``output``. Each job writes its model, metrics and plots to its output
+directory. Given costs (``miss_cost``, ``false_alarm_cost`` and optionally
+``reviews_per_day`` with ``cases_per_day``) the exported model uses the
+cost-optimal decision threshold, which ``--score`` applies.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from core.engines import ENGINES
+from core.pipeline import MODES, TASK_TYPES, load_config, run_pipeline, score_file
+from core.resources import available_cpus
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the FinSightAI training pipeline without a display.")
+    parser.add_argument("--config", action="append", default=[], help="JSON config file with one job or a list of jobs (repeatable)")
+    parser.add_argument("--data", help="CSV dataset to train on")
+    parser.add_argument("--task-type", choices=TASK_TYPES)
+    parser.add_argument("--target", help="Target column")
+    parser.add_argument("--drop", action="append", default=[], help="Column to drop before training (repeatable)")
+    parser.add_argument("--mode", choices=MODES)
+    parser.add_argument("--engine", choices=list(ENGINES))
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUE", help="Engine hyperparameter (repeatable)")
+    parser.add_argument("--imbalance", help="Imbalance handling strategy")
+    parser.add_argument("--ratio", type=float, help="Minority to majority ratio after resampling")
+    parser.add_argument("--folds", type=int)
+    parser.add_argument("--bootstrap", type=int, help="Bootstrap resamples for confidence intervals (0 to skip)")
+    parser.add_argument("--memory-budget-mb", type=float)
+    parser.add_argument("--epochs", type=int, help="Passes over the file in Streaming mode")
+    parser.add_argument("--cores", type=int, help="Cores per job (default: all, shared out among --parallel jobs)")
+    parser.add_argument("--no-cache", action="store_true", help="Retrain even if the run cache has the result")
+    parser.add_argument("--profile", action="store_true", help="cProfile every stage")
+    parser.add_argument("--threshold", type=float, help="Fixed decision threshold")
+    parser.add_argument("--miss-cost", type=float, help="Cost of a missed default or fraud")
+    parser.add_argument("--false-alarm-cost", type=float, help="Cost of flagging a good case")
+    parser.add_argument("--reviews-per-day", type=float, help="Review capacity, with --cases-per-day")
+    parser.add_argument("--cases-per-day", type=float, help="Cases scored per day")
+    parser.add_argument("--score", metavar="MODEL", help="Score --data with an exported model and write a CSV to --output")
+    parser.add_argument("--output", help="Output directory (default: runs/<dataset name>), or the CSV to write with --score")
+    parser.add_argument("--parallel", type=int, default=1, help="Jobs to run at once, each in its own process")
+    return parser.parse_args(argv)
+
+
+def configs_from_args(args):
+    configs = []
+    for path in args.config:
+        configs.extend(load_config(path))
+
+    overrides = {
+        'data': args.data,
+        'task_type': args.task_type,
+        'target': args.target,
+        'mode': args.mode,
+        'engine': args.engine,
+        'imbalance': args.imbalance,
+        'ratio': args.ratio,
+        'folds': args.folds,
+        'bootstrap': args.bootstrap,
+        'memory_budget_mb': args.memory_budget_mb,
+        'epochs': args.epochs,
+        'cores': args.cores,
+        'output': args.output,
+        'threshold': args.threshold,
+        'miss_cost': args.miss_cost,
+        'false_alarm_cost': args.false_alarm_cost,
+        'reviews_per_day': args.reviews_per_day,
+        'cases_per_day': args.cases_per_day
+    }
+    overrides = {key: value for key, value in overrides.items() if value is not None}
+    if args.drop:
+        overrides['drop'] = args.drop
+    if args.param:
+        overrides['params'] = dict(param.split("=", 1) for param in args.param)
+    if args.no_cache:
+        overrides['use_cache'] = False
+    if args.profile:
+        overrides['profile'] = True
+
+    # command-line settings apply to every config, or form the only job
+    configs = [dict(config, **overrides) for config in configs] or [overrides]
+    for config in configs:
+        if 'output' not in config and config.get('data'):
+            config['output'] = os.path.join("runs", os.path.splitext(os.path.basename(config['data']))[0])
+    return configs
+
+
+def pin_worker(slots, cpus):
+    """Pin a batch worker process to its own slice of ``cpus``, so parallel
+    jobs do not all pin their training to the same first cores"""
+    with slots.get_lock():
+        slot = slots.value
+        slots.value += 1
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus[slot % len(cpus)])
+
+
+def run_config(config):
+    name = config.get('output') or config.get('data')
+    config = dict(config)
+    output = config.pop('output', None)
+    if not output:
+        raise ValueError("The batch config needs an 'output' directory")
+
+    def emit(kind, payload):
+        if kind == 'status':
+            print(f"[{name}] {payload}", flush=True)
+
+    summary = run_pipeline(config, output, emit=emit)
+    return output, summary
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.score:
+        if not args.data or not args.output:
+            print("--score needs --data and --output", file=sys.stderr)
+            return 2
+        try:
+            rows = score_file(args.score, args.data, args.output)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"Scored {rows:,} rows to {args.output}")
+        return 0
+
+    configs = configs_from_args(args)
+
+    failures = 0
+    if args.parallel > 1 and len(configs) > 1:
+        context = multiprocessing.get_context("spawn")
+        initializer, initargs = None, ()
+        if args.cores is None:
+            # every job would otherwise train on all cores at once
+            cpus = available_cpus()
+            share = max(1, len(cpus) // args.parallel)
+            for config in configs:
+                if config.get('cores') is None:
+                    config['cores'] = share
+            slices = [cpus[start:start + share] for start in range(0, share * args.parallel, share)]
+            initializer, initargs = pin_worker, (context.Value('i', 0), [part for part in slices if part])
+        with ProcessPoolExecutor(max_workers=args.parallel, mp_context=context,
+                                 initializer=initializer, initargs=initargs) as executor:
+            futures = {executor.submit(run_config, config): config for config in configs}
+            for future in as_completed(futures):
+                failures += report(futures[future], future)
+    else:
+        for config in configs:
+            failures += report(config, None)
+    return 1 if failures else 0
+
+
+def report(config, future):
+    """Print one job's outcome; return 1 if it failed"""
+    try:
+        output, summary = future.result() if future is not None else run_config(config)
+    except Exception as e:
+        print(f"[{config.get('output') or config.get('data')}] failed: {e}", file=sys.stderr, flush=True)
+        return 1
+    headline = {name: round(summary[name], 4) for name in ('precision', 'recall', 'f1', 'roc_auc')}
+    print(f"[{output}] done: {json.dumps(headline)}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import numpy as np
+from joblib import Parallel, delayed
+
+DEFAULT_RESAMPLES = 1000
+CONFIDENCE = 0.95
+SCORE_LEVELS = 10_000
+BLOCK_RESAMPLES = 50
+METRICS = ('precision', 'recall', 'f1', 'roc_auc')
+
+
+def outcome_cells(y_true, scores, positive, threshold):
+    """Row counts per (score level, flagged, positive) cell.
+
+    Scores are rounded to ``1 / SCORE_LEVELS`` for the ranking; whether a
+    row is flagged uses its exact score, so threshold metrics are exact.
+    Returns the cell levels, flags, labels and counts, highest level first.
+    """
+    level = np.rint(np.clip(scores, 0, 1) * SCORE_LEVELS).astype(np.int64)
+    flagged = np.asarray(scores) > threshold
+    is_positive = np.asarray(y_true) == positive
+    counts = np.bincount((level * 2 + flagged) * 2 + is_positive, minlength=(SCORE_LEVELS + 1) * 4)
+
+    cells = np.flatnonzero(counts)[::-1]
+    return cells // 4, (cells // 2) % 2 == 1, cells % 2 == 1, counts[cells]
+
+
+def block_metrics(levels, flagged, is_positive, counts, resamples, seed):
+    """Metrics of ``resamples`` Poisson bootstraps.
+
+    Every row gets a Poisson(1) weight; a cell's total weight is then
+    Poisson(count), so one draw per cell replaces one per row.
+    """
+    rng = np.random.default_rng(seed)
+    weights = rng.poisson(counts, size=(resamples, len(counts))).astype(np.float64)
+    positives = weights * is_positive
+    negatives = weights - positives
+
+    tp = positives[:, flagged].sum(axis=1)
+    fp = negatives[:, flagged].sum(axis=1)
+    fn = positives[:, ~flagged].sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        precision = tp / (tp + fp)
+        recall = tp / (tp + fn)
+        f1 = 2 * precision * recall / (precision + recall)
+
+        # AUC from per-level counts: positives ranked above each negative, ties counting half
+        starts = np.r_[0, np.flatnonzero(np.diff(levels)) + 1]
+        level_positives = np.add.reduceat(positives, starts, axis=1)
+        level_negatives = np.add.reduceat(negatives, starts, axis=1)
+        above = np.cumsum(level_positives, axis=1) - level_positives
+        pairs = level_positives.sum(axis=1) * level_negatives.sum(axis=1)
+        roc_auc = (level_negatives * (above + level_positives / 2)).sum(axis=1) / pairs
+    return np.column_stack([precision, recall, f1, roc_auc])
+
+
+def bootstrap_intervals(y_true, scores, positive=1, threshold=0.5, resamples=DEFAULT_RESAMPLES,
+                        confidence=CONFIDENCE, n_jobs=None, seed=42):
+    """Percentile confidence intervals for precision, recall and F1 at
+    ``threshold`` and for ROC AUC, from Poisson bootstrap resamples of the
+    test rows run in parallel blocks"""
+    cells = outcome_cells(y_true, scores, positive, threshold)
+    blocks = [BLOCK_RESAMPLES] * (resamples // BLOCK_RESAMPLES)
+    if resamples % BLOCK_RESAMPLES:
+        blocks.append(resamples % BLOCK_RESAMPLES)
+    seeds = np.random.SeedSequence(seed).spawn(len(blocks))
+
+    results = Parallel(n_jobs=n_jobs or 1, prefer="threads")(
+        delayed(block_metrics)(*cells, size, block_seed) for size, block_seed in zip(blocks, seeds)
+    )
+    samples = np.vstack(results)
+
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.nanpercentile(samples, [tail, 100 - tail], axis=0)
+    intervals = {name: (float(low[i]), float(high[i])) for i, name in enumerate(METRICS)}
+    intervals['resamples'] = resamples
+    intervals['confidence'] = confidence
+    intervals['threshold'] = threshold
+    return intervals
@@ -0,0 +1,106 @@
+import logging
+import os
+import shutil
+import uuid
+
+CACHE_ROOT = os.environ.get(
+    "FINSIGHTAI_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".finsightai", "cache")
+)
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """Directory of cache entries bounded by total size.
+
+    Each entry is a sub-directory named by its key. Reading an entry bumps
+    its modification time, and once the cache grows past ``max_bytes`` the
+    least recently used entries are deleted.
+
+    Caching is best effort: an unwritable directory, a full disk or an
+    unreadable entry is logged as a warning and costs a recompute, never
+    the caller's run.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except OSError:
+            logger.warning("Cache directory %s is not usable", self.directory, exc_info=True)
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key, reader):
+        """Return ``reader(entry directory)`` for key, or None on a miss.
+
+        An entry the reader fails on is removed and counts as a miss.
+        """
+        path = self.entry_path(key)
+        if not os.path.isdir(path):
+            return None
+        try:
+            os.utime(path)
+            return reader(path)
+        except Exception:
+            logger.warning("Could not read cache entry %s; removing it", path, exc_info=True)
+            self.remove(key)
+            return None
+
+    def put(self, key, writer):
+        """Create an entry by calling ``writer(directory)`` and return its
+        path, or None if it could not be written.
+
+        The writer fills a private staging directory which is renamed into
+        place once complete, so readers never see half-written entries.
+        """
+        path = self.entry_path(key)
+        staging = os.path.join(self.directory, f".{key}.{uuid.uuid4().hex}.tmp")
+        try:
+            os.makedirs(staging)
+            writer(staging)
+            if os.path.isdir(path):
+                shutil.rmtree(staging)
+            else:
+                os.replace(staging, path)
+            self.evict(keep=key)
+        except Exception:
+            logger.warning("Could not store cache entry %s", path, exc_info=True)
+            shutil.rmtree(staging, ignore_errors=True)
+            return None
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return path
+
+    def remove(self, key):
+        shutil.rmtree(self.entry_path(key), ignore_errors=True)
+
+    def entries(self):
+        """Return (key, size_in_bytes, last_used) for every complete entry"""
+        result = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            size = 0
+            for root, _, files in os.walk(path):
+                for file_name in files:
+                    size += os.path.getsize(os.path.join(root, file_name))
+            result.append((name, size, os.path.getmtime(path)))
+        return result
+
+    def evict(self, keep=None):
+        """Delete least recently used entries until the cache fits its cap"""
+        entries = sorted(self.entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self.remove(key)
+            total -= size
@@ -0,0 +1,167 @@
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+from sklearn.metrics import precision_recall_fscore_support, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
+from core.cache import CACHE_ROOT
+from core.engines import get_engine
+from core.imbalance import get_strategy
+from core.training import _training_sample, score_probabilities
+
+DEFAULT_FOLDS = 5
+FOLD_OVERHEAD = 3
+FOLD_OUTPUTS = ('classes', 'proba')
+
+
+def assign_folds(y, folds=DEFAULT_FOLDS, seed=42):
+    """Stratified fold number of every row"""
+    fold_ids = np.empty(len(y), dtype=np.int8)
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    for fold, (_, test_rows) in enumerate(splitter.split(np.zeros(len(y)), y)):
+        fold_ids[test_rows] = fold
+    return fold_ids
+
+
+def share_arrays(directory, **arrays):
+    """Write arrays once as .npy files and return their paths for memory-mapping"""
+    paths = {}
+    for name, array in arrays.items():
+        paths[name] = os.path.join(directory, f"{name}.npy")
+        np.save(paths[name], np.ascontiguousarray(array))
+    return paths
+
+
+def fold_workers(X, folds, workers, memory_budget):
+    """Folds to run at once: each one copies its training rows out of the
+    shared matrix, so concurrency is capped by the memory budget."""
+    fold_bytes = X.nbytes * (folds - 1) / folds * FOLD_OVERHEAD
+    return int(max(1, min(workers, folds, memory_budget // max(1, fold_bytes))))
+
+
+def fit_fold(X, y, fold_ids, fold, engine_name, params, strategy_name, ratio, seed=42, n_jobs=1):
+    """Resample, scale and fit one fold on the rows of every other fold.
+
+    Returns the fold's scaled training and held-out matrices with its
+    scaler, model and held-out probabilities. Fitting is deterministic, so
+    the same fold can be refitted later instead of keeping its model.
+    """
+    test_rows = np.flatnonzero(fold_ids == fold)
+    train_rows = np.flatnonzero(fold_ids != fold)
+
+    X_train, y_train = X[train_rows], y[train_rows]
+    strategy = get_strategy(strategy_name)
+    if strategy.resamples:
+        X_train, y_train = strategy.resample(X_train, y_train, ratio=ratio, n_jobs=n_jobs, seed=seed)
+
+    scaler = StandardScaler().fit(X_train)
+    X_train = scaler.transform(X_train).astype(np.float32, copy=False)
+    X_test = scaler.transform(X[test_rows]).astype(np.float32, copy=False)
+    y_test = np.asarray(y[test_rows])
+
+    engine = get_engine(engine_name)
+    model = engine.build(params, n_jobs=n_jobs, seed=seed, class_weight=strategy.class_weight)
+    proba = engine.fit(model, X_train, y_train, X_test, y_test, real_rows=len(train_rows))['val_proba']
+    return {
+        'X_train': X_train,
+        'y_train': y_train,
+        'X_test': X_test,
+        'y_test': y_test,
+        'scaler': scaler,
+        'model': model,
+        'proba': proba
+    }
+
+
+def run_fold(paths, fold, engine_name, params, strategy_name, ratio, seed=42):
+    """Train and score one fold, reading the shared matrix memory-mapped"""
+    X = np.load(paths['X'], mmap_mode="r")
+    y = np.load(paths['y'], mmap_mode="r")
+    fold_ids = np.load(paths['folds'], mmap_mode="r")
+
+    with threadpool_limits(limits=1):
+        fitted = fit_fold(X, y, fold_ids, fold, engine_name, params, strategy_name, ratio, seed)
+        model, proba, y_test = fitted['model'], fitted['proba'], fitted['y_test']
+        X_train, y_train = fitted['X_train'], fitted['y_train']
+
+        X_sample, y_sample = _training_sample(X_train, y_train)
+        accuracy, loss = score_probabilities(y_sample, model.predict_proba(X_sample), model.classes_)
+
+    val_accuracy, val_loss = score_probabilities(y_test, proba, model.classes_)
+    y_pred = model.classes_[np.argmax(proba, axis=1)]
+    precision, recall, f1, _ = precision_recall_fscore_support(y_test, y_pred, average='binary', zero_division=0)
+    return {
+        'fold': fold + 1,
+        'loss': loss,
+        'accuracy': accuracy,
+        'val_loss': val_loss,
+        'val_accuracy': val_accuracy,
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'roc_auc': roc_auc_score(y_test, proba[:, 1]),
+        'classes': model.classes_,
+        'proba': proba
+    }
+
+
+def cross_validate(X, y, engine_name, params, strategy_name, ratio=1.0, folds=DEFAULT_FOLDS,
+                   workers=1, memory_budget=None, seed=42, callback=None, should_stop=None):
+    """Run stratified k-fold cross-validation with folds in worker processes.
+
+    ``X`` is the encoded, unscaled feature matrix. It is written once to a
+    temporary file that every worker memory-maps, so the processes share
+    the page cache instead of receiving pickled copies. Each fold resamples
+    and scales its own training rows, so nothing leaks from the held-out
+    fold. ``callback`` receives each fold's metrics as it finishes.
+
+    Returns a dict with the per-fold metrics and the out-of-fold class
+    probabilities of every row, or None if stopped. Fold models are not
+    kept; ``fit_fold`` rebuilds one when it is needed again.
+    """
+    fold_ids = assign_folds(y, folds, seed)
+    if memory_budget is not None:
+        workers = fold_workers(X, folds, workers, memory_budget)
+
+    os.makedirs(CACHE_ROOT, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=CACHE_ROOT, prefix="cv-") as directory:
+        paths = share_arrays(directory, X=X, y=y, folds=fold_ids)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = {
+                executor.submit(run_fold, paths, fold, engine_name, params, strategy_name, ratio, seed)
+                for fold in range(folds)
+            }
+            results = []
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                if should_stop is not None and should_stop():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    return None
+                for future in done:
+                    result = future.result()
+                    results.append(result)
+                    if callback is not None:
+                        metrics = {key: value for key, value in result.items() if key not in FOLD_OUTPUTS}
+                        callback(dict(metrics, step=len(results)))
+
+    classes = results[0]['classes']
+    oof_proba = np.empty((len(y), len(classes)), dtype=np.float64)
+    results.sort(key=lambda result: result['fold'])
+    for result in results:
+        oof_proba[fold_ids == result['fold'] - 1] = result.pop('proba')
+        result.pop('classes')
+    return {
+        'folds': results,
+        'classes': classes,
+        'oof_proba': oof_proba
+    }
+
+
+def summarize_folds(folds, names=('precision', 'recall', 'f1', 'roc_auc')):
+    """Mean and standard deviation of each metric across folds"""
+    return {
+        name: (np.mean([fold[name] for fold in folds]), np.std([fold[name] for fold in folds]))
+        for name in names
+    }
@@ -0,0 +1,43 @@
+import hashlib
+import os
+import pandas as pd
+from core.cache import CACHE_ROOT, DiskCache
+
+DATASET_CACHE_BYTES = 5 * 1024 ** 3
+FORMAT_VERSION = 1
+SAMPLE_BYTES = 64 * 1024
+
+
+def file_fingerprint(file_path):
+    """Hash a file's path, size, modification time and first/last bytes"""
+    stat = os.stat(file_path)
+    digest = hashlib.sha1()
+    digest.update(f"{FORMAT_VERSION}|{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+
+    with open(file_path, "rb") as handle:
+        digest.update(handle.read(SAMPLE_BYTES))
+        if stat.st_size > SAMPLE_BYTES:
+            handle.seek(max(SAMPLE_BYTES, stat.st_size - SAMPLE_BYTES))
+            digest.update(handle.read(SAMPLE_BYTES))
+
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """Feather copies of parsed datasets keyed by the source file fingerprint"""
+
+    def __init__(self, directory=None, max_bytes=DATASET_CACHE_BYTES):
+        self.cache = DiskCache(directory or os.path.join(CACHE_ROOT, "datasets"), max_bytes)
+
+    def load(self, file_path):
+        """Return the cached frame for file_path, or None if it is not cached"""
+        return self.cache.get(
+            file_fingerprint(file_path),
+            lambda entry: pd.read_feather(os.path.join(entry, "data.feather"))
+        )
+
+    def store(self, file_path, df):
+        return self.cache.put(
+            file_fingerprint(file_path),
+            lambda directory: df.to_feather(os.path.join(directory, "data.feather"))
+        )
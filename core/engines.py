@@ -0,0 +1,152 @@
+from sklearn.ensemble import ExtraTreesClassifier, HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from core.training import fit_once, grow_boosting, grow_forest
+
+
+class Hyperparameter:
+    """A tunable engine setting.
+
+    ``default`` is either a value or a dict of values keyed by task type.
+    ``search`` lists the candidate values the tuner samples from; settings
+    without one are left at their value while tuning.
+    """
+
+    def __init__(self, name, default, cast=float, label=None, search=None):
+        self.name = name
+        self.default = default
+        self.cast = cast
+        self.label = label or name
+        self.search = search
+
+    def default_for(self, task_type):
+        if isinstance(self.default, dict):
+            return self.default.get(task_type, next(iter(self.default.values())))
+        return self.default
+
+    def parse(self, text, task_type):
+        """Parse user input, falling back to the default for blank input"""
+        text = str(text).strip()
+        if not text:
+            return self.default_for(task_type)
+        if self.cast is int and text.lower() == "none":
+            return None
+        return self.cast(text)
+
+
+class Engine:
+    """A model backend the training screen can select.
+
+    Subclasses name the estimator, declare their hyperparameters and fit
+    with progress callbacks via ``fit_function``. ``budget_param`` names
+    the setting (trees, iterations) the tuner scales down for cheap trials.
+    """
+
+    name = None
+    estimator_class = None
+    hyperparameters = []
+    fixed_params = {}
+    fit_function = staticmethod(fit_once)
+    progress_unit = "Steps"
+    parallel = False
+    budget_param = None
+
+    def default_params(self, task_type):
+        return {param.name: param.default_for(task_type) for param in self.hyperparameters}
+
+    def constructor_params(self, params, n_jobs=None, seed=42, class_weight=None):
+        kwargs = dict(self.fixed_params, **params)
+        kwargs["random_state"] = seed
+        if self.parallel and n_jobs:
+            kwargs["n_jobs"] = n_jobs
+        if class_weight is not None:
+            kwargs["class_weight"] = class_weight
+        return kwargs
+
+    def build(self, params, n_jobs=None, seed=42, class_weight=None):
+        """The estimator for ``params``; ``class_weight`` comes from the
+        imbalance strategy, so resampled rows are not weighted again"""
+        return self.estimator_class(**self.constructor_params(params, n_jobs, seed, class_weight))
+
+    def total_steps(self, params):
+        return None
+
+    def fit(self, model, X_train, y_train, X_test, y_test, callback=None, should_stop=None, real_rows=None):
+        """Fit with progress callbacks. ``real_rows`` counts the leading
+        training rows that are original data rather than synthetic, for
+        engines that hold some of them out for validation."""
+        return self.fit_function(model, X_train, y_train, X_test, y_test,
+                                 callback=callback, should_stop=should_stop)
+
+
+class RandomForestEngine(Engine):
+    name = "Random Forest"
+    estimator_class = RandomForestClassifier
+    hyperparameters = [
+        Hyperparameter("n_estimators", {"fraud_detection": 50, "credit_risk": 100}, int, "Trees"),
+        Hyperparameter("max_depth", {"fraud_detection": 10, "credit_risk": 15}, int, "Max depth",
+                       search=[6, 8, 10, 15, 20, None]),
+        Hyperparameter("min_samples_leaf", 1, int, "Min leaf", search=[1, 2, 5, 10, 20])
+    ]
+    fit_function = staticmethod(grow_forest)
+    progress_unit = "Trees"
+    parallel = True
+    budget_param = "n_estimators"
+
+    def total_steps(self, params):
+        return params["n_estimators"]
+
+    def fit(self, model, X_train, y_train, X_test, y_test, callback=None, should_stop=None, real_rows=None):
+        return self.fit_function(model, X_train, y_train, X_test, y_test,
+                                 callback=callback, should_stop=should_stop, real_rows=real_rows)
+
+
+class ExtraTreesEngine(RandomForestEngine):
+    name = "Extra Trees"
+    estimator_class = ExtraTreesClassifier
+
+
+class HistGradientBoostingEngine(Engine):
+    name = "Histogram Boosting"
+    estimator_class = HistGradientBoostingClassifier
+    hyperparameters = [
+        Hyperparameter("max_iter", 300, int, "Iterations"),
+        Hyperparameter("learning_rate", 0.1, float, "Learning rate", search=[0.03, 0.05, 0.1, 0.2]),
+        Hyperparameter("max_leaf_nodes", 31, int, "Max leaves", search=[15, 31, 63, 127]),
+        Hyperparameter("n_iter_no_change", 10, int, "Patience")
+    ]
+    fixed_params = {"early_stopping": True}
+    fit_function = staticmethod(grow_boosting)
+    progress_unit = "Iterations"
+    budget_param = "max_iter"
+
+    def total_steps(self, params):
+        return params["max_iter"]
+
+
+class LogisticRegressionEngine(Engine):
+    name = "Logistic Regression"
+    estimator_class = LogisticRegression
+    hyperparameters = [
+        Hyperparameter("C", 1.0, float, "C", search=[0.01, 0.1, 1.0, 10.0, 100.0]),
+        Hyperparameter("max_iter", 1000, int, "Max iterations")
+    ]
+    def total_steps(self, params):
+        return 1
+
+
+ENGINES = {}
+
+
+def register_engine(engine):
+    ENGINES[engine.name] = engine
+    return engine
+
+
+def get_engine(name):
+    return ENGINES[name]
+
+
+for engine_class in (RandomForestEngine, ExtraTreesEngine, HistGradientBoostingEngine, LogisticRegressionEngine):
+    register_engine(engine_class())
+
+DEFAULT_ENGINE = RandomForestEngine.name
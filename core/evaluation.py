@@ -0,0 +1,288 @@
+from functools import cached_property
+import numpy as np
+from core.cross_validation import summarize_folds
+
+DEFAULT_THRESHOLD = 0.5
+GAIN_BINS = 10
+# curve points drawn per plot; more are not visible at screen resolution
+CURVE_POINTS = 500
+# starting points for the threshold optimizer, per unit of currency; analysts override them
+DEFAULT_COSTS = {
+    'credit_risk': {'miss_cost': 5000.0, 'false_alarm_cost': 250.0},
+    'fraud_detection': {'miss_cost': 500.0, 'false_alarm_cost': 15.0}
+}
+
+
+class ThresholdCurves:
+    """Every-threshold metrics of a binary scorer, from one sort of the scores.
+
+    Scores are sorted once, descending; cumulative sums of positives at the
+    last position of each distinct score give true and false positives for
+    every threshold. ROC and precision-recall curves, their areas, the KS
+    statistic, gain and lift tables and the confusion matrix at any
+    threshold are read off those arrays. A row is predicted positive when
+    its score is strictly above the threshold, matching ``argmax`` over
+    two class probabilities at 0.5.
+    """
+
+    def __init__(self, y_true, scores, positive=None):
+        y_true = np.asarray(y_true)
+        scores = np.asarray(scores, dtype=np.float64)
+        if positive is None:
+            positive = np.max(y_true)
+
+        order = np.argsort(-scores, kind='mergesort')
+        sorted_scores = scores[order]
+        self.positive = positive
+        self.cumulative_positives = np.cumsum(y_true[order] == positive)
+        self.rows = len(scores)
+
+        # last index of each run of equal scores; point 0 predicts nothing positive
+        last = np.r_[np.flatnonzero(np.diff(sorted_scores)), self.rows - 1]
+        self.thresholds = np.r_[np.inf, sorted_scores[last]]
+        self.tp = np.r_[0, self.cumulative_positives[last]]
+        self.fp = np.r_[0, last + 1] - self.tp
+        self.positives = int(self.tp[-1])
+        self.negatives = int(self.fp[-1])
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.tpr = self.tp / self.positives
+            self.fpr = self.fp / self.negatives
+            self.precision = np.where(self.tp + self.fp > 0, self.tp / (self.tp + self.fp), 1.0)
+        self.recall = self.tpr
+
+    @cached_property
+    def roc_auc(self):
+        # trapezoids between curve points; ties in score give the diagonal steps
+        return float(np.sum(np.diff(self.fpr) * (self.tpr[1:] + self.tpr[:-1]) / 2))
+
+    @cached_property
+    def pr_auc(self):
+        """Average precision: precision weighted by each step in recall"""
+        return float(np.sum(np.diff(self.recall) * self.precision[1:]))
+
+    @cached_property
+    def ks(self):
+        """Largest gap between the positive and negative score distributions,
+        and the threshold where it occurs"""
+        gap = self.tpr - self.fpr
+        best = int(np.argmax(gap))
+        return float(gap[best]), float(self.thresholds[best])
+
+    def point(self, threshold):
+        """Index of the curve point for rows scored above ``threshold``"""
+        return int(np.searchsorted(-self.thresholds, -threshold, side='left')) - 1
+
+    def at(self, threshold=DEFAULT_THRESHOLD):
+        """Confusion matrix and headline metrics at one threshold"""
+        i = max(self.point(threshold), 0)
+        tp, fp = int(self.tp[i]), int(self.fp[i])
+        fn, tn = self.positives - tp, self.negatives - fp
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / self.positives if self.positives else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        return {
+            'threshold': threshold,
+            'confusion_matrix': np.array([[tn, fp], [fn, tp]]),
+            'flagged': tp + fp,
+            'precision': precision,
+            'recall': recall,
+            'f1': f1
+        }
+
+    def threshold_for(self, i):
+        """A threshold that flags exactly the rows of curve point ``i``"""
+        if i + 1 < len(self.thresholds):
+            return float(self.thresholds[i + 1])
+        return float(np.nextafter(self.thresholds[-1], -np.inf))
+
+    def optimal_threshold(self, miss_cost, false_alarm_cost, max_flag_rate=None):
+        """The threshold with the lowest expected cost over every candidate.
+
+        A missed positive costs ``miss_cost`` and a flagged negative
+        ``false_alarm_cost``. With ``max_flag_rate`` (review capacity as a
+        share of scored rows) thresholds flagging more rows are excluded;
+        flagging nothing always qualifies.
+        """
+        cost = (self.positives - self.tp) * miss_cost + self.fp * false_alarm_cost
+        if max_flag_rate is not None:
+            cost = np.where(self.tp + self.fp <= max_flag_rate * self.rows, cost, np.inf)
+        best = int(np.argmin(cost))
+        point = self.at(self.threshold_for(best))
+        point['cost'] = float(cost[best])
+        return point
+
+    def gain_table(self, bins=GAIN_BINS):
+        """Cumulative gain and lift per score-ranked bin (deciles by default)"""
+        cutoffs = np.ceil(self.rows * np.arange(1, bins + 1) / bins).astype(int)
+        captured = self.cumulative_positives[cutoffs - 1]
+        sizes = np.diff(np.r_[0, cutoffs])
+        in_bin = np.diff(np.r_[0, captured])
+        base_rate = self.positives / self.rows if self.rows else 0.0
+        table = []
+        for i in range(bins):
+            rate = in_bin[i] / sizes[i] if sizes[i] else 0.0
+            cumulative_rate = captured[i] / cutoffs[i] if cutoffs[i] else 0.0
+            table.append({
+                'bin': i + 1,
+                'rows': int(sizes[i]),
+                'positives': int(in_bin[i]),
+                'gain': float(captured[i] / self.positives) if self.positives else 0.0,
+                'lift': float(rate / base_rate) if base_rate else 0.0,
+                'cumulative_lift': float(cumulative_rate / base_rate) if base_rate else 0.0
+            })
+        return table
+
+
+def expected_cost(point, miss_cost, false_alarm_cost):
+    cm = point['confusion_matrix']
+    return float(cm[1, 0] * miss_cost + cm[0, 1] * false_alarm_cost)
+
+
+def evaluation_curves(metrics):
+    """The run's ThresholdCurves, rebuilt for results cached before they were stored"""
+    if 'curves' not in metrics:
+        metrics['curves'] = ThresholdCurves(metrics['y_test'], metrics['y_proba'])
+    return metrics['curves']
+
+
+def decimate(x, y, points=CURVE_POINTS):
+    """At most ``points`` vertices of the polyline (x, y), spaced evenly
+    along its length so steep steps keep their shape; both ends are kept"""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(x) <= points:
+        return x, y
+    length = np.r_[0, np.cumsum(np.hypot(np.diff(x), np.diff(y)))]
+    keep = np.searchsorted(length, np.linspace(0, length[-1], points))
+    keep = np.unique(np.r_[0, np.minimum(keep, len(x) - 1), len(x) - 1])
+    return x[keep], y[keep]
+
+
+def draw_confusion(ax, cm):
+    """Confusion matrix as an image with count annotations; return the
+    (image, texts) artists so a new matrix can be shown in place"""
+    image = ax.imshow(cm, cmap='Blues')
+    texts = [[ax.text(j, i, "", ha='center', va='center') for j in range(2)] for i in range(2)]
+    ax.set_xticks([0, 1])
+    ax.set_yticks([0, 1])
+    ax.set_xlabel('Predicted')
+    ax.set_ylabel('Actual')
+    artists = (image, texts)
+    update_confusion(artists, cm)
+    return artists
+
+
+def update_confusion(artists, cm):
+    image, texts = artists
+    image.set_data(cm)
+    image.set_clim(0, max(cm.max(), 1))
+    for i in range(2):
+        for j in range(2):
+            texts[i][j].set_text(f"{cm[i, j]:,}")
+            texts[i][j].set_color('white' if cm[i, j] > cm.max() / 2 else 'black')
+
+
+def draw_evaluation(fig, metrics, threshold=DEFAULT_THRESHOLD):
+    """Draw ROC, precision-recall and cumulative gain curves and the
+    confusion matrix at ``threshold`` on ``fig``; return the confusion
+    matrix artists"""
+    curves = evaluation_curves(metrics)
+    fig.clear()
+
+    ax1 = fig.add_subplot(221)
+    ax1.plot(*decimate(curves.fpr, curves.tpr), color='darkorange', lw=2, label=f'ROC curve (AUC = {curves.roc_auc:.2f})')
+    ax1.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--')
+    ax1.set_xlim([0.0, 1.0])
+    ax1.set_ylim([0.0, 1.05])
+    ax1.set_xlabel('False Positive Rate')
+    ax1.set_ylabel('True Positive Rate')
+    ax1.set_title('ROC Curve')
+    ax1.legend(loc="lower right")
+
+    ax2 = fig.add_subplot(222)
+    ax2.plot(*decimate(curves.recall, curves.precision), color='tab:green', lw=2, label=f'PR curve (AP = {curves.pr_auc:.2f})')
+    ax2.set_xlim([0.0, 1.0])
+    ax2.set_ylim([0.0, 1.05])
+    ax2.set_xlabel('Recall')
+    ax2.set_ylabel('Precision')
+    ax2.set_title('Precision-Recall Curve')
+    ax2.legend(loc="lower left")
+
+    ax3 = fig.add_subplot(223)
+    table = curves.gain_table()
+    shares = [0] + [row['bin'] / len(table) for row in table]
+    ax3.plot(shares, [0] + [row['gain'] for row in table], marker='o', color='tab:purple', label='Model')
+    ax3.plot([0, 1], [0, 1], color='navy', linestyle='--', label='Random')
+    ax3.set_xlabel('Share of rows, highest scores first')
+    ax3.set_ylabel('Share of positives captured')
+    ax3.set_title(f'Cumulative Gain (KS = {curves.ks[0]:.2f})')
+    ax3.legend(loc="lower right")
+
+    ax4 = fig.add_subplot(224)
+    artists = draw_confusion(ax4, curves.at(threshold)['confusion_matrix'])
+    ax4.set_title(f'Confusion Matrix at {threshold:.2f}')
+
+    fig.tight_layout()
+    return artists
+
+
+def draw_history(fig, history, unit):
+    """Loss and accuracy per training step, as the live training plot shows them"""
+    fig.clear()
+    ax1 = fig.add_subplot(111)
+    ax2 = ax1.twinx()
+    steps = [point['step'] for point in history]
+    ax1.plot(steps, [point['loss'] for point in history], 'b-', label='Training Loss')
+    ax1.plot(steps, [point['val_loss'] for point in history], 'b--', label='Validation Loss')
+    ax2.plot(steps, [point['accuracy'] for point in history], color='orange', label='Training Accuracy')
+    ax2.plot(steps, [point['val_accuracy'] for point in history], color='orange', linestyle='--', label='Validation Accuracy')
+
+    ax1.set_xlabel(unit)
+    ax1.set_ylabel('Loss', color='tab:blue')
+    ax2.set_ylabel('Accuracy', color='tab:orange')
+    lines1, labels1 = ax1.get_legend_handles_labels()
+    lines2, labels2 = ax2.get_legend_handles_labels()
+    ax2.legend(lines1 + lines2, labels1 + labels2, loc='upper right')
+    fig.suptitle('Training Progress')
+    fig.tight_layout()
+
+
+def confusion_explanation(cm):
+    total = cm.sum()
+    correct = np.trace(cm)
+    return (
+        f"\nConfusion Matrix Explanation:\n"
+        f"• Total Cases: {total}\n"
+        f"• Correct Predictions: {correct} ({correct / total:.1%})\n"
+        f"• Top-left: Correct normal predictions\n"
+        f"• Bottom-right: Correct risky/fraudulent predictions\n"
+        f"• Top-right: False alarms\n"
+        f"• Bottom-left: Missed detections"
+    )
+
+
+def metrics_summary(metrics, threshold=DEFAULT_THRESHOLD):
+    """JSON-serialisable headline metrics of a run, without the per-row arrays"""
+    curves = evaluation_curves(metrics)
+    point = curves.at(threshold)
+    summary = {name: float(point[name]) for name in ('precision', 'recall', 'f1')}
+    summary['roc_auc'] = curves.roc_auc
+    summary['pr_auc'] = curves.pr_auc
+    summary['ks'], summary['ks_threshold'] = curves.ks
+    summary['threshold'] = threshold
+    summary['rows'] = curves.rows
+    summary['confusion_matrix'] = point['confusion_matrix'].tolist()
+    summary['gain_table'] = curves.gain_table()
+    if 'intervals' in metrics:
+        summary['intervals'] = metrics['intervals']
+    if 'folds' in metrics:
+        summary['folds'] = [
+            {key: value.item() if isinstance(value, np.generic) else value for key, value in fold.items()}
+            for fold in metrics['folds']
+        ]
+        summary['cross_validation'] = {
+            name: {'mean': float(mean), 'std': float(std)}
+            for name, (mean, std) in summarize_folds(metrics['folds']).items()
+        }
+    return summary
@@ -0,0 +1,160 @@
+import pickle
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.pipeline import Pipeline
+from core.evaluation import DEFAULT_THRESHOLD
+from core.imbalance import ApproximateSMOTE, RandomUndersampling
+from core.streaming import StreamingPreprocessor
+
+
+class ThresholdedClassifier(ClassifierMixin, BaseEstimator):
+    """A fitted binary classifier whose ``predict`` flags the positive class
+    when its probability is above ``threshold`` instead of at 0.5"""
+
+    def __init__(self, model, threshold=DEFAULT_THRESHOLD):
+        self.model = model
+        self.threshold = threshold
+
+    @property
+    def classes_(self):
+        return self.model.classes_
+
+    def fit(self, X, y):
+        self.model.fit(X, y)
+        return self
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(X)
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] > self.threshold).astype(int)]
+
+
+def save_model(path, model, preprocessors=None, threshold=None):
+    """Pickle a trained model, bundled with its fitted preprocessing when
+    there is a pipeline or a streamed run's encoder and scaler, so raw
+    frames score the same as during training.
+    A ``threshold`` other than 0.5 is kept with the model for ``predict``."""
+    if model is None:
+        raise ValueError("No trained model found. Please complete training first.")
+
+    preprocessors = preprocessors or {}
+    if 'pipeline' in preprocessors:
+        model = Pipeline([('preprocess', preprocessors['pipeline']), ('model', model)])
+    elif 'encoder' in preprocessors:
+        preprocess = StreamingPreprocessor(preprocessors['encoder'], preprocessors['scaler'])
+        model = Pipeline([('preprocess', preprocess), ('model', model)])
+    if threshold is not None and threshold != DEFAULT_THRESHOLD:
+        model = ThresholdedClassifier(model, threshold)
+
+    with open(path, 'wb') as f:
+        pickle.dump(model, f)
+
+
+def raw_input_columns(model):
+    """The raw columns an exported model reads, or None if it was saved
+    without its preprocessing and so cannot score raw frames"""
+    if isinstance(model, ThresholdedClassifier):
+        model = model.model
+    if not isinstance(model, Pipeline):
+        return None
+    preprocess = model.steps[0][1]
+    if isinstance(preprocess, StreamingPreprocessor):
+        return list(preprocess.encoder.feature_columns)
+    return list(getattr(preprocess, 'feature_columns_', None) or []) or None
+
+
+def estimator_code(model):
+    """Return (import line, constructor expression) that rebuild a fitted
+    estimator with the settings it ended training with, e.g. the tree count
+    a forest grew to or the iterations boosting ran before early stopping"""
+    cls = type(model)
+    defaults = cls().get_params()
+    params = model.get_params()
+    if params.get('early_stopping') is True and hasattr(model, 'n_iter_'):
+        params['max_iter'] = int(model.n_iter_)
+    # the core count depends on the machine, not the model
+    params.pop('n_jobs', None)
+    kwargs = {
+        key: value for key, value in params.items()
+        if key == 'random_state' or key not in defaults or value != defaults[key]
+    }
+    arguments = ",\n".join(f"    {key}={value!r}" for key, value in kwargs.items())
+    return f"from {cls.__module__.split('._')[0]} import {cls.__name__}", f"{cls.__name__}(\n{arguments}\n)"
+
+
+def script_unsupported(mode, engine_name):
+    """Why ``training_script`` cannot reproduce a run's exported model, or
+    None when it can"""
+    if engine_name is None:
+        return "A streamed run is fitted chunk by chunk, so no single-estimator script reproduces it"
+    if mode == "Cross-validation":
+        return "A cross-validated model is refitted on every row, which the script's train/test split does not reproduce"
+    return None
+
+
+def training_script(data_file, columns, target_column, task_type, model, strategy, ratio, threshold=DEFAULT_THRESHOLD):
+    """Source of a standalone script that retrains the model with scikit-learn
+    on the same columns and rows the app trained on"""
+    engine_import, engine_constructor = estimator_code(model)
+
+    if strategy == ApproximateSMOTE.name:
+        resampling = f"""
+# Oversample minority classes (the app uses an approximate-neighbour SMOTE)
+from imblearn.over_sampling import SMOTE
+X_train, y_train = SMOTE(sampling_strategy={ratio!r}, random_state=42).fit_resample(X_train, y_train)
+"""
+    elif strategy == RandomUndersampling.name:
+        resampling = f"""
+# Randomly undersample majority classes
+from imblearn.under_sampling import RandomUnderSampler
+X_train, y_train = RandomUnderSampler(sampling_strategy={ratio!r}, random_state=42).fit_resample(X_train, y_train)
+"""
+    else:
+        resampling = ""
+
+    return f"""import pandas as pd
+import numpy as np
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+{engine_import}
+
+# Load and prepare data
+df = pd.read_csv('{data_file}')  # Updated with actual file path
+target_column = '{target_column}'  # Updated with selected target column
+task_type = '{task_type}'  # Updated with selected task type
+
+# Drop rows with missing values and keep the columns used in training
+df = df.dropna()[{list(columns)!r}]
+
+# Encode categorical variables as category codes
+categorical_columns = df.select_dtypes(include=["object", "category", "bool"]).columns
+for col in categorical_columns:
+    df[col] = df[col].astype("category").cat.codes
+
+# Split features and target
+X = df.drop(columns=[target_column])
+y = df[target_column]
+
+# Train-test split
+X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+{resampling}
+# Scale features
+scaler = StandardScaler()
+X_train = scaler.fit_transform(X_train)
+X_test = scaler.transform(X_test)
+
+# Initialize and train model
+model = {engine_constructor}
+
+# Train the model
+model.fit(X_train, y_train)
+
+# Flag rows whose positive-class probability is above the decision threshold
+threshold = {threshold!r}
+y_pred = model.classes_[(model.predict_proba(X_test)[:, 1] > threshold).astype(int)]
+
+# Save the trained model
+import pickle
+with open('model.pkl', 'wb') as f:
+    pickle.dump(model, f)
+"""
@@ -0,0 +1,225 @@
+import itertools
+import json
+import os
+import time
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.metrics import roc_auc_score
+from core.cache import CACHE_ROOT, DiskCache
+from core.cross_validation import assign_folds, fit_fold
+from core.preprocessing import PreparedDataCache, split_rows
+from core.run_cache import run_key
+from core.runner import TrainingRun, load_training_frame
+
+DEFAULT_REPEATS = 5
+DEFAULT_TIME_BUDGET = 10.0
+MIN_ROWS = 500
+PROBE_ROWS = 2000
+IMPORTANCE_CACHE_BYTES = 64 * 1024 ** 2
+
+
+def impurity_importance(model):
+    """Mean impurity decrease of tree ensembles, or normalised absolute
+    coefficients of linear models; None for models with neither"""
+    if hasattr(model, 'feature_importances_'):
+        return np.asarray(model.feature_importances_, dtype=np.float64)
+    if hasattr(model, 'coef_'):
+        weights = np.abs(model.coef_).sum(axis=0)
+        return weights / weights.sum() if weights.sum() else weights
+    return None
+
+
+def budget_rows(model, X, evaluations, time_budget, n_jobs=1):
+    """Rows to score so that ``evaluations`` predictions fit the time budget"""
+    probe = X[:min(PROBE_ROWS, len(X))]
+    start = time.perf_counter()
+    model.predict_proba(probe)
+    per_row = max(time.perf_counter() - start, 1e-6) / len(probe)
+    rows = int(time_budget * max(n_jobs, 1) / (per_row * evaluations))
+    return min(len(X), max(MIN_ROWS, rows))
+
+
+def permuted_score(model, X, y_positive, column, seed):
+    """ROC AUC with one column shuffled"""
+    X = X.copy()
+    X[:, column] = np.random.default_rng(seed).permutation(X[:, column])
+    return roc_auc_score(y_positive, model.predict_proba(X)[:, 1])
+
+
+def permutation_importance(model, X, y, repeats=DEFAULT_REPEATS, time_budget=DEFAULT_TIME_BUDGET,
+                           n_jobs=None, seed=42):
+    """Drop in ROC AUC when each column is shuffled, over ``repeats`` shuffles.
+
+    The rows scored are a random subsample sized so that every shuffle of
+    every column fits ``time_budget`` seconds; each (column, shuffle) pair
+    is scored as its own task in parallel threads.
+    """
+    n_jobs = n_jobs or 1
+    rows = budget_rows(model, X, X.shape[1] * repeats + 1, time_budget, n_jobs)
+    rng = np.random.default_rng(seed)
+    sample = np.sort(rng.choice(len(X), rows, replace=False))
+    X_sample = np.ascontiguousarray(X[sample], dtype=np.float32)
+    y_positive = np.asarray(y)[sample] == model.classes_[1]
+
+    baseline = roc_auc_score(y_positive, model.predict_proba(X_sample)[:, 1])
+    tasks = list(itertools.product(range(X.shape[1]), range(repeats)))
+    scores = Parallel(n_jobs=n_jobs, prefer="threads")(
+        delayed(permuted_score)(model, X_sample, y_positive, column, [seed, column, repeat])
+        for column, repeat in tasks
+    )
+    drops = baseline - np.asarray(scores).reshape(X.shape[1], repeats)
+    return {
+        'baseline': float(baseline),
+        'rows': rows,
+        'repeats': repeats,
+        'mean': drops.mean(axis=1),
+        'std': drops.std(axis=1)
+    }
+
+
+class ImportanceCache:
+    """Feature importances of trained models, keyed by run and settings"""
+
+    def __init__(self, directory=None, max_bytes=IMPORTANCE_CACHE_BYTES):
+        self.cache = DiskCache(directory or os.path.join(CACHE_ROOT, "importance"), max_bytes)
+
+    def load(self, key):
+        def read(entry):
+            with open(os.path.join(entry, "importance.json")) as f:
+                return json.load(f)
+
+        return self.cache.get(key, read)
+
+    def store(self, key, importance):
+        def write(directory):
+            with open(os.path.join(directory, "importance.json"), "w") as f:
+                json.dump(importance, f)
+
+        return self.cache.put(key, write)
+
+
+def importance_key(job, repeats, time_budget):
+    try:
+        return run_key(run=TrainingRun(job).run_cache_key(), repeats=repeats, time_budget=time_budget)
+    except (OSError, ValueError):
+        return None
+
+
+def cached_importance(job, repeats=DEFAULT_REPEATS, time_budget=DEFAULT_TIME_BUDGET):
+    """The stored result of ``feature_importance`` for these settings, or None"""
+    key = importance_key(job, repeats, time_budget)
+    if key is None:
+        return None
+    cached = ImportanceCache().load(key)
+    return None if cached is None else dict(cached, cached=True)
+
+
+def test_matrix(job, pipeline):
+    """(X_test, y_test) as the model saw them: the run's cached prepared
+    split, or else the rows prepare() held out of the file coded with
+    ``pipeline``"""
+    prepared = PreparedDataCache().load(run_key(**TrainingRun(job).data_key_parts()))
+    if prepared is not None:
+        return prepared.X_test, prepared.y_test
+
+    df = load_training_frame(job['file_path'], job['columns'])
+    test = df.iloc[split_rows(len(df))[1]]
+    return pipeline.transform(test).astype(np.float32, copy=False), pipeline.encode_target(test)
+
+
+def fold_permutation_importance(job, pipeline, repeats=DEFAULT_REPEATS,
+                                time_budget=DEFAULT_TIME_BUDGET, n_jobs=None):
+    """Permutation importance of a cross-validated run.
+
+    The final model was refitted on every row, so it has no unseen rows to
+    score. Instead each fold's model is refitted, one at a time, and
+    scored on the fold it was not trained on, with the time budget split
+    between the folds; the drops are pooled over folds. Only the shuffles
+    count against the budget.
+    """
+    df = load_training_frame(job['file_path'], job['columns'])
+    X = pipeline.encode(df)
+    y = pipeline.encode_target(df)
+    fold_ids = assign_folds(y, job['folds'])
+    del df
+
+    results = []
+    for fold in range(job['folds']):
+        fitted = fit_fold(X, y, fold_ids, fold, job['engine'], job['params'], job['imbalance'], job['ratio'],
+                          n_jobs=n_jobs)
+        results.append(permutation_importance(
+            fitted['model'], fitted['X_test'], fitted['y_test'], repeats, time_budget / job['folds'], n_jobs,
+            seed=42 + fold
+        ))
+        del fitted
+
+    means = np.array([result['mean'] for result in results])
+    stds = np.array([result['std'] for result in results])
+    return {
+        'baseline': float(np.mean([result['baseline'] for result in results])),
+        'rows': sum(result['rows'] for result in results),
+        'repeats': repeats,
+        'mean': means.mean(axis=0),
+        # spread over every shuffle of every fold
+        'std': np.sqrt((stds ** 2).mean(axis=0) + means.var(axis=0))
+    }
+
+
+def feature_importance(job, model, preprocessors, repeats=DEFAULT_REPEATS, time_budget=DEFAULT_TIME_BUDGET,
+                       n_jobs=None):
+    """Impurity and permutation importance of a trained model on rows it
+    was not trained on: the test split, or each fold's held-out rows for
+    cross-validated runs.
+
+    Returns a dict of per-feature lists; results are cached per training
+    run and settings. Streaming models, which have no preprocessing
+    pipeline to score raw rows with, are not supported.
+    """
+    preprocessors = preprocessors or {}
+    if 'pipeline' not in preprocessors:
+        raise ValueError("Feature importance needs a model trained in-memory, with cross-validation or by tuning")
+    pipeline = preprocessors['pipeline']
+
+    cached = cached_importance(job, repeats, time_budget)
+    if cached is not None:
+        return cached
+
+    start = time.perf_counter()
+    impurity = impurity_importance(model)
+    if job['mode'] == "Cross-validation":
+        permutation = fold_permutation_importance(job, pipeline, repeats, time_budget, n_jobs)
+    else:
+        X_test, y_test = test_matrix(job, pipeline)
+        permutation = permutation_importance(model, X_test, y_test, repeats, time_budget, n_jobs)
+    importance = {
+        'features': list(pipeline.feature_columns_),
+        'impurity': None if impurity is None else impurity.tolist(),
+        'permutation_mean': permutation['mean'].tolist(),
+        'permutation_std': permutation['std'].tolist(),
+        'baseline_auc': permutation['baseline'],
+        'rows': permutation['rows'],
+        'repeats': repeats,
+        'seconds': time.perf_counter() - start
+    }
+    key = importance_key(job, repeats, time_budget)
+    if key is not None:
+        ImportanceCache().store(key, importance)
+    return dict(importance, cached=False)
+
+
+def run_importance_process(job, model, preprocessors, repeats, time_budget, messages):
+    """Entry point of the feature importance child process, which keeps
+    the data loading and scoring off the UI process like training does"""
+    if hasattr(os, "setsid"):
+        os.setsid()
+    resources = job['resources']
+    # the shuffles are the parallel tasks; the model scores each one on a single core
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=1)
+    try:
+        with resources.apply():
+            importance = feature_importance(job, model, preprocessors, repeats, time_budget,
+                                            n_jobs=resources.n_jobs)
+        messages.put(('done', importance))
+    except Exception as e:
+        messages.put(('error', str(e)))
@@ -0,0 +1,157 @@
+import os
+import numpy as np
+import pandas as pd
+
+SAMPLE_ROWS = 100_000
+CHUNK_ROWS = 250_000
+CATEGORY_RATIO = 0.5
+INT_TYPES = (np.int8, np.int16, np.int32, np.int64)
+FLOAT32_EXACT_INT = 2 ** 24
+
+
+def smallest_int_type(low, high):
+    """Return the narrowest signed integer type that can hold [low, high]"""
+    for int_type in INT_TYPES:
+        info = np.iinfo(int_type)
+        if info.min <= low and high <= info.max:
+            return int_type
+    return np.int64
+
+
+def infer_dtypes(sample, category_ratio=CATEGORY_RATIO):
+    """Pick a compact dtype for each column from a sample of the file.
+
+    Integers get the narrowest signed type that fits the sample, floats are
+    stored as float32, repetitive text columns become ``category`` and
+    other text columns stay ``str``, so a later chunk of digit-only values
+    is not parsed as numbers. Boolean columns keep whatever pandas infers.
+    """
+    dtypes = {}
+    for column in sample.columns:
+        series = sample[column]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            dtypes[column] = smallest_int_type(series.min(), series.max())
+        elif pd.api.types.is_float_dtype(series):
+            dtypes[column] = np.float32
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            non_null = series.dropna()
+            if len(non_null) and non_null.nunique() <= category_ratio * len(non_null):
+                dtypes[column] = "category"
+            else:
+                dtypes[column] = str
+    return dtypes
+
+
+class _TextInNumericColumn(Exception):
+    """A chunk holds text in a column the sample planned as numeric"""
+
+    def __init__(self, column):
+        super().__init__(column)
+        self.column = column
+
+
+def _coerce_chunk(chunk, dtypes):
+    """Cast a freshly parsed chunk to the planned dtypes, widening the plan
+    when the chunk holds values the sample did not. Text in a numeric column
+    raises ``_TextInNumericColumn``, as earlier chunks were already cast."""
+    for column, dtype in list(dtypes.items()):
+        if column not in chunk:
+            continue
+        series = chunk[column]
+
+        if dtype is str:
+            continue
+        if dtype == "category":
+            chunk[column] = series.astype("category")
+            continue
+
+        if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            raise _TextInNumericColumn(column)
+
+        if np.issubdtype(dtype, np.integer):
+            if pd.api.types.is_integer_dtype(series):
+                dtype = np.result_type(dtype, smallest_int_type(series.min(), series.max())).type
+            else:
+                # nulls or decimals showed up after the sample
+                magnitude = np.nanmax(np.abs(series.to_numpy(dtype=np.float64, na_value=np.nan)), initial=0)
+                dtype = np.float32 if magnitude < FLOAT32_EXACT_INT else np.float64
+            dtypes[column] = dtype
+
+        chunk[column] = series.astype(dtype)
+    return chunk
+
+
+def concat_chunks(chunks):
+    """Concatenate typed chunks, unifying categories so that categorical
+    columns stay categorical instead of falling back to object."""
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0]
+
+    for column in chunks[0].columns:
+        if not all(isinstance(chunk[column].dtype, pd.CategoricalDtype) for chunk in chunks):
+            continue
+        categories = chunks[0][column].cat.categories
+        for chunk in chunks[1:]:
+            categories = categories.union(chunk[column].cat.categories)
+        for chunk in chunks:
+            chunk[column] = chunk[column].cat.set_categories(categories)
+
+    return pd.concat(chunks, ignore_index=True)
+
+
+def read_csv_chunked(file_path, chunksize=CHUNK_ROWS, sample_rows=SAMPLE_ROWS,
+                     progress_callback=None, cancel_event=None, sketch=None):
+    """Read a CSV in chunks into a frame with compact dtypes.
+
+    ``progress_callback(rows_read, bytes_read, total_bytes)`` is called after
+    every chunk. If ``cancel_event`` is set while reading, None is returned.
+    A column the sample took for numeric but that holds text further down
+    is read again from the start as text, so it never mixes numbers and
+    strings. A ``sketch`` (``core.sketches.DatasetSketch``) is updated
+    with the rows of every typed chunk that have no missing values, the
+    rows the app keeps, so approximate profiles need no second read; with
+    several workers it sketches each chunk while the next one is parsed.
+    """
+    sample = pd.read_csv(file_path, nrows=sample_rows)
+    dtypes = infer_dtypes(sample)
+    del sample
+
+    text_columns = []
+    while True:
+        if sketch is not None:
+            sketch.reset()
+        try:
+            df = _read_typed_chunks(file_path, dtypes, text_columns, chunksize, progress_callback, cancel_event, sketch)
+            if sketch is not None:
+                sketch.flush()
+            return df
+        except _TextInNumericColumn as e:
+            del dtypes[e.column]
+            text_columns.append(e.column)
+
+
+def _read_typed_chunks(file_path, dtypes, text_columns, chunksize, progress_callback, cancel_event, sketch):
+    total_bytes = os.path.getsize(file_path)
+    # text is parsed as text in every chunk; categories are built from it afterwards
+    read_as_text = text_columns + [column for column, dtype in dtypes.items() if dtype is str or dtype == "category"]
+    chunks = []
+    rows_read = 0
+    with open(file_path, "rb") as handle:
+        for chunk in pd.read_csv(handle, chunksize=chunksize, dtype={column: str for column in read_as_text}):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+
+            chunk = _coerce_chunk(chunk, dtypes)
+            if sketch is not None:
+                sketch.update(chunk[chunk.notna().all(axis=1)])
+            chunks.append(chunk)
+            rows_read += len(chunk)
+
+            if progress_callback:
+                progress_callback(rows_read, min(handle.tell(), total_bytes), total_bytes)
+
+    return concat_chunks(chunks)
@@ -0,0 +1,240 @@
+import json
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from core.bootstrap import DEFAULT_RESAMPLES
+from core.cross_validation import DEFAULT_FOLDS
+from core.engines import DEFAULT_ENGINE, get_engine
+from core.evaluation import DEFAULT_COSTS, DEFAULT_THRESHOLD, draw_evaluation, draw_history, evaluation_curves, metrics_summary
+from core.export import raw_input_columns, save_model, script_unsupported, training_script
+from core.imbalance import default_strategy, get_strategy
+from core.resources import ResourceSettings
+from core.runner import TrainingRun
+from core.streaming import DEFAULT_EPOCHS, DEFAULT_MEMORY_BUDGET
+from core.telemetry import StageTimer
+
+TASK_TYPES = ("credit_risk", "fraud_detection")
+MODES = ("In-memory", "Streaming", "Cross-validation", "Tuning")
+
+DEFAULTS = {
+    'drop': [],
+    'mode': "In-memory",
+    'engine': DEFAULT_ENGINE,
+    'params': {},
+    'imbalance': None,
+    'ratio': 1.0,
+    'folds': DEFAULT_FOLDS,
+    'bootstrap': DEFAULT_RESAMPLES,
+    'memory_budget_mb': DEFAULT_MEMORY_BUDGET // 1024 ** 2,
+    'epochs': DEFAULT_EPOCHS,
+    'cores': None,
+    'backend': "Threads",
+    'use_cache': True,
+    'profile': False,
+    'threshold': None,
+    'miss_cost': None,
+    'false_alarm_cost': None,
+    'reviews_per_day': None,
+    'cases_per_day': None
+}
+SCORE_CHUNK_ROWS = 200_000
+
+
+def load_config(path):
+    """Read a JSON batch config: one job dict, or a list of them"""
+    with open(path) as f:
+        config = json.load(f)
+    return config if isinstance(config, list) else [config]
+
+
+def build_job(config):
+    """Turn a batch config into the job dict the training screen would build.
+
+    Required keys are ``data``, ``task_type`` and ``target``; everything
+    else falls back to ``DEFAULTS``. Engine parameters given as strings are
+    parsed like the training screen's inputs.
+    """
+    config = dict(DEFAULTS, **config)
+    for key in ('data', 'task_type', 'target'):
+        if not config.get(key):
+            raise ValueError(f"The batch config needs a '{key}'")
+    if config['task_type'] not in TASK_TYPES:
+        raise ValueError(f"Unknown task type '{config['task_type']}', expected one of {', '.join(TASK_TYPES)}")
+    if config['mode'] not in MODES:
+        raise ValueError(f"Unknown mode '{config['mode']}', expected one of {', '.join(MODES)}")
+
+    header = list(pd.read_csv(config['data'], nrows=0).columns)
+    missing = [column for column in [config['target'], *config['drop']] if column not in header]
+    if missing:
+        raise ValueError(f"Columns not in {config['data']}: {', '.join(missing)}")
+    if config['target'] in config['drop']:
+        raise ValueError("The target column cannot be dropped")
+
+    task_type = config['task_type']
+    engine = get_engine(config['engine'])
+    params = engine.default_params(task_type)
+    for param in engine.hyperparameters:
+        if param.name in config['params']:
+            value = config['params'][param.name]
+            params[param.name] = param.parse(value, task_type) if isinstance(value, str) else value
+    unknown = set(config['params']) - set(params)
+    if unknown:
+        raise ValueError(f"{engine.name} has no parameters {', '.join(sorted(unknown))}")
+
+    imbalance = config['imbalance'] or default_strategy(task_type)
+    get_strategy(imbalance)
+    return {
+        'file_path': config['data'],
+        'columns': [column for column in header if column not in config['drop']],
+        'target_column': config['target'],
+        'task_type': task_type,
+        'imbalance': imbalance,
+        'ratio': min(max(float(config['ratio']), 0.01), 1.0),
+        'mode': config['mode'],
+        'engine': engine.name,
+        'params': params,
+        'folds': int(config['folds']),
+        'bootstrap': int(config['bootstrap']),
+        'memory_budget': int(float(config['memory_budget_mb']) * 1024 ** 2),
+        'epochs': max(1, int(config['epochs'])),
+        'use_cache': config['use_cache'],
+        'profile': config['profile'],
+        # a headless run has no UI to keep responsive
+        'resources': ResourceSettings(cores=config['cores'], backend=config['backend'], reserve_for_ui=0)
+    }
+
+
+def choose_threshold(config, curves):
+    """The decision threshold for a batch config: a fixed ``threshold``, the
+    cost-optimal one when costs are given, or 0.5. Returns (threshold, details)."""
+    config = dict(DEFAULTS, **config)
+    if config['threshold'] is not None:
+        return float(config['threshold']), {'method': "fixed"}
+    if config['miss_cost'] is None and config['false_alarm_cost'] is None:
+        return DEFAULT_THRESHOLD, {'method': "default"}
+
+    costs = DEFAULT_COSTS[config['task_type']]
+    miss_cost = float(config['miss_cost'] if config['miss_cost'] is not None else costs['miss_cost'])
+    false_alarm_cost = float(config['false_alarm_cost'] if config['false_alarm_cost'] is not None else costs['false_alarm_cost'])
+    max_flag_rate = None
+    if config['reviews_per_day'] is not None and config['cases_per_day']:
+        max_flag_rate = float(config['reviews_per_day']) / float(config['cases_per_day'])
+
+    best = curves.optimal_threshold(miss_cost, false_alarm_cost, max_flag_rate)
+    return best['threshold'], {
+        'method': "cost",
+        'miss_cost': miss_cost,
+        'false_alarm_cost': false_alarm_cost,
+        'max_flag_rate': max_flag_rate,
+        'expected_cost': best['cost']
+    }
+
+
+def save_figure(fig, path):
+    FigureCanvasAgg(fig)
+    fig.savefig(path, dpi=120)
+
+
+def run_pipeline(config, output_dir, emit=None, should_stop=None):
+    """Prepare, train, evaluate and export one batch config without a display.
+
+    Writes ``model.pkl``, ``train_model.py``, ``metrics.json``,
+    ``evaluation.png``, ``training_history.png`` and ``telemetry.jsonl`` to
+    ``output_dir`` and returns the metrics summary, or None if stopped.
+    """
+    job = build_job(config)
+    os.makedirs(output_dir, exist_ok=True)
+
+    resources = job['resources']
+    with resources.apply():
+        training = TrainingRun(job, emit=emit, should_stop=should_stop)
+        run = training.run()
+    if run is None:
+        return None
+
+    timer = StageTimer(profile=job['profile'])
+    timer.run_id = run['run_id']
+    timer.records = list(run['telemetry'])
+    metrics = run['final_metrics']
+    threshold, threshold_choice = choose_threshold(config, evaluation_curves(metrics))
+
+    with timer.stage("Evaluation rendering", rows=len(metrics['y_test'])):
+        fig = Figure(figsize=(12, 8))
+        draw_evaluation(fig, metrics, threshold)
+        save_figure(fig, os.path.join(output_dir, "evaluation.png"))
+        if run['history']:
+            fig = Figure(figsize=(8, 5))
+            unit = {'Streaming': "Chunks", 'Cross-validation': "Folds"}.get(job['mode'], get_engine(job['engine']).progress_unit)
+            draw_history(fig, run['history'], unit)
+            save_figure(fig, os.path.join(output_dir, "training_history.png"))
+
+    with timer.stage("Export"):
+        save_model(os.path.join(output_dir, "model.pkl"), run['model'], run['preprocessors'], threshold=threshold)
+        if script_unsupported(job['mode'], run['engine_name']) is None:
+            code = training_script(
+                job['file_path'], job['columns'], job['target_column'], job['task_type'],
+                run['model'], job['imbalance'], job['ratio'],
+                threshold=threshold
+            )
+            with open(os.path.join(output_dir, "train_model.py"), "w") as f:
+                f.write(code)
+
+    summary = metrics_summary(metrics, threshold)
+    summary['threshold_choice'] = threshold_choice
+    summary.update({
+        'data': job['file_path'],
+        'target': job['target_column'],
+        'task_type': job['task_type'],
+        'mode': job['mode'],
+        'engine': run['engine_name'],
+        'params': run['engine_params'],
+        'imbalance': job['imbalance'],
+        'ratio': job['ratio'],
+        'completion_reason': run['completion_reason'],
+        'stages': {name: seconds for name, seconds in timer.stages}
+    })
+    if run['trials']:
+        summary['trials'] = run['trials']
+    with open(os.path.join(output_dir, "metrics.json"), "w") as f:
+        json.dump(summary, f, indent=2, default=float)
+
+    timer.write_log(os.path.join(output_dir, "telemetry.jsonl"), screen="batch", mode=job['mode'], engine=run['engine_name'])
+    return summary
+
+
+def score_file(model_path, data_path, output_path, chunksize=SCORE_CHUNK_ROWS):
+    """Score a CSV with an exported model, chunk by chunk.
+
+    Writes the input columns plus ``score`` (positive-class probability)
+    and ``prediction``, which applies any threshold saved with the model.
+    Returns the number of rows scored.
+    """
+    with open(model_path, 'rb') as f:
+        model = pickle.load(f)
+    threshold = getattr(model, 'threshold', None)
+
+    # fail before writing anything rather than with a feature-count error mid-file
+    columns = raw_input_columns(model)
+    if columns is None:
+        raise ValueError(f"{model_path} holds a model without its preprocessing; re-export it to score raw CSV rows")
+    missing = [column for column in columns if column not in pd.read_csv(data_path, nrows=0).columns]
+    if missing:
+        raise ValueError(f"{data_path} is missing the model's input columns: {', '.join(missing)}")
+
+    rows = 0
+    header = True
+    for chunk in pd.read_csv(data_path, chunksize=chunksize):
+        proba = model.predict_proba(chunk)
+        chunk['score'] = proba[:, 1]
+        # same decision as model.predict, without scoring the chunk twice
+        if threshold is None:
+            chunk['prediction'] = model.classes_[np.argmax(proba, axis=1)]
+        else:
+            chunk['prediction'] = model.classes_[(proba[:, 1] > threshold).astype(int)]
+        chunk.to_csv(output_path, mode='w' if header else 'a', header=header, index=False)
+        header = False
+        rows += len(chunk)
+    return rows
@@ -0,0 +1,169 @@
+import os
+import json
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+from core.cache import CACHE_ROOT, DiskCache
+from core.imbalance import resample_with_report
+
+PREPARED_CACHE_BYTES = 10 * 1024 ** 3
+ARRAYS = ("X_train", "X_test", "y_train", "y_test")
+
+
+def is_categorical(series):
+    return (
+        isinstance(series.dtype, pd.CategoricalDtype)
+        or pd.api.types.is_object_dtype(series)
+        or pd.api.types.is_string_dtype(series)
+        or pd.api.types.is_bool_dtype(series)
+    )
+
+
+class PreprocessingPipeline(TransformerMixin, BaseEstimator):
+    """Column selection, categorical coding and scaling, fitted once.
+
+    Categorical columns are coded with pandas category codes against the
+    categories seen at fit time (unseen values become -1), and the coded
+    float32 matrix is standardized. Being an sklearn transformer, it can be
+    chained in front of a model to score raw frames.
+    """
+
+    def __init__(self, target_column=None):
+        self.target_column = target_column
+
+    def fit_encoding(self, df):
+        self.feature_columns_ = [column for column in df.columns if column != self.target_column]
+        self.categories_ = {
+            column: df[column].astype("category").cat.categories
+            for column in self.feature_columns_ if is_categorical(df[column])
+        }
+        self.target_categories_ = None
+        if self.target_column in df and is_categorical(df[self.target_column]):
+            self.target_categories_ = df[self.target_column].astype("category").cat.categories
+        return self
+
+    def encode(self, df):
+        """Code the feature columns of df into a float32 matrix (unscaled)"""
+        X = np.empty((len(df), len(self.feature_columns_)), dtype=np.float32)
+        for i, column in enumerate(self.feature_columns_):
+            if column in self.categories_:
+                X[:, i] = pd.Categorical(df[column], categories=self.categories_[column]).codes
+            else:
+                X[:, i] = df[column].to_numpy(dtype=np.float32)
+        return X
+
+    def encode_target(self, df):
+        target = df[self.target_column]
+        if self.target_categories_ is not None:
+            return pd.Categorical(target, categories=self.target_categories_).codes
+        return target.to_numpy()
+
+    def fit_scaling(self, X):
+        self.scaler_ = StandardScaler().fit(X)
+        return self
+
+    def fit(self, df, y=None):
+        return self.fit_encoding(df).fit_scaling(self.encode(df))
+
+    def transform(self, df):
+        return self.scaler_.transform(self.encode(df))
+
+
+class PreparedData:
+    """A fitted pipeline with the train/test matrices it produced"""
+
+    def __init__(self, pipeline, X_train, X_test, y_train, y_test, resampling=None):
+        self.pipeline = pipeline
+        self.X_train = X_train
+        self.X_test = X_test
+        self.y_train = y_train
+        self.y_test = y_test
+        self.resampling = resampling
+
+    @property
+    def feature_names(self):
+        return self.pipeline.feature_columns_
+
+    @property
+    def real_rows(self):
+        """Leading training rows that are original data; oversampling
+        appends its synthetic rows after them. None if nothing was resampled."""
+        return self.resampling['rows_before'] if self.resampling is not None else None
+
+
+def split_rows(rows, test_size=0.2, seed=42):
+    """Train and test row positions of the split every run uses"""
+    return train_test_split(np.arange(rows), test_size=test_size, random_state=seed)
+
+
+def prepare(df, target_column, strategy=None, ratio=1.0, n_jobs=None, timer=None, test_size=0.2, seed=42):
+    """Fit a pipeline on df and build scaled float32 train/test matrices.
+
+    An imbalance ``strategy`` may rebalance the coded training rows
+    towards ``ratio`` before the scaler is fitted on them; its time and
+    memory cost is kept as ``resampling`` on the result.
+    """
+    def stage(name, rows=None, columns=None):
+        return timer.stage(name, rows, columns) if timer is not None else _NullStage()
+
+    with stage("Encoding and split", *df.shape):
+        pipeline = PreprocessingPipeline(target_column).fit_encoding(df)
+        X = pipeline.encode(df)
+        y = pipeline.encode_target(df)
+        train_rows, test_rows = split_rows(len(df), test_size, seed)
+        X_train, X_test = X[train_rows], X[test_rows]
+        y_train, y_test = y[train_rows], y[test_rows]
+        del X
+
+    resampling = None
+    if strategy is not None:
+        with stage("Resampling", *X_train.shape) as record:
+            X_train, y_train, resampling = resample_with_report(
+                strategy, X_train, y_train, ratio=ratio, n_jobs=n_jobs, seed=seed
+            )
+            record['rows'] = len(y_train)
+
+    with stage("Scaling", *X_train.shape):
+        pipeline.fit_scaling(X_train)
+        X_train = pipeline.scaler_.transform(X_train).astype(np.float32, copy=False)
+        X_test = pipeline.scaler_.transform(X_test).astype(np.float32, copy=False)
+
+    return PreparedData(pipeline, X_train, X_test, np.asarray(y_train), np.asarray(y_test), resampling)
+
+
+class _NullStage:
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, *exc):
+        return False
+
+
+class PreparedDataCache:
+    """Prepared matrices stored as .npy files and loaded memory-mapped"""
+
+    def __init__(self, directory=None, max_bytes=PREPARED_CACHE_BYTES):
+        self.cache = DiskCache(directory or os.path.join(CACHE_ROOT, "prepared"), max_bytes)
+
+    def load(self, key):
+        def read(entry):
+            pipeline = joblib.load(os.path.join(entry, "pipeline.joblib"))
+            arrays = [np.load(os.path.join(entry, f"{name}.npy"), mmap_mode="r") for name in ARRAYS]
+            with open(os.path.join(entry, "resampling.json")) as f:
+                resampling = json.load(f)
+            return PreparedData(pipeline, *arrays, resampling=resampling)
+
+        return self.cache.get(key, read)
+
+    def store(self, key, prepared):
+        def write(directory):
+            joblib.dump(prepared.pipeline, os.path.join(directory, "pipeline.joblib"))
+            for name in ARRAYS:
+                np.save(os.path.join(directory, f"{name}.npy"), np.ascontiguousarray(getattr(prepared, name)))
+            with open(os.path.join(directory, "resampling.json"), "w") as f:
+                json.dump(prepared.resampling, f, default=float)
+
+        return self.cache.put(key, write)
@@ -0,0 +1,131 @@
+import pandas as pd
+
+MAX_TRACKED_CLASSES = 50
+
+
+class ColumnProfile:
+    """Summary statistics for a single column"""
+
+    def __init__(self, name, dtype, null_count, cardinality, minimum=None, maximum=None,
+                 mean=None, value_counts=None, quantiles=None, approximate=False):
+        self.name = name
+        self.dtype = dtype
+        self.null_count = int(null_count)
+        self.cardinality = int(cardinality)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.mean = mean
+        self.value_counts = value_counts
+        self.quantiles = quantiles
+        self.approximate = approximate
+
+    @property
+    def is_categorical(self):
+        return (
+            isinstance(self.dtype, pd.CategoricalDtype)
+            or pd.api.types.is_object_dtype(self.dtype)
+            or pd.api.types.is_string_dtype(self.dtype)
+        )
+
+    def class_ratio(self):
+        """Minority to majority class ratio, or None if not tracked"""
+        if self.value_counts is None or len(self.value_counts) == 0:
+            return None
+        return self.value_counts.min() / self.value_counts.max()
+
+    def describe(self):
+        approx = "~" if self.approximate else ""
+        text = f"{self.dtype} · {self.null_count:,} missing · {approx}{self.cardinality:,} distinct"
+        if self.mean is not None:
+            text += f" · min {self.minimum:,.4g} · max {self.maximum:,.4g} · mean {self.mean:,.4g}"
+        if self.quantiles:
+            text += " · " + " · ".join(f"p{q * 100:g} {approx}{value:,.4g}" for q, value in self.quantiles.items())
+        return text
+
+
+class DatasetProfile:
+    """Per-column profiles of a frame, computed in one vectorized pass or
+    estimated from streaming sketches.
+
+    Dropping a column only removes its profile; nothing is rescanned.
+    """
+
+    def __init__(self, row_count, columns):
+        self.row_count = row_count
+        self.columns = columns
+
+    @classmethod
+    def from_frame(cls, df):
+        null_counts = df.isna().sum()
+        cardinality = df.nunique()
+
+        numeric = df.select_dtypes(include="number")
+        summary = numeric.agg(["min", "max", "mean"]) if len(numeric.columns) else pd.DataFrame()
+
+        columns = {}
+        for name in df.columns:
+            value_counts = None
+            if cardinality[name] <= MAX_TRACKED_CLASSES:
+                value_counts = df[name].value_counts()
+
+            stats = {}
+            if name in summary.columns:
+                stats = dict(
+                    minimum=summary.at["min", name],
+                    maximum=summary.at["max", name],
+                    mean=summary.at["mean", name]
+                )
+
+            columns[name] = ColumnProfile(
+                name, df[name].dtype, null_counts[name], cardinality[name],
+                value_counts=value_counts, **stats
+            )
+
+        return cls(len(df), columns)
+
+    @classmethod
+    def from_sketch(cls, sketch, dtypes=None):
+        """Build approximate profiles from a DatasetSketch without touching the data.
+
+        ``dtypes`` overrides the dtypes seen while sketching, e.g. with the
+        compact dtypes of the loaded frame.
+        """
+        columns = {}
+        for name, column in sketch.columns.items():
+            cardinality = int(round(column.distinct.estimate()))
+            value_counts = None
+            if cardinality <= MAX_TRACKED_CLASSES:
+                value_counts = column.frequencies.heavy_hitters()
+
+            quantiles = None
+            if column.quantile_sketch is not None:
+                qs = (0.5, 0.99)
+                quantiles = dict(zip(qs, column.quantile_sketch.quantiles(qs)))
+                if None in quantiles.values():
+                    quantiles = None
+
+            dtype = dtypes[name] if dtypes is not None and name in dtypes else column.dtype
+            columns[name] = ColumnProfile(
+                name, dtype, column.nulls, cardinality,
+                minimum=column.minimum, maximum=column.maximum, mean=column.mean,
+                value_counts=value_counts, quantiles=quantiles, approximate=True
+            )
+
+        return cls(sketch.row_count, columns)
+
+    def categorical_columns(self):
+        return [name for name, column in self.columns.items() if column.is_categorical]
+
+    def drop_column(self, name):
+        self.columns.pop(name, None)
+
+    def class_ratio(self, df, target_column):
+        """Minority to majority class ratio of the target column.
+
+        High-cardinality columns are not tracked at load time, so their
+        counts are computed on first request and kept.
+        """
+        column = self.columns[target_column]
+        if column.value_counts is None:
+            column.value_counts = df[target_column].value_counts()
+        return column.class_ratio()
@@ -0,0 +1,60 @@
+import os
+from contextlib import contextmanager
+from joblib import parallel_backend
+from threadpoolctl import threadpool_limits
+
+BACKENDS = {
+    "Threads": "threading",
+    "Processes": "loky"
+}
+
+
+def available_cpus():
+    """CPUs this process may run on, honoring any existing affinity mask"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+class ResourceSettings:
+    """How many cores training may use and how work is spread over them.
+
+    ``reserve_for_ui`` cores are kept free for the Tk event loop: they are
+    left out of the worker count and, where the platform allows it, out of
+    the affinity mask of the training thread.
+    """
+
+    def __init__(self, cores=None, backend="Threads", reserve_for_ui=1):
+        self.cores = cores
+        self.backend = backend
+        self.reserve_for_ui = reserve_for_ui
+        # captured once: a pinned thread would otherwise see its own reduced mask
+        self.cpus = available_cpus()
+
+    def worker_cpus(self):
+        cpus = self.cpus
+        if len(cpus) > self.reserve_for_ui:
+            cpus = cpus[self.reserve_for_ui:]
+        if self.cores:
+            cpus = cpus[:self.cores]
+        return cpus
+
+    @property
+    def n_jobs(self):
+        return len(self.worker_cpus())
+
+    def pin_current_thread(self):
+        """Restrict the calling thread, and every thread or process it starts
+        afterwards, to the worker CPUs. No-op where affinity is unsupported."""
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, self.worker_cpus())
+
+    @contextmanager
+    def apply(self):
+        """Run joblib-parallel work (fits, predictions) on the chosen backend,
+        with OpenMP/BLAS thread pools capped to the same worker count"""
+        with parallel_backend(BACKENDS[self.backend], n_jobs=self.n_jobs), threadpool_limits(limits=self.n_jobs):
+            yield
+
+    def describe(self):
+        return f"{self.n_jobs} cores ({self.backend.lower()}, {self.reserve_for_ui} reserved for UI)"
@@ -0,0 +1,34 @@
+import hashlib
+import json
+import os
+import joblib
+from core.cache import CACHE_ROOT, DiskCache
+
+RUN_CACHE_BYTES = 2 * 1024 ** 3
+# bump when training changes what a stored run would hold for the same inputs
+RUN_CACHE_VERSION = 1
+
+
+def run_key(**parts):
+    """Content address of a training run from everything that shapes its result"""
+    payload = json.dumps(dict(parts, version=RUN_CACHE_VERSION), sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class RunCache:
+    """Trained models, fitted preprocessors and final metrics of past runs"""
+
+    def __init__(self, directory=None, max_bytes=RUN_CACHE_BYTES):
+        self.cache = DiskCache(directory or os.path.join(CACHE_ROOT, "runs"), max_bytes)
+
+    def load(self, key):
+        """Return the stored run for key, or None on a miss"""
+        return self.cache.get(key, lambda entry: joblib.load(os.path.join(entry, "run.joblib")))
+
+    def store(self, key, run):
+        return self.cache.put(key, lambda directory: joblib.dump(run, os.path.join(directory, "run.joblib")))
+
+    def replace(self, key, run):
+        """Overwrite the stored run for key"""
+        self.cache.remove(key)
+        return self.store(key, run)
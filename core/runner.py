@@ -0,0 +1,419 @@
+import os
+import signal
+import numpy as np
+import pandas as pd
+from core.cross_validation import cross_validate
+from core.bootstrap import DEFAULT_RESAMPLES, bootstrap_intervals
+from core.dataset_cache import DatasetCache, file_fingerprint
+from core.engines import get_engine
+from core.evaluation import DEFAULT_THRESHOLD, ThresholdCurves, evaluation_curves
+from core.imbalance import describe_report, get_strategy
+from core.ingestion import read_csv_chunked
+from core.preprocessing import PreparedDataCache, PreprocessingPipeline, prepare
+from core.run_cache import RunCache, run_key
+from core.streaming import stream_train
+from core.telemetry import StageTimer
+from core.training import validation_split
+from core.tuning import describe_trials, hyperband
+
+
+def load_training_frame(file_path, columns):
+    """The frame the data preparation screen shows: the parsed file without
+    rows that had missing values, limited to the kept columns"""
+    df = DatasetCache().load(file_path)
+    if df is None:
+        df = read_csv_chunked(file_path)
+    return df.dropna()[list(columns)]
+
+
+class TrainingRun:
+    """One training job, independent of the UI.
+
+    ``job`` is a plain dict describing the data, mode, engine and resources
+    (see ``ui/training.py``). Progress goes to ``emit(kind, payload)`` as
+    ``('status', text)`` and ``('progress', metrics)`` messages; ``run()``
+    returns the trained model, preprocessors and final metrics.
+    """
+
+    def __init__(self, job, emit=None, should_stop=None):
+        self.job = job
+        self.emit = emit or (lambda kind, payload: None)
+        self.should_stop = should_stop or (lambda: False)
+        self.resources = job['resources']
+        self.timer = StageTimer(profile=job.get('profile', False))
+        self.history = []
+        self._df = None
+        self.model = None
+        self.preprocessors = None
+        self.engine_name = None
+        self.engine_params = None
+        self.fold_metrics = None
+        self.trials = None
+
+    @property
+    def df(self):
+        if self._df is None:
+            with self.timer.stage("Loading data") as record:
+                self._df = load_training_frame(self.job['file_path'], self.job['columns'])
+                record['rows'], record['columns'] = self._df.shape
+        return self._df
+
+    def status(self, text):
+        self.emit('status', text)
+
+    def report_progress(self, metrics):
+        self.history.append(metrics)
+        self.emit('progress', metrics)
+
+    def dropped_columns(self):
+        header = pd.read_csv(self.job['file_path'], nrows=0).columns
+        return [column for column in header if column not in self.job['columns']]
+
+    def data_key_parts(self):
+        job = self.job
+        return {
+            'dataset': file_fingerprint(job['file_path']),
+            'dropped_columns': sorted(self.dropped_columns()),
+            'target': job['target_column'],
+            'task_type': job['task_type'],
+            'imbalance': job['imbalance'],
+            'ratio': job['ratio'],
+            'seed': 42
+        }
+
+    def run_cache_key(self):
+        job = self.job
+        parts = self.data_key_parts()
+        parts['mode'] = job['mode']
+        if job['mode'] == "Streaming":
+            # streamed runs always weight classes; the imbalance settings do not change them
+            del parts['imbalance'], parts['ratio']
+            parts['memory_budget'] = job['memory_budget']
+            parts['epochs'] = job['epochs']
+        else:
+            if job['mode'] == "Cross-validation":
+                parts['folds'] = job['folds']
+            parts['engine'] = job['engine']
+            parts['params'] = job['params']
+            parts['class_weight'] = get_strategy(job['imbalance']).class_weight
+        return run_key(**parts)
+
+    def prepare_data(self):
+        """Return the PreparedData for the job's dataset and target.
+
+        The fitted pipeline and its matrices come from the prepared data
+        cache when the data, dropped columns, target and imbalance handling
+        are unchanged, so changing engine or hyperparameters never re-runs
+        preprocessing.
+        """
+        cache = PreparedDataCache()
+        try:
+            key = run_key(**self.data_key_parts())
+        except (OSError, ValueError):
+            key = None
+
+        prepared = cache.load(key) if key is not None else None
+
+        if prepared is None:
+            strategy = get_strategy(self.job['imbalance'])
+            prepared = prepare(
+                self.df, self.job['target_column'],
+                strategy=strategy if strategy.resamples else None,
+                ratio=self.job['ratio'],
+                n_jobs=self.resources.n_jobs,
+                timer=self.timer
+            )
+            if key is not None:
+                cache.store(key, prepared)
+
+        self.preprocessors = {'pipeline': prepared.pipeline}
+        return prepared
+
+    def run(self):
+        """Train (or restore) the job's model; None if stopped"""
+        job = self.job
+        if job['target_column'] == "Select":
+            raise ValueError("Please select a target column before training")
+
+        run_cache = RunCache()
+        try:
+            key = self.run_cache_key()
+        except (OSError, ValueError):
+            key = None
+
+        cached = run_cache.load(key) if key is not None and job['use_cache'] else None
+
+        if cached is not None:
+            for metrics in cached['history']:
+                self.report_progress(metrics)
+            if self.add_intervals(cached['final_metrics']):
+                # keep the new intervals with the run
+                run_cache.replace(key, cached)
+            cached['completion_reason'] += "\n\nResults loaded from the run cache."
+            cached['telemetry'] = self.timer.records
+            cached['run_id'] = self.timer.run_id
+            return cached
+
+        mode = job['mode']
+        if mode == "Streaming":
+            outcome = self.run_streaming_training()
+        elif mode == "Cross-validation":
+            outcome = self.run_cross_validation()
+        elif mode == "Tuning":
+            outcome = self.run_tuning()
+        else:
+            outcome = self.run_in_memory_training()
+
+        if outcome is None:
+            return None
+        y_test, proba, classes, completion_reason = outcome
+
+        # one sort of the scores yields the metrics here and every curve the evaluation screen draws
+        with self.timer.stage("Metrics", rows=len(y_test)):
+            y_test_proba = proba[:, 1]
+            y_test_pred = classes[np.argmax(proba, axis=1)]
+            curves = ThresholdCurves(y_test, y_test_proba, positive=classes[1])
+            point = curves.at(DEFAULT_THRESHOLD)
+
+        final_metrics = {
+            'precision': point['precision'],
+            'recall': point['recall'],
+            'f1': point['f1'],
+            'roc_auc': curves.roc_auc,
+            'pr_auc': curves.pr_auc,
+            'ks': curves.ks[0],
+            'y_test': np.asarray(y_test),
+            'y_pred': y_test_pred,
+            'y_proba': y_test_proba,
+            'curves': curves
+        }
+        if self.fold_metrics is not None:
+            final_metrics['folds'] = self.fold_metrics
+        self.add_intervals(final_metrics)
+
+        run = {
+            'model': self.model,
+            'preprocessors': self.preprocessors,
+            'engine_name': self.engine_name,
+            'engine_params': self.engine_params,
+            'history': self.history,
+            'final_metrics': final_metrics,
+            'trials': self.trials,
+            'completion_reason': completion_reason
+        }
+        if key is not None:
+            run_cache.store(key, run)
+
+        run['telemetry'] = self.timer.records
+        run['run_id'] = self.timer.run_id
+        return run
+
+    def add_intervals(self, final_metrics):
+        """Bootstrap confidence intervals for the headline metrics, kept in
+        the final metrics (and so in the run cache) until the resample
+        count changes. Returns whether they were (re)computed."""
+        resamples = self.job.get('bootstrap', DEFAULT_RESAMPLES)
+        if not resamples:
+            final_metrics.pop('intervals', None)
+            return False
+        intervals = final_metrics.get('intervals')
+        if intervals is not None and intervals['resamples'] == resamples:
+            return False
+
+        self.status(f"Bootstrapping {resamples:,} resamples")
+        with self.timer.stage("Bootstrap intervals", rows=len(final_metrics['y_test'])):
+            final_metrics['intervals'] = bootstrap_intervals(
+                final_metrics['y_test'], final_metrics['y_proba'],
+                positive=evaluation_curves(final_metrics).positive,
+                threshold=DEFAULT_THRESHOLD,
+                resamples=resamples,
+                n_jobs=self.resources.n_jobs
+            )
+        return True
+
+    def run_in_memory_training(self, params=None):
+        engine = get_engine(self.job['engine'])
+        params = params or self.job['params']
+        prepared = self.prepare_data()
+
+        class_weight = get_strategy(self.job['imbalance']).class_weight
+        model = engine.build(params, n_jobs=self.resources.n_jobs, class_weight=class_weight)
+        self.model = model
+        self.engine_name = engine.name
+        self.engine_params = params
+
+        unit = engine.progress_unit
+        total_steps = engine.total_steps(params)
+        last_step = [0]
+
+        def on_increment(metrics):
+            last_step[0] = metrics['step']
+            self.status(f"Training {unit} {metrics['step']}/{total_steps}")
+            self.report_progress(metrics)
+
+        self.status(f"Training {unit} 0/{total_steps}")
+        with self.timer.stage("Model fitting", *prepared.X_train.shape):
+            result = engine.fit(
+                model, prepared.X_train, prepared.y_train, prepared.X_test, prepared.y_test,
+                callback=on_increment,
+                should_stop=self.should_stop,
+                real_rows=prepared.real_rows
+            )
+
+        if result is None:
+            return None
+
+        if result['early_stopped']:
+            completion_reason = f"{engine.name} stopped after {last_step[0]} {unit.lower()} due to no improvement in validation score."
+        else:
+            completion_reason = f"{engine.name} training completed successfully after {last_step[0]} {unit.lower()}."
+        if result.get('oob_accuracy') is not None:
+            completion_reason += f" Out-of-bag accuracy: {result['oob_accuracy']:.4f}."
+        if prepared.resampling is not None:
+            completion_reason += f"\n\n{describe_report(prepared.resampling)}"
+        return prepared.y_test, result['val_proba'], model.classes_, completion_reason
+
+    def run_tuning(self):
+        engine = get_engine(self.job['engine'])
+        prepared = self.prepare_data()
+
+        def on_trial(trial):
+            self.status(f"Tuning trial {trial['trial']} (bracket {trial['bracket']}, rung {trial['rung']}): AUC {trial['score']:.4f}")
+
+        # trials are scored on rows held out of the training split; the test split is kept for the final metrics
+        fit_rows, val_rows = validation_split(prepared.y_train, prepared.real_rows)
+
+        self.status("Tuning hyperparameters")
+        with self.timer.stage("Hyperparameter search", len(fit_rows), prepared.X_train.shape[1]):
+            result = hyperband(
+                prepared.X_train[fit_rows], prepared.y_train[fit_rows],
+                prepared.X_train[val_rows], prepared.y_train[val_rows],
+                engine.name, self.job['params'],
+                workers=self.resources.n_jobs,
+                class_weight=get_strategy(self.job['imbalance']).class_weight,
+                callback=on_trial,
+                should_stop=self.should_stop
+            )
+
+        if result is None:
+            return None
+
+        self.trials = result['trials']
+        outcome = self.run_in_memory_training(params=result['params'])
+        if outcome is None:
+            return None
+
+        y_test, proba, classes, completion_reason = outcome
+        completion_reason = f"Tuning picked the configuration below (validation AUC {result['score']:.4f}).\n{describe_trials(self.trials)}\n\n{completion_reason}"
+        return y_test, proba, classes, completion_reason
+
+    def run_cross_validation(self):
+        job = self.job
+        engine = get_engine(job['engine'])
+        params = job['params']
+        strategy = get_strategy(job['imbalance'])
+        ratio = job['ratio']
+        folds = job['folds']
+
+        df = self.df
+        with self.timer.stage("Encoding", *df.shape):
+            pipeline = PreprocessingPipeline(job['target_column']).fit_encoding(df)
+            X = pipeline.encode(df)
+            y = pipeline.encode_target(df)
+
+        def on_fold(metrics):
+            self.status(f"Cross-validating fold {metrics['step']}/{folds}")
+            self.report_progress(metrics)
+
+        self.status(f"Cross-validating fold 0/{folds}")
+        with self.timer.stage("Cross-validation", *X.shape):
+            result = cross_validate(
+                X, y, engine.name, params, strategy.name, ratio,
+                folds=folds,
+                workers=self.resources.n_jobs,
+                memory_budget=job['memory_budget'],
+                callback=on_fold,
+                should_stop=self.should_stop
+            )
+
+        if result is None:
+            return None
+
+        # the exported model is refitted on every row once the folds have scored it
+        self.status("Fitting final model on all rows")
+        with self.timer.stage("Final model", *X.shape) as record:
+            X_all, y_all = X, y
+            if strategy.resamples:
+                X_all, y_all = strategy.resample(X, y, ratio=ratio, n_jobs=self.resources.n_jobs)
+                record['rows'] = len(y_all)
+            pipeline.fit_scaling(X_all)
+            self.model = engine.build(params, n_jobs=self.resources.n_jobs, class_weight=strategy.class_weight)
+            self.model.fit(pipeline.scaler_.transform(X_all).astype(np.float32, copy=False), y_all)
+
+        self.preprocessors = {'pipeline': pipeline}
+        self.engine_name = engine.name
+        self.engine_params = params
+        self.fold_metrics = result['folds']
+        completion_reason = f"{folds}-fold cross-validation of {engine.name} completed; metrics are from out-of-fold predictions on all {len(y):,} rows."
+        return y, result['oof_proba'], result['classes'], completion_reason
+
+    def run_streaming_training(self):
+        job = self.job
+
+        def on_chunk(metrics):
+            self.status(f"Training Epoch {metrics['epoch']}, {metrics['rows']:,} rows")
+            self.report_progress(metrics)
+
+        self.status("Scanning dataset")
+        with self.timer.stage("Streaming training") as record:
+            result = stream_train(
+                job['file_path'], job['target_column'], self.dropped_columns(),
+                memory_budget=job['memory_budget'],
+                epochs=job['epochs'],
+                callback=on_chunk,
+                should_stop=self.should_stop
+            )
+            if self.history:
+                record['rows'] = self.history[-1]['rows']
+
+        if result is None:
+            return None
+
+        self.model = result['model']
+        self.preprocessors = {'encoder': result['encoder'], 'scaler': result['scaler']}
+        self.engine_name = None
+        self.engine_params = None
+        completion_reason = f"Streaming training completed, validated on {len(result['y_val']):,} held-out rows."
+        return result['y_val'], result['val_proba'], result['model'].classes_, completion_reason
+
+
+def run_job_process(job, messages):
+    """Entry point of the training child process.
+
+    The process leads its own process group so that stopping it also
+    stops any worker processes it started.
+    """
+    if hasattr(os, "setsid"):
+        os.setsid()
+    resources = job['resources']
+    resources.pin_current_thread()
+    try:
+        with resources.apply():
+            run = TrainingRun(job, emit=lambda kind, payload: messages.put((kind, payload))).run()
+        messages.put(('done', run))
+    except Exception as e:
+        messages.put(('error', str(e)))
+
+
+def terminate_process_tree(process):
+    """Kill a training process and its workers without waiting for them"""
+    if not process.is_alive():
+        return
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        # the process has not become a group leader yet
+        process.kill()
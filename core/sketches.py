@@ -0,0 +1,302 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from core.ingestion import CHUNK_ROWS
+
+HLL_PRECISION = 14
+KLL_K = 200
+CMS_WIDTH = 2048
+CMS_DEPTH = 5
+HEAVY_HITTERS = 64
+
+
+def hash_values(series, numeric):
+    """64-bit hashes that agree across chunks, dtypes and processes.
+
+    Numbers are hashed as float64 and everything else by its string form,
+    so a value hashes the same whether it arrives as int8, int64,
+    category or object.
+    """
+    if numeric:
+        return pd.util.hash_array(series.to_numpy(dtype=np.float64, na_value=np.nan))
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        category_hashes = pd.util.hash_array(series.cat.categories.astype(str).to_numpy(dtype=object))
+        return category_hashes[series.cat.codes.to_numpy()]
+    return pd.util.hash_array(series.astype(str).to_numpy(dtype=object))
+
+
+class HyperLogLog:
+    """Distinct-count estimator with ~0.8% standard error at p=14"""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        if len(hashes) == 0:
+            return
+        remaining_bits = 64 - self.precision
+        index = (hashes >> np.uint64(remaining_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << remaining_bits) - 1)
+
+        rank = np.full(len(hashes), remaining_bits + 1, dtype=np.uint8)
+        nonzero = rest > 0
+        rank[nonzero] = remaining_bits - np.floor(np.log2(rest[nonzero].astype(np.float64))).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if raw <= 2.5 * m and zeros:
+            return m * np.log(m / zeros)
+        return raw
+
+
+class KLLSketch:
+    """Mergeable quantile sketch (Karnin, Lang and Liberty).
+
+    Items on compactor level h stand for 2**h original values. A level
+    that outgrows its capacity is sorted and every other item is promoted
+    to the next level.
+    """
+
+    def __init__(self, k=KLL_K, seed=None):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    def capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self.compress()
+
+    def compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                usable = items[:len(items) - len(keep)]
+                promoted = usable[self.rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.compress()
+        return self
+
+    def quantiles(self, qs):
+        items = np.concatenate(self.levels)
+        if len(items) == 0:
+            return [None for _ in qs]
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items)
+        cumulative = np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1])
+        return items[order][np.minimum(positions, len(items) - 1)].tolist()
+
+
+class FrequencySketch:
+    """Count-min sketch that also tracks the most frequent values"""
+
+    def __init__(self, width=CMS_WIDTH, depth=CMS_DEPTH, capacity=HEAVY_HITTERS):
+        self.width = width
+        self.depth = depth
+        self.capacity = capacity
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.candidates = {}
+
+    def rows(self, hashes):
+        low = (hashes & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        high = (hashes >> np.uint64(32)).astype(np.int64)
+        return [(low + i * high) % self.width for i in range(self.depth)]
+
+    def add(self, values, hashes, key_hashes):
+        """Count a chunk; ``key_hashes(keys)`` hashes candidate values"""
+        for i, columns in enumerate(self.rows(hashes)):
+            self.table[i] += np.bincount(columns, minlength=self.width)
+
+        top = values.value_counts().head(self.capacity).index.tolist()
+        self.update_candidates(top, key_hashes(top))
+
+    def update_candidates(self, keys, hashes):
+        for key, key_hash in zip(keys, hashes):
+            self.candidates[key] = key_hash
+        if not self.candidates:
+            return
+        counts = self.query(np.fromiter(self.candidates.values(), dtype=np.uint64, count=len(self.candidates)))
+        ranked = sorted(zip(self.candidates, counts), key=lambda item: -item[1])[:self.capacity]
+        self.candidates = {key: self.candidates[key] for key, _ in ranked}
+
+    def query(self, hashes):
+        estimates = [self.table[i][columns] for i, columns in enumerate(self.rows(hashes))]
+        return np.min(estimates, axis=0)
+
+    def merge(self, other):
+        self.table += other.table
+        self.update_candidates(list(other.candidates), list(other.candidates.values()))
+        return self
+
+    def heavy_hitters(self):
+        """Return the tracked values and their estimated counts, most frequent first"""
+        if not self.candidates:
+            return pd.Series(dtype=np.int64)
+        keys = list(self.candidates)
+        counts = self.query(np.fromiter(self.candidates.values(), dtype=np.uint64, count=len(keys)))
+        return pd.Series(counts, index=keys).sort_values(ascending=False)
+
+
+class ColumnSketch:
+    """Exact counts and extremes plus approximate summaries of one column"""
+
+    def __init__(self, dtype, numeric):
+        self.dtype = dtype
+        self.numeric = numeric
+        self.count = 0
+        self.nulls = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.distinct = HyperLogLog()
+        self.frequencies = FrequencySketch()
+        self.quantile_sketch = KLLSketch() if numeric else None
+
+    def update(self, series):
+        if self.numeric and not pd.api.types.is_numeric_dtype(series):
+            series = pd.to_numeric(series, errors="coerce")
+
+        values = series.dropna()
+        self.count += len(series)
+        self.nulls += len(series) - len(values)
+        if len(values) == 0:
+            return
+
+        hashes = hash_values(values, self.numeric)
+        self.distinct.add_hashes(hashes)
+        self.frequencies.add(
+            values, hashes,
+            lambda keys: hash_values(pd.Series(keys, dtype=object if not self.numeric else np.float64), self.numeric)
+        )
+
+        if self.numeric:
+            numbers = values.to_numpy(dtype=np.float64)
+            self.total += numbers.sum()
+            low, high = numbers.min(), numbers.max()
+            self.minimum = low if self.minimum is None else min(self.minimum, low)
+            self.maximum = high if self.maximum is None else max(self.maximum, high)
+            self.quantile_sketch.update(numbers)
+
+    def merge(self, other):
+        self.count += other.count
+        self.nulls += other.nulls
+        self.total += other.total
+        for attribute, pick in (("minimum", min), ("maximum", max)):
+            mine, theirs = getattr(self, attribute), getattr(other, attribute)
+            setattr(self, attribute, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+        self.distinct.merge(other.distinct)
+        self.frequencies.merge(other.frequencies)
+        if self.quantile_sketch is not None:
+            self.quantile_sketch.merge(other.quantile_sketch)
+        return self
+
+    @property
+    def mean(self):
+        present = self.count - self.nulls
+        return self.total / present if self.numeric and present else None
+
+
+class DatasetSketch:
+    """Column sketches for a whole dataset, built chunk by chunk and mergeable.
+
+    With ``workers`` above 1 every chunk is sketched on its own in a thread
+    pool while the caller moves on to the next one, and the chunk sketches
+    are merged in as they finish, at most ``workers`` of them alive at a
+    time. Hashing, counting and sorting run in numpy and pandas, largely
+    outside the GIL. Call ``flush`` before reading the result.
+    """
+
+    def __init__(self, numeric_columns=None, workers=1):
+        self.numeric_columns = numeric_columns
+        self.workers = workers
+        self.columns = {}
+        self.pending = deque()
+        self.executor = None
+
+    def reset(self):
+        """Forget everything seen so far, e.g. before a file is read again"""
+        while self.pending:
+            self.pending.popleft().cancel()
+        # waits for chunks already being sketched; their results are dropped
+        self.flush()
+        self.columns = {}
+
+    def flush(self):
+        """Merge in the chunks still being sketched"""
+        while self.pending:
+            self.merge(self.pending.popleft().result())
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        return self
+
+    def update(self, chunk):
+        if self.workers > 1:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers)
+            self.pending.append(self.executor.submit(DatasetSketch(self.numeric_columns).update, chunk))
+            while len(self.pending) > self.workers:
+                self.merge(self.pending.popleft().result())
+            return self
+
+        for name in chunk.columns:
+            if name not in self.columns:
+                series = chunk[name]
+                if self.numeric_columns is None:
+                    numeric = pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+                else:
+                    numeric = name in self.numeric_columns
+                self.columns[name] = ColumnSketch(series.dtype, numeric)
+            self.columns[name].update(chunk[name])
+        return self
+
+    def merge(self, other):
+        for name, column in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(column)
+            else:
+                self.columns[name] = column
+        return self
+
+    @property
+    def row_count(self):
+        return max((column.count for column in self.columns.values()), default=0)
+
+
+def sketch_frame(df, chunksize=CHUNK_ROWS, workers=None):
+    """Sketch an in-memory frame slice by slice, slices in parallel threads"""
+    sketch = DatasetSketch(workers=workers or os.cpu_count() or 1)
+    for start in range(0, len(df), chunksize):
+        sketch.update(df.iloc[start:start + chunksize])
+    return sketch.flush()
@@ -0,0 +1,217 @@
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+from core.ingestion import SAMPLE_ROWS
+from core.training import score_probabilities
+
+DEFAULT_MEMORY_BUDGET = 1024 ** 3
+RESERVOIR_SHARE = 0.2
+CHUNK_OVERHEAD = 4
+HOLDOUT_FRACTION = 0.2
+MAX_RESERVOIR_ROWS = 200_000
+DEFAULT_EPOCHS = 1
+
+
+class ChunkEncoder:
+    """Turns raw CSV chunks into float32 feature matrices.
+
+    Text columns are coded with a vocabulary of their string values
+    collected while streaming; values never seen before map to -1.
+    Numeric columns must hold numbers only: text in one raises ValueError
+    rather than reaching the model as NaN.
+    """
+
+    def __init__(self, feature_columns, categorical_columns):
+        self.feature_columns = feature_columns
+        self.categorical_columns = categorical_columns
+        self.vocabularies = {column: {} for column in categorical_columns}
+
+    def learn(self, chunk):
+        for column in self.categorical_columns:
+            vocabulary = self.vocabularies[column]
+            for value in chunk[column].dropna().unique():
+                vocabulary.setdefault(value, len(vocabulary))
+
+    def transform(self, chunk):
+        X = np.empty((len(chunk), len(self.feature_columns)), dtype=np.float32)
+        for i, column in enumerate(self.feature_columns):
+            series = chunk[column]
+            if column in self.vocabularies:
+                # frames not read with text dtypes (e.g. when scoring) may hold the same codes as numbers
+                if not pd.api.types.is_object_dtype(series) and not pd.api.types.is_string_dtype(series):
+                    series = series.astype(str).where(series.notna())
+                X[:, i] = series.map(self.vocabularies[column]).fillna(-1).to_numpy(dtype=np.float32)
+            else:
+                values = pd.to_numeric(series, errors="coerce")
+                invalid = values.isna() & series.notna()
+                if invalid.any():
+                    raise ValueError(
+                        f"Column '{column}' holds non-numeric values such as {series[invalid].iloc[0]!r}; "
+                        "drop it or clean the file before streaming"
+                    )
+                X[:, i] = values.to_numpy(dtype=np.float32)
+        return X
+
+
+class StreamingPreprocessor(TransformerMixin, BaseEstimator):
+    """The ChunkEncoder and scaler of a streamed run as one sklearn
+    transformer, so the exported model can score raw frames.
+
+    Both parts were fitted while streaming; ``fit`` leaves them as they are.
+    """
+
+    def __init__(self, encoder=None, scaler=None):
+        self.encoder = encoder
+        self.scaler = scaler
+
+    def fit(self, df, y=None):
+        return self
+
+    def transform(self, df):
+        return self.scaler.transform(self.encoder.transform(df)).astype(np.float32, copy=False)
+
+
+def plan_chunks(file_path, memory_budget):
+    """Return (chunk_rows, reservoir_rows, sample) for a memory budget.
+
+    The per-row cost is measured on a sample; a chunk may use the budget
+    left after the validation reservoir divided by a safety factor for
+    the copies made while parsing and encoding.
+    """
+    sample = pd.read_csv(file_path, nrows=SAMPLE_ROWS)
+    row_bytes = max(1, sample.memory_usage(deep=True).sum() / max(1, len(sample)))
+    feature_bytes = 4 * len(sample.columns)
+
+    reservoir_rows = int(min(MAX_RESERVOIR_ROWS, memory_budget * RESERVOIR_SHARE // feature_bytes))
+    chunk_rows = int(max(1000, memory_budget * (1 - RESERVOIR_SHARE) // (row_bytes * CHUNK_OVERHEAD)))
+    return chunk_rows, reservoir_rows, sample
+
+
+def holdout_mask(chunk_index, size, seed):
+    """Rows of a chunk held out for validation, identical on every pass"""
+    rng = np.random.default_rng([seed, chunk_index])
+    return rng.random(size) < HOLDOUT_FRACTION
+
+
+def stream_train(file_path, target_column, drop_columns=(), memory_budget=DEFAULT_MEMORY_BUDGET,
+                 epochs=DEFAULT_EPOCHS, seed=42, callback=None, should_stop=None):
+    """Train a linear model on a CSV too large to load, one chunk at a time.
+
+    A first pass fits the scaler with ``partial_fit``, collects category
+    vocabularies and class counts, and fills a bounded reservoir with a
+    uniform sample of held-out rows. Columns that the sample shows as text
+    are read as ``str`` in every chunk, so digit-only values keep matching
+    the vocabulary. Each of the ``epochs`` following passes trains an
+    ``SGDClassifier`` chunk by chunk on the rows that were not held out,
+    reporting training and validation accuracy/log loss to ``callback``
+    after every chunk. Classes are balanced with weights from the first
+    pass's class counts; resampling strategies do not apply. Peak memory
+    stays within ``memory_budget``.
+
+    Returns a dict with the encoder, scaler, model and the validation
+    targets and probabilities, or None if stopped.
+    """
+    chunk_rows, reservoir_rows, sample = plan_chunks(file_path, memory_budget)
+    feature_columns = [c for c in sample.columns if c != target_column and c not in drop_columns]
+    categorical_columns = [
+        c for c in feature_columns
+        if not pd.api.types.is_numeric_dtype(sample[c]) or pd.api.types.is_bool_dtype(sample[c])
+    ]
+    encoder = ChunkEncoder(feature_columns, categorical_columns)
+    usecols = feature_columns + [target_column]
+
+    def chunks():
+        reader = pd.read_csv(file_path, usecols=usecols, chunksize=chunk_rows,
+                             dtype={column: str for column in categorical_columns})
+        for index, chunk in enumerate(reader):
+            chunk = chunk.dropna()
+            yield index, chunk, holdout_mask(index, len(chunk), seed)
+
+    rng = np.random.default_rng(seed)
+    reservoir = None
+    reservoir_y = None
+    seen = 0
+    class_counts = {}
+    scaler = StandardScaler()
+    for index, chunk, held_out in chunks():
+        if should_stop is not None and should_stop():
+            return None
+
+        for label, count in chunk[target_column].value_counts().items():
+            class_counts[label] = class_counts.get(label, 0) + count
+
+        encoder.learn(chunk)
+        train_rows = chunk[~held_out]
+        if len(train_rows):
+            scaler.partial_fit(encoder.transform(train_rows))
+
+        # Algorithm R over the held-out rows
+        held = chunk[held_out]
+        if len(held) == 0:
+            continue
+        X_held = encoder.transform(held)
+        y_held = held[target_column].to_numpy()
+        if reservoir is None:
+            reservoir = np.empty((reservoir_rows, len(feature_columns)), dtype=np.float32)
+            reservoir_y = np.empty(reservoir_rows, dtype=y_held.dtype)
+        positions = seen + np.arange(len(held))
+        fill = positions < reservoir_rows
+        reservoir[positions[fill]] = X_held[fill]
+        reservoir_y[positions[fill]] = y_held[fill]
+        slots = rng.integers(0, positions[~fill] + 1)
+        replace = slots < reservoir_rows
+        reservoir[slots[replace]] = X_held[~fill][replace]
+        reservoir_y[slots[replace]] = y_held[~fill][replace]
+        seen += len(held)
+
+    if reservoir is None or not class_counts:
+        raise ValueError("Not enough rows to train and validate on")
+
+    kept = min(seen, reservoir_rows)
+    X_val = scaler.transform(reservoir[:kept]).astype(np.float32)
+    y_val = reservoir_y[:kept]
+    del reservoir
+
+    classes = np.array(sorted(class_counts))
+    total = sum(class_counts.values())
+    class_weight = {label: total / (len(classes) * count) for label, count in class_counts.items()}
+    model = SGDClassifier(loss="log_loss", class_weight=class_weight, random_state=seed)
+
+    step = 0
+    for epoch in range(epochs):
+        rows_read = 0
+        for index, chunk, held_out in chunks():
+            rows_read += len(chunk)
+            if should_stop is not None and should_stop():
+                return None
+
+            train_rows = chunk[~held_out]
+            if len(train_rows) == 0:
+                continue
+            X = scaler.transform(encoder.transform(train_rows)).astype(np.float32)
+            y = train_rows[target_column].to_numpy()
+            model.partial_fit(X, y, classes=classes)
+            step += 1
+
+            if callback is not None:
+                accuracy, loss = score_probabilities(y, model.predict_proba(X), model.classes_)
+                val_accuracy, val_loss = score_probabilities(y_val, model.predict_proba(X_val), model.classes_)
+                callback({
+                    'step': step,
+                    'rows': rows_read,
+                    'epoch': epoch + 1,
+                    'loss': loss,
+                    'accuracy': accuracy,
+                    'val_loss': val_loss,
+                    'val_accuracy': val_accuracy
+                })
+
+    return {
+        'encoder': encoder,
+        'scaler': scaler,
+        'model': model,
+        'y_val': y_val,
+        'val_proba': model.predict_proba(X_val)
+    }
@@ -0,0 +1,259 @@
+import cProfile
+import json
+import logging
+import multiprocessing
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+TELEMETRY_LOG = os.environ.get(
+    "FINSIGHTAI_TELEMETRY_LOG",
+    os.path.join(os.path.expanduser("~"), ".finsightai", "telemetry.jsonl")
+)
+PROFILE_DIR = os.environ.get(
+    "FINSIGHTAI_PROFILE_DIR",
+    os.path.join(os.path.expanduser("~"), ".finsightai", "profiles")
+)
+HOT_FUNCTIONS = 15
+
+logger = logging.getLogger(__name__)
+# one cProfile at a time per process: since Python 3.12 a second enabled
+# profiler raises ValueError, whichever thread or stage it belongs to
+_profiler_lock = threading.Lock()
+_active_profiler = None
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where unknown"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def children_cpu():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def os_threads():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return threading.active_count()
+
+
+def _label(func):
+    file_name, line, name = func
+    return f"{name} ({os.path.basename(file_name)}:{line})".replace(";", ":")
+
+
+def top_functions(stats, limit=HOT_FUNCTIONS):
+    """The functions with the most cumulative time, formatted one per line"""
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        f"{cumulative:8.3f}s cum {own:8.3f}s self {calls:>9} calls  {_label(func)}"
+        for func, (_, calls, own, cumulative, _) in rows
+    ]
+
+
+def collapsed_stacks(stats, min_fraction=0.001, max_depth=64):
+    """Approximate folded stacks (``a;b;c microseconds``) for flame graphs.
+
+    cProfile only records caller/callee pairs, so each function's time is
+    split over the paths into it in proportion to the time spent along
+    every edge. Paths carrying less than ``min_fraction`` of the total are
+    dropped.
+    """
+    entries = stats.stats
+    children = defaultdict(dict)
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            children[caller][func] = edge[3]
+
+    roots = [func for func, entry in entries.items() if not entry[4]]
+    total = sum(entries[func][3] for func in roots) or 1.0
+    folded = Counter()
+
+    def walk(func, path, labels, share):
+        cumulative, own = entries[func][3], entries[func][2]
+        if cumulative <= 0:
+            return
+        scale = min(1.0, share / cumulative)
+        if own * scale > 0:
+            folded[";".join(labels)] += own * scale
+        if len(path) >= max_depth:
+            return
+        for child, edge_time in children[func].items():
+            if child in path or edge_time * scale < total * min_fraction:
+                continue
+            walk(child, path | {child}, labels + [_label(child)], edge_time * scale)
+
+    for root in roots:
+        walk(root, {root}, [_label(root)], entries[root][3])
+    return [f"{stack} {int(seconds * 1e6)}" for stack, seconds in folded.most_common() if seconds >= 1e-6]
+
+
+class StageTimer:
+    """Per-stage cost of a pipeline run, in the order the stages ran.
+
+    Each stage records wall and CPU time (including worker processes that
+    finished within it), resident memory before and after and how far the
+    peak grew, the thread and child process counts seen at its end, and
+    any row and column counts the caller passes. With ``trace_memory``
+    the peak of Python allocations traced by ``tracemalloc`` is recorded
+    too, at a noticeable cost to speed; tracing runs only while a stage
+    does.
+
+    With ``profile`` every stage also runs under cProfile: its pstats dump
+    and folded stacks are written under ``PROFILE_DIR/<run id>`` and the
+    record lists its hottest functions. Only one stage in the process is
+    profiled at a time: a stage nested in, or running alongside, a
+    profiled one is counted in that profile and records why it has none
+    of its own. When off, nothing is profiled. Memory is traced whenever stages are profiled, unless ``trace_memory``
+    says otherwise.
+    """
+
+    def __init__(self, trace_memory=None, profile=False):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.records = []
+        self.trace_memory = profile if trace_memory is None else trace_memory
+        self.profile = profile
+
+    @property
+    def profile_directory(self):
+        return os.path.join(PROFILE_DIR, self.run_id)
+
+    @contextmanager
+    def stage(self, name, rows=None, columns=None):
+        """Time a block; the yielded record may be updated, e.g. with row counts"""
+        record = {'stage': name, 'rows': rows, 'columns': columns}
+        rss_before = current_rss()
+        peak_before = peak_rss()
+        # an enclosing stage may already be tracing
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+        cpu_before = time.process_time() + children_cpu()
+        profiler = self.start_profiler(record) if self.profile else None
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            if profiler is not None:
+                self.stop_profiler(profiler)
+            record['wall'] = time.perf_counter() - start
+            record['cpu'] = time.process_time() + children_cpu() - cpu_before
+            record['rss_before'] = rss_before
+            record['rss_after'] = current_rss()
+            peak_after = peak_rss()
+            record['peak_rss_growth'] = None if peak_before is None else peak_after - peak_before
+            if self.trace_memory:
+                # a concurrent stage that started tracing may have stopped it already
+                record['traced_peak'] = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+                if started_tracing:
+                    tracemalloc.stop()
+            record['threads'] = os_threads()
+            record['processes'] = len(multiprocessing.active_children())
+            if profiler is not None:
+                record.update(self.save_profile(name, profiler))
+            self.records.append(record)
+
+    def start_profiler(self, record):
+        """An enabled profiler for this stage, or None if another stage is
+        already being profiled or profiling cannot start"""
+        global _active_profiler
+        with _profiler_lock:
+            if _active_profiler is not None:
+                record['profile_skipped'] = "another stage was already being profiled"
+                return None
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError as e:
+                # e.g. a debugger or coverage tool holds the profiling hook
+                record['profile_skipped'] = str(e)
+                return None
+            _active_profiler = profiler
+            return profiler
+
+    def stop_profiler(self, profiler):
+        global _active_profiler
+        with _profiler_lock:
+            profiler.disable()
+            _active_profiler = None
+
+    def save_profile(self, name, profiler):
+        """Write a stage's pstats dump and folded stacks; return their paths
+        and the stage's hottest functions"""
+        os.makedirs(self.profile_directory, exist_ok=True)
+        slug = f"{len(self.records) + 1:02d}-" + re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+        stats_path = os.path.join(self.profile_directory, f"{slug}.prof")
+        folded_path = os.path.join(self.profile_directory, f"{slug}.folded")
+
+        profiler.dump_stats(stats_path)
+        stats = pstats.Stats(stats_path)
+        with open(folded_path, "w") as folded:
+            folded.write("\n".join(collapsed_stacks(stats)) + "\n")
+        return {
+            'profile': stats_path,
+            'collapsed_stacks': folded_path,
+            'hot_functions': top_functions(stats)
+        }
+
+    @property
+    def stages(self):
+        return [(record['stage'], record['wall']) for record in self.records]
+
+    @property
+    def total(self):
+        return sum(record['wall'] for record in self.records)
+
+    def report(self):
+        lines = [f"{name}: {seconds:.2f}s" for name, seconds in self.stages]
+        lines.append(f"Total: {self.total:.2f}s")
+        return "\n".join(lines)
+
+    def write_log(self, path=TELEMETRY_LOG, **context):
+        """Append one JSON line per stage, tagged with the run id and ``context``.
+
+        The log is diagnostic only, so a failure to write it is logged as a
+        warning rather than raised.
+        """
+        timestamp = datetime.now(timezone.utc).isoformat()
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "a") as log:
+                for record in self.records:
+                    log.write(json.dumps(dict(context, run=self.run_id, time=timestamp, **record), default=str) + "\n")
+        except OSError:
+            logger.warning("Could not write telemetry log %s", path, exc_info=True)
@@ -0,0 +1,242 @@
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.metrics import log_loss
+from sklearn.model_selection import train_test_split
+from sklearn.utils.class_weight import compute_class_weight
+
+EPSILON = 1e-10
+TRAIN_SCORE_ROWS = 10_000
+VALIDATION_SHARE = 0.2
+
+
+def score_probabilities(y, proba, classes):
+    """Return (accuracy, log loss) of class probabilities, ignoring rows
+    without a prediction, e.g. samples no tree has left out of bag yet."""
+    y = np.asarray(y)
+    totals = proba.sum(axis=1)
+    known = np.isfinite(totals) & (totals > 0)
+    if not known.any():
+        return np.nan, np.nan
+    y, proba = y[known], proba[known] / totals[known, None]
+    accuracy = np.mean(classes[np.argmax(proba, axis=1)] == y)
+    loss = log_loss(y, np.clip(proba, EPSILON, 1 - EPSILON), labels=classes)
+    return accuracy, loss
+
+
+def validation_split(y_train, real_rows=None, share=VALIDATION_SHARE, seed=42):
+    """(fit rows, validation rows) of the training matrix.
+
+    Models are judged on rows held out of the training split so the test
+    split stays unseen until the final evaluation. Only the first
+    ``real_rows`` rows may be held out: oversampling appends its synthetic
+    rows after the original ones, and validation is on real data.
+    Validation rows are stratified by class when every class can be split.
+    """
+    y_train = np.asarray(y_train)
+    candidates = np.arange(len(y_train) if real_rows is None else min(real_rows, len(y_train)))
+    _, counts = np.unique(y_train[candidates], return_counts=True)
+    fit_rows, val_rows = train_test_split(
+        candidates,
+        test_size=share,
+        random_state=seed,
+        stratify=y_train[candidates] if counts.min() >= 2 else None
+    )
+    fit_rows = np.sort(np.r_[fit_rows, np.arange(len(candidates), len(y_train))])
+    return fit_rows, np.sort(val_rows)
+
+
+def _out_of_bag_proba(tree, X, in_bag):
+    # the rows of X this tree's bootstrap sample left out, and its votes for them
+    out_of_bag = np.ones(len(X), dtype=bool)
+    out_of_bag[in_bag[in_bag < len(X)]] = False
+    rows = np.flatnonzero(out_of_bag)
+    return rows, tree.predict_proba(X[rows])
+
+
+def grow_forest(model, X_train, y_train, X_test, y_test, step=None, callback=None,
+                should_stop=None, patience=3, min_improvement=0.001, real_rows=None):
+    """Fit a forest on the training set, adding ``step`` trees at a time.
+
+    The forest is grown with ``warm_start`` so each increment only fits the
+    new trees. A bootstrapped forest is judged by its out-of-bag score:
+    every new tree votes on the real (first ``real_rows``) rows its
+    bootstrap sample left out, and the votes are added to those of the
+    earlier trees, so synthetic rows are never scored. A forest without
+    bootstrap holds out a validation slice of the (first ``real_rows``)
+    training rows instead, and fits on the rest. After every increment
+    ``callback`` receives the tree count with training (on a sample) and
+    validation (out-of-bag or held-out) accuracy and log loss. Growth
+    stops once validation accuracy has not improved by ``min_improvement``
+    for ``patience`` increments, or when ``should_stop()`` returns True.
+    The test split is only scored once, by the final forest.
+
+    Returns a dict with the final tree count, test probabilities, the
+    out-of-bag accuracy (None without bootstrap) and whether early
+    stopping kicked in, or None if stopped.
+    """
+    target_trees = model.n_estimators
+    step = step or max(1, target_trees // 10)
+    model.set_params(warm_start=True, oob_score=False)
+
+    y_train = np.asarray(y_train)
+    if model.bootstrap:
+        X_fit, y_fit = X_train, y_train
+        # oversampling appends its synthetic rows after the original ones
+        real = len(y_fit) if real_rows is None else min(real_rows, len(y_fit))
+        X_val, y_val = X_fit[:real], y_fit[:real]
+    else:
+        fit_rows, val_rows = validation_split(y_train, real_rows)
+        X_fit, y_fit = X_train[fit_rows], y_train[fit_rows]
+        X_val, y_val = np.asarray(X_train[val_rows], dtype=np.float32), y_train[val_rows]
+
+    class_weight = model.class_weight
+    if class_weight == "balanced":
+        # every increment sees the same rows, so the weights can be fixed up front
+        classes = np.unique(y_fit)
+        weights = compute_class_weight("balanced", classes=classes, y=y_fit)
+        model.set_params(class_weight=dict(zip(classes.tolist(), weights.tolist())))
+
+    X_sample, y_sample = _training_sample(X_fit, y_fit)
+    val_proba_sum = None
+    trees = 0
+    best_val_accuracy = -np.inf
+    increments_without_improvement = 0
+    early_stopped = False
+
+    while trees < target_trees:
+        if should_stop is not None and should_stop():
+            return None
+
+        previous_trees = trees
+        trees = min(trees + step, target_trees)
+        model.set_params(n_estimators=trees)
+        model.fit(X_fit, y_fit)
+
+        new_trees = model.estimators_[previous_trees:]
+        if val_proba_sum is None:
+            val_proba_sum = np.zeros((len(y_val), len(model.classes_)))
+        if model.bootstrap:
+            in_bag = model.estimators_samples_[previous_trees:]
+            for rows, proba in Parallel(n_jobs=model.n_jobs, prefer="threads")(
+                delayed(_out_of_bag_proba)(tree, X_val, samples) for tree, samples in zip(new_trees, in_bag)
+            ):
+                val_proba_sum[rows] += proba
+        else:
+            val_proba_sum += sum(Parallel(n_jobs=model.n_jobs, prefer="threads")(
+                delayed(tree.predict_proba)(X_val) for tree in new_trees
+            ))
+
+        val_accuracy, val_loss = score_probabilities(y_val, val_proba_sum, model.classes_)
+        accuracy, loss = score_probabilities(y_sample, model.predict_proba(X_sample), model.classes_)
+
+        if callback is not None:
+            callback({
+                'step': trees,
+                'trees': trees,
+                'loss': loss,
+                'accuracy': accuracy,
+                'val_loss': val_loss,
+                'val_accuracy': val_accuracy
+            })
+
+        if val_accuracy - best_val_accuracy >= min_improvement:
+            best_val_accuracy = val_accuracy
+            increments_without_improvement = 0
+        else:
+            increments_without_improvement += 1
+            if increments_without_improvement >= patience:
+                early_stopped = trees < target_trees
+                break
+
+    # the fitted trees keep their weights; restore the setting so the model
+    # describes itself (and exports) with "balanced" rather than this split's dict
+    model.set_params(warm_start=False, class_weight=class_weight)
+    return {
+        'trees': trees,
+        'val_proba': model.predict_proba(np.asarray(X_test, dtype=np.float32)),
+        'oob_accuracy': val_accuracy if model.bootstrap else None,
+        'early_stopped': early_stopped
+    }
+
+
+def _training_sample(X_train, y_train, seed=0):
+    """Subsample of the training set used to report training metrics cheaply"""
+    if len(y_train) <= TRAIN_SCORE_ROWS:
+        return X_train, np.asarray(y_train)
+    rows = np.random.default_rng(seed).choice(len(y_train), TRAIN_SCORE_ROWS, replace=False)
+    return X_train[rows], np.asarray(y_train)[rows]
+
+
+def grow_boosting(model, X_train, y_train, X_test, y_test, step=None, callback=None, should_stop=None):
+    """Fit a histogram gradient boosting model ``step`` iterations at a time.
+
+    Uses ``warm_start`` so each increment only adds new iterations. The
+    model's own early stopping ends growth when its internal validation
+    score stops improving.
+
+    Returns a dict with the iteration count, validation probabilities and
+    whether early stopping kicked in, or None if stopped.
+    """
+    target_iterations = model.max_iter
+    step = step or max(1, target_iterations // 10)
+    model.set_params(warm_start=True)
+    X_sample, y_sample = _training_sample(X_train, y_train)
+
+    iterations = 0
+    early_stopped = False
+    while iterations < target_iterations:
+        if should_stop is not None and should_stop():
+            return None
+
+        iterations = min(iterations + step, target_iterations)
+        model.set_params(max_iter=iterations)
+        model.fit(X_train, y_train)
+
+        val_proba = model.predict_proba(X_test)
+        if callback is not None:
+            accuracy, loss = score_probabilities(y_sample, model.predict_proba(X_sample), model.classes_)
+            val_accuracy, val_loss = score_probabilities(y_test, val_proba, model.classes_)
+            callback({
+                'step': model.n_iter_,
+                'loss': loss,
+                'accuracy': accuracy,
+                'val_loss': val_loss,
+                'val_accuracy': val_accuracy
+            })
+
+        if model.n_iter_ < iterations:
+            early_stopped = True
+            break
+
+    model.set_params(warm_start=False, max_iter=target_iterations)
+    return {
+        'iterations': model.n_iter_,
+        'val_proba': val_proba,
+        'early_stopped': early_stopped
+    }
+
+
+def fit_once(model, X_train, y_train, X_test, y_test, callback=None, should_stop=None):
+    """Fit a model without intermediate progress and report one point"""
+    if should_stop is not None and should_stop():
+        return None
+
+    model.fit(X_train, y_train)
+    val_proba = model.predict_proba(X_test)
+
+    if callback is not None:
+        X_sample, y_sample = _training_sample(X_train, y_train)
+        accuracy, loss = score_probabilities(y_sample, model.predict_proba(X_sample), model.classes_)
+        val_accuracy, val_loss = score_probabilities(y_test, val_proba, model.classes_)
+        callback({
+            'step': 1,
+            'loss': loss,
+            'accuracy': accuracy,
+            'val_loss': val_loss,
+            'val_accuracy': val_accuracy
+        })
+
+    return {
+        'val_proba': val_proba,
+        'early_stopped': False
+    }
@@ -0,0 +1,159 @@
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+import numpy as np
+from sklearn.metrics import log_loss, roc_auc_score
+from threadpoolctl import threadpool_limits
+from core.cache import CACHE_ROOT
+from core.cross_validation import share_arrays
+from core.engines import get_engine
+from core.training import EPSILON
+
+ETA = 3
+MIN_ROWS = 1000
+MAX_BRACKETS = 4
+MIN_BUDGET = 10
+
+
+def sample_params(engine, base_params, rng):
+    """A random configuration: searched settings drawn from their candidates,
+    the rest kept at ``base_params``"""
+    params = dict(base_params)
+    for param in engine.hyperparameters:
+        if param.search:
+            params[param.name] = param.search[rng.integers(len(param.search))]
+    return params
+
+
+def run_trial(paths, engine_name, params, rows, seed=42, class_weight=None):
+    """Fit one configuration on the first ``rows`` shuffled training rows
+    and score it on the validation rows. Runs in a worker process."""
+    X_train = np.load(paths['X_train'], mmap_mode="r")
+    y_train = np.load(paths['y_train'], mmap_mode="r")
+    X_val = np.load(paths['X_val'], mmap_mode="r")
+    y_val = np.load(paths['y_val'], mmap_mode="r")
+
+    started = time.perf_counter()
+    with threadpool_limits(limits=1):
+        model = get_engine(engine_name).build(params, n_jobs=1, seed=seed, class_weight=class_weight)
+        # the training rows are pre-shuffled, so a prefix is a random subset read without copying
+        model.fit(X_train[:rows], y_train[:rows])
+        proba = model.predict_proba(X_val)
+
+    return {
+        'score': roc_auc_score(y_val, proba[:, 1]),
+        'val_loss': log_loss(y_val, np.clip(proba, EPSILON, 1 - EPSILON), labels=model.classes_),
+        'seconds': time.perf_counter() - started
+    }
+
+
+def hyperband_brackets(n_rows, eta=ETA, min_rows=MIN_ROWS, max_brackets=MAX_BRACKETS):
+    """(configurations, halvings) of each Hyperband bracket; a bracket with
+    ``s`` halvings starts its configurations on ``eta ** -s`` of the budget"""
+    s_max = 0
+    while s_max + 1 < max_brackets and n_rows / eta ** (s_max + 1) >= min_rows:
+        s_max += 1
+    return [
+        (int(math.ceil((s_max + 1) / (s + 1) * eta ** s)), s)
+        for s in range(s_max, -1, -1)
+    ]
+
+
+def hyperband(X_train, y_train, X_val, y_val, engine_name, base_params, workers=1, eta=ETA,
+              min_rows=MIN_ROWS, max_brackets=MAX_BRACKETS, seed=42, callback=None, should_stop=None,
+              class_weight=None):
+    """Search an engine's hyperparameters with Hyperband.
+
+    Each bracket runs successive halving: many random configurations are
+    trained on a small share of the rows (and, for tree and boosting
+    engines, a matching share of trees or iterations), and only the best
+    ``1 / eta`` of them are promoted to ``eta`` times the budget, until
+    the survivors run on all rows. Brackets trade the number of starting
+    configurations against how early they are judged. Every rung's trials
+    run in parallel worker processes that memory-map the shared training
+    matrix, and are scored by validation ROC AUC.
+
+    ``class_weight`` is passed to every trial's estimator. ``callback``
+    receives every finished trial. Returns a dict with the
+    best parameters, their score and the full trial log, or None if stopped.
+    """
+    engine = get_engine(engine_name)
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(y_train))
+    full_budget = base_params.get(engine.budget_param) if engine.budget_param else None
+
+    trials = []
+    best = None
+    os.makedirs(CACHE_ROOT, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=CACHE_ROOT, prefix="tuning-") as directory:
+        paths = share_arrays(
+            directory,
+            X_train=np.asarray(X_train)[order], y_train=np.asarray(y_train)[order],
+            X_val=X_val, y_val=y_val
+        )
+        executor = ProcessPoolExecutor(max_workers=workers)
+        stopped = False
+        try:
+            for bracket, (n_configs, halvings) in enumerate(hyperband_brackets(len(y_train), eta, min_rows, max_brackets)):
+                configs = [sample_params(engine, base_params, rng) for _ in range(n_configs)]
+                for rung in range(halvings + 1):
+                    fraction = float(eta) ** (rung - halvings)
+                    rows = min(len(y_train), max(min_rows, int(len(y_train) * fraction)))
+                    budgeted = []
+                    for params in configs:
+                        params = dict(params)
+                        if full_budget:
+                            params[engine.budget_param] = max(min(MIN_BUDGET, full_budget), int(full_budget * fraction))
+                        budgeted.append(params)
+
+                    futures = [executor.submit(run_trial, paths, engine_name, params, rows, seed, class_weight) for params in budgeted]
+                    pending = set(futures)
+                    while pending:
+                        _, pending = wait(pending, timeout=0.5)
+                        if should_stop is not None and should_stop():
+                            stopped = True
+                            return None
+
+                    results = []
+                    for params, future in zip(budgeted, futures):
+                        trial = dict(future.result(), trial=len(trials) + 1, bracket=bracket + 1,
+                                     rung=rung + 1, rows=rows, params=params)
+                        trials.append(trial)
+                        results.append(trial)
+                        if callback is not None:
+                            callback(trial)
+
+                    results.sort(key=lambda trial: trial['score'], reverse=True)
+                    if rung == halvings:
+                        if best is None or results[0]['score'] > best['score']:
+                            best = results[0]
+                        continue
+
+                    keep = max(1, len(results) // eta)
+                    for trial in results[keep:]:
+                        trial['pruned'] = True
+                    configs = [trial['params'] for trial in results[:keep]]
+        finally:
+            # a stop cancels queued trials without waiting for running ones
+            executor.shutdown(wait=not stopped, cancel_futures=True)
+
+    best_params = dict(best['params'])
+    if full_budget:
+        best_params[engine.budget_param] = full_budget
+    return {
+        'params': best_params,
+        'score': best['score'],
+        'trials': trials
+    }
+
+
+def describe_trials(trials, top=5):
+    total = sum(trial['seconds'] for trial in trials)
+    pruned = sum(1 for trial in trials if trial.get('pruned'))
+    lines = [f"{len(trials)} trials ({pruned} pruned early), {total:,.1f} CPU-seconds:"]
+    for trial in sorted(trials, key=lambda trial: (trial['rows'], trial['score']), reverse=True)[:top]:
+        settings = ", ".join(f"{name}={value}" for name, value in trial['params'].items())
+        lines.append(f"• AUC {trial['score']:.4f} on {trial['rows']:,} rows in {trial['seconds']:.1f}s: {settings}")
+    return "\n".join(lines)
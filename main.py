@@ -1,5 +1,8 @@
+import time
+started = time.perf_counter()
+
 from ui.app import MLPlatformApp
 
 if __name__ == "__main__":
-    app = MLPlatformApp()
+    app = MLPlatformApp(started=started)
     app.run()
@@ -1,54 +1,130 @@
+import importlib
+import logging
+import os
+import threading
+import time
 import customtkinter as ctk
 import tkinter as tk
 from ui.sidebar import Sidebar
-from ui.data_selection import DataSelectionFrame
-from ui.data_preparation import DataPreparationFrame
-from ui.training import TrainingFrame
-from ui.evaluation import EvaluationFrame
-from ui.export import ExportFrame
+from core.telemetry import StageTimer
+
+# screens are imported and built on first use; only data selection is needed at launch
+FRAMES = {
+    'data_selection': ('ui.data_selection', 'DataSelectionFrame'),
+    'data_preparation': ('ui.data_preparation', 'DataPreparationFrame'),
+    'training': ('ui.training', 'TrainingFrame'),
+    'evaluation': ('ui.evaluation', 'EvaluationFrame'),
+    'export': ('ui.export', 'ExportFrame')
+}
+WARM_UP_DELAY_MS = 300
+
+logger = logging.getLogger(__name__)
+
+
+class LazyFrames:
+    """The app's screens by name, each imported and constructed the first
+    time it is looked up. Iterating only visits screens already built."""
+
+    def __init__(self, parent, app, timer):
+        self.parent = parent
+        self.app = app
+        self.timer = timer
+        self.built = {}
+
+    def __getitem__(self, name):
+        if name not in self.built:
+            module_name, class_name = FRAMES[name]
+            with self.timer.stage(f"Screen: {name}"):
+                frame_class = getattr(importlib.import_module(module_name), class_name)
+                self.built[name] = frame_class(self.parent, self.app)
+        return self.built[name]
+
+    def __contains__(self, name):
+        return name in self.built
+
+    def values(self):
+        return list(self.built.values())
+
+
+def warm_imports():
+    """Import the remaining screens' modules (pandas, scikit-learn,
+    matplotlib) off the UI thread so the first visit to them is quick"""
+    for module_name, _ in FRAMES.values():
+        try:
+            importlib.import_module(module_name)
+        except Exception:
+            # the screen will raise the same error when it is built
+            logger.warning("Could not preload %s", module_name, exc_info=True)
+
 
 class MLPlatformApp:
-    def __init__(self):
-        self.root = ctk.CTk()
-        self.root.title("FinSightAI")
-        self.root.geometry("1200x800")
-        
-        ctk.set_appearance_mode("light")
-        ctk.set_default_color_theme("blue")
-        
+    def __init__(self, started=None):
+        self.started = started or time.perf_counter()
+        self.startup_timer = StageTimer()
+        self.startup_timer.records.append({'stage': "Imports", 'wall': time.perf_counter() - self.started, 'cpu': time.process_time()})
+
+        with self.startup_timer.stage("Window"):
+            self.root = ctk.CTk()
+            self.root.title("FinSightAI")
+            self.root.geometry("1200x800")
+
+            ctk.set_appearance_mode("light")
+            ctk.set_default_color_theme("blue")
+
         self.task_type = None
-        
+        self._resources = None
+        # opt-in cProfile of every timed stage; off means no profiler is created
+        self.profile_stages = tk.BooleanVar(value=False)
+
         self.setup_ui()
-        
+
+    @property
+    def resources(self):
+        if self._resources is None:
+            from core.resources import ResourceSettings
+            self._resources = ResourceSettings()
+        return self._resources
+
     def setup_ui(self):
         self.main_container = ctk.CTkFrame(self.root)
         self.main_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
-        
+
         self.content_area = ctk.CTkFrame(self.main_container)
         self.content_area.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        self.frames = {
-            'data_selection': DataSelectionFrame(self.content_area, self),
-            'data_preparation': DataPreparationFrame(self.content_area, self),
-            'training': TrainingFrame(self.content_area, self),
-            'evaluation': EvaluationFrame(self.content_area, self),
-            'export': ExportFrame(self.content_area, self)
-        }
-        
-        self.sidebar = Sidebar(self.main_container, self)
-        
+
+        self.frames = LazyFrames(self.content_area, self, self.startup_timer)
+
+        with self.startup_timer.stage("Sidebar"):
+            self.sidebar = Sidebar(self.main_container, self)
+
         self.show_frame('data_selection')
-        
+
     def show_frame(self, frame_name, file_path=None):
-        for frame in self.frames.values():
-            frame.pack_forget()
-        
         frame = self.frames[frame_name]
+        for other in self.frames.values():
+            other.pack_forget()
+
         if frame_name == 'data_preparation' and file_path:
             frame.load_data(file_path)
-        
+        elif frame_name == 'export':
+            frame.refresh_options()
+
         frame.pack(fill=tk.BOTH, expand=True)
         self.sidebar.set_active_step(frame_name)
-        
+
+    def first_window_shown(self):
+        timer = self.startup_timer
+        first_window = time.perf_counter() - self.started
+        if os.environ.get("FINSIGHTAI_STARTUP_REPORT"):
+            print(f"{timer.report()}\nTime to first window: {first_window:.2f}s", flush=True)
+        timer.write_log(screen="startup", time_to_first_window=first_window)
+
+        if not os.environ.get("FINSIGHTAI_NO_WARM_UP"):
+            self.root.after(WARM_UP_DELAY_MS, lambda: threading.Thread(target=warm_imports, daemon=True).start())
+
     def run(self):
+        # idle callbacks run in order, so this fires once the first window has been drawn
+        self.root.after_idle(self.first_window_shown)
         self.root.mainloop()
+        if 'training' in self.frames:
+            self.frames['training'].cancel_process()
@@ -1,15 +1,31 @@
 import customtkinter as ctk
 import tkinter as tk
-from tkinter import ttk
-import pandas as pd
-import numpy as np
+import threading
+import queue
 from CTkMessagebox import CTkMessagebox
+from ui.data_preview import DataPreview
+import pandas as pd
+from core.ingestion import SAMPLE_ROWS, read_csv_chunked
+from core.dataset_cache import DatasetCache
+from core.profiling import DatasetProfile
+from core.sketches import DatasetSketch, sketch_frame
+from core.imbalance import STRATEGIES, default_strategy, get_strategy
+from core.telemetry import StageTimer
 
 class DataPreparationFrame(ctk.CTkFrame):
     def __init__(self, parent, app):
         super().__init__(parent)
         self.app = app
         self.df = None
+        self.profile = None
+        self.rows_removed = 0
+        self.file_path = None
+        self.sampled = False
+        self.load_thread = None
+        self.load_queue = None
+        self.load_cancel = None
+        self.load_timer = None
+        self.dataset_cache = DatasetCache()
         self.setup_frame()
         
     def setup_frame(self):
@@ -26,6 +42,25 @@ class DataPreparationFrame(ctk.CTkFrame):
         )
         self.info_label.pack(anchor="w")
         
+        self.sketch_var = tk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            self.info_frame,
+            text="Approximate profiling (sketches) for very large files",
+            variable=self.sketch_var,
+            command=self.on_sketch_mode_changed
+        ).pack(anchor="w", pady=(5, 0))
+        
+        self.stream_var = tk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            self.info_frame,
+            text="Stream from disk: preview a sample and train without loading the file (larger than memory)",
+            variable=self.stream_var,
+            command=self.on_stream_mode_changed
+        ).pack(anchor="w", pady=(5, 0))
+        
+        self.load_progress = ctk.CTkProgressBar(self.info_frame)
+        self.load_progress.set(0)
+        
         self.column_frame = ctk.CTkFrame(self.main_container)
         self.column_frame.pack(fill=tk.X, pady=(0, 10))
         
@@ -39,7 +74,8 @@ class DataPreparationFrame(ctk.CTkFrame):
         self.column_dropdown = ctk.CTkOptionMenu(
             self.column_frame,
             variable=self.column_var,
-            values=[]
+            values=[],
+            command=self.update_column_info
         )
         self.column_dropdown.pack(side=tk.LEFT, padx=5)
         
@@ -50,6 +86,13 @@ class DataPreparationFrame(ctk.CTkFrame):
         )
         self.delete_btn.pack(side=tk.LEFT, padx=5)
         
+        self.column_info_label = ctk.CTkLabel(
+            self.column_frame,
+            text="",
+            font=("Arial", 12)
+        )
+        self.column_info_label.pack(side=tk.LEFT, padx=10)
+        
         self.target_frame = ctk.CTkFrame(self.main_container)
         self.target_frame.pack(fill=tk.X, pady=(0, 10))
         
@@ -68,6 +111,23 @@ class DataPreparationFrame(ctk.CTkFrame):
         )
         self.target_dropdown.pack(side=tk.LEFT, padx=5)
         
+        ctk.CTkLabel(self.target_frame, text="Imbalance handling:").pack(side=tk.LEFT, padx=(15, 5))
+        self.imbalance_var = tk.StringVar(value=default_strategy(self.app.task_type))
+        self.imbalance_menu = ctk.CTkOptionMenu(
+            self.target_frame,
+            variable=self.imbalance_var,
+            values=list(STRATEGIES),
+            command=lambda _: self.update_statistics(target_column=self.target_var.get()),
+            width=180
+        )
+        self.imbalance_menu.pack(side=tk.LEFT)
+        
+        ctk.CTkLabel(self.target_frame, text="Target ratio:").pack(side=tk.LEFT, padx=(15, 5))
+        self.ratio_entry = ctk.CTkEntry(self.target_frame, width=60)
+        self.ratio_entry.insert(0, "1.0")
+        self.ratio_entry.pack(side=tk.LEFT)
+        self.ratio_entry.bind("<FocusOut>", lambda _: self.update_statistics(target_column=self.target_var.get()))
+        
         preview_label = ctk.CTkLabel(
             self.main_container,
             text="Data Preview:",
@@ -75,18 +135,8 @@ class DataPreparationFrame(ctk.CTkFrame):
         )
         preview_label.pack(anchor="w", pady=(10, 5))
         
-        self.tree_frame = ctk.CTkFrame(self.main_container)
-        self.tree_frame.pack(fill=tk.BOTH, expand=True)
-        
-        self.tree = ttk.Treeview(self.tree_frame)
-        self.tree.pack(fill=tk.BOTH, expand=True)
-        
-        self.vsb = ttk.Scrollbar(self.tree_frame, orient="vertical", command=self.tree.yview)
-        self.hsb = ttk.Scrollbar(self.tree_frame, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=self.vsb.set, xscrollcommand=self.hsb.set)
-        
-        self.vsb.pack(side=tk.RIGHT, fill=tk.Y)
-        self.hsb.pack(side=tk.BOTTOM, fill=tk.X)
+        self.preview = DataPreview(self.main_container)
+        self.preview.pack(fill=tk.BOTH, expand=True)
         
         self.nav_frame = ctk.CTkFrame(self.main_container)
         self.nav_frame.pack(fill=tk.X, pady=(10, 0))
@@ -107,65 +157,214 @@ class DataPreparationFrame(ctk.CTkFrame):
         self.next_button.pack(side=tk.RIGHT)
         
     def load_data(self, file_path):
-        self.df = pd.read_csv(file_path)
-        self.process_null_values()
-        self.update_column_dropdown()
-        self.update_target_dropdown()
-        self.display_data_preview()
+        if self.load_cancel is not None:
+            self.load_cancel.set()
+            
+        self.file_path = file_path
+        self.df = None
+        self.profile = None
+        self.sampled = self.stream_var.get()
+        self.target_var.set("Select")
+        self.imbalance_var.set(default_strategy(self.app.task_type))
+        self.next_button.configure(state="disabled")
+        self.info_label.configure(text="Data Statistics:\n\nLoading dataset...")
+        self.load_progress.set(0)
+        self.load_progress.pack(fill=tk.X, pady=(5, 0))
         
-    def process_null_values(self):
-        if self.df is not None:
-            null_counts = self.df.isnull().sum().sum()
+        self.load_queue = queue.Queue()
+        self.load_cancel = threading.Event()
+        self.load_timer = StageTimer(profile=self.app.profile_stages.get())
+        self.load_thread = threading.Thread(
+            target=self.load_worker,
+            args=(file_path, self.load_queue, self.load_cancel, self.sketch_var.get(), self.sampled, self.load_timer,
+                  self.app.resources.n_jobs),
+            daemon=True
+        )
+        self.load_thread.start()
+        self.poll_load_queue(self.load_queue)
+        
+    def load_worker(self, file_path, load_queue, cancel_event, sketch_mode, sampled, timer, workers=1):
+        try:
+            with timer.stage("Loading data") as record:
+                if sampled:
+                    # streamed training reads the file itself; the screen only needs a sample
+                    df, sketch = pd.read_csv(file_path, nrows=SAMPLE_ROWS), None
+                else:
+                    df, sketch = self.load_dataset(file_path, load_queue, cancel_event, sketch_mode, workers)
+                if df is not None:
+                    record['rows'], record['columns'] = df.shape
+                
+            if df is not None:
+                with timer.stage("Profiling and missing values", *df.shape):
+                    df, profile, rows_removed = self.process_null_values(df, sketch, approximate=sketch_mode, workers=workers)
+                load_queue.put(('done', df, profile, rows_removed))
+        except Exception as e:
+            load_queue.put(('error', str(e)))
+            
+    def load_dataset(self, file_path, load_queue, cancel_event, sketch_mode=False, workers=1):
+        """Return (frame, sketch). In sketch mode a file that is not cached
+        is sketched while its chunks are read, on ``workers`` threads; the
+        sketch is None otherwise."""
+        df = self.dataset_cache.load(file_path)
+        if df is not None:
+            return df, None
+        
+        sketch = DatasetSketch(workers=workers) if sketch_mode else None
+        df = read_csv_chunked(
+            file_path,
+            progress_callback=lambda rows, read, total: load_queue.put(('progress', rows, read, total)),
+            cancel_event=cancel_event,
+            sketch=sketch
+        )
+        if df is not None:
+            self.dataset_cache.store(file_path, df)
+        return df, sketch
             
-            if null_counts > 0:
-                self.df.dropna(inplace=True)
+    def poll_load_queue(self, load_queue):
+        if load_queue is not self.load_queue:
+            return
             
-            self.update_statistics(null_values_removed=null_counts)
+        while not load_queue.empty():
+            message = load_queue.get()
             
-    def update_statistics(self, null_values_removed=0, column_removed=None, target_column=None):
+            if message[0] == 'progress':
+                _, rows, read, total = message
+                self.load_progress.set(read / total if total else 1)
+                self.info_label.configure(
+                    text=f"Data Statistics:\n\nLoading dataset... {rows:,} rows ({read / 1e6:,.1f} of {total / 1e6:,.1f} MB)"
+                )
+            elif message[0] == 'done':
+                self.finish_loading(*message[1:])
+                return
+            elif message[0] == 'error':
+                self.load_progress.pack_forget()
+                self.load_queue = None
+                self.info_label.configure(text="Data Statistics:\n\nFailed to load dataset")
+                CTkMessagebox(
+                    title="Error",
+                    message=f"Could not load the dataset:\n{message[1]}",
+                    icon="cancel"
+                )
+                return
+                
+        self.after(100, self.poll_load_queue, load_queue)
+        
+    def on_sketch_mode_changed(self):
+        if self.file_path and (self.df is not None or self.load_queue is not None):
+            self.load_data(self.file_path)
+            
+    def on_stream_mode_changed(self):
+        # streaming always balances classes with weights, so resampling settings do not apply
+        state = "disabled" if self.stream_var.get() else "normal"
+        self.imbalance_menu.configure(state=state)
+        self.ratio_entry.configure(state=state)
+        self.on_sketch_mode_changed()
+            
+    def finish_loading(self, df, profile, rows_removed):
+        self.load_progress.pack_forget()
+        self.load_queue = None
+        self.load_cancel = None
+        self.df = df
+        self.profile = profile
+        self.rows_removed = rows_removed
+        with self.load_timer.stage("Preview", *df.shape):
+            self.update_statistics()
+            self.update_column_dropdown()
+            self.update_target_dropdown()
+            self.display_data_preview()
+        self.load_timer.write_log(screen="data_preparation", file=self.file_path, sketch=self.sketch_var.get())
+        
+    def process_null_values(self, df, sketch=None, approximate=False, workers=1):
+        """Drop rows with missing values and profile what is left, once.
+        With ``approximate`` the profile is estimated from ``sketch``, or
+        from sketches of the remaining rows if the frame came from the
+        dataset cache. Runs on the loading thread; returns (df, profile,
+        rows removed)."""
+        complete = df.notna().all(axis=1).to_numpy()
+        rows_removed = int(len(df) - complete.sum())
+        if rows_removed:
+            df = df[complete]
+        
+        if approximate:
+            if sketch is None:
+                sketch = sketch_frame(df, workers=workers)
+            profile = DatasetProfile.from_sketch(sketch, df.dtypes)
+            profile.row_count = len(df)
+        else:
+            profile = DatasetProfile.from_frame(df)
+        return df, profile, rows_removed
+            
+    def update_statistics(self, column_removed=None, target_column=None):
         stats_text = "Data Statistics:\n\n"
         
-        if null_values_removed > 0:
-            stats_text += f"• {null_values_removed} rows removed due to missing values\n"
+        if self.sampled:
+            stats_text += f"• Preview and statistics cover the first {SAMPLE_ROWS:,} rows; training streams the whole file from disk\n"
+        
+        if self.rows_removed > 0:
+            stats_text += f"• {self.rows_removed} rows removed due to missing values\n"
         else:
             stats_text += "• No rows removed due to missing values\n"
         
-        if self.df is not None:
-            stats_text += f"• {len(self.df)} rows remaining in dataset\n"
+        if self.profile is not None:
+            stats_text += f"• {self.profile.row_count} rows remaining in dataset\n"
             
-            categorical_columns = self.df.select_dtypes(include=["object"]).columns
+            categorical_columns = self.profile.categorical_columns()
             if len(categorical_columns) > 0:
-                stats_text += f"• {len(categorical_columns)} categorical columns will be encoded\n"
+                approx = "~" if any(self.profile.columns[c].approximate for c in categorical_columns) else ""
+                levels = sum(self.profile.columns[c].cardinality for c in categorical_columns)
+                stats_text += f"• {len(categorical_columns)} categorical columns will be encoded ({approx}{levels:,} distinct values)\n"
             else:
                 stats_text += "• No categorical columns to encode\n"
             
             stats_text += "• Data will be normalized and scaled appropriately prior to running the model\n"
             
             if target_column and target_column != "Select":
-                value_counts = self.df[target_column].value_counts()
-                ratio = value_counts.min() / value_counts.max()
+                ratio = self.profile.class_ratio(self.df, target_column)
+                approx = "~" if self.profile.columns[target_column].approximate else ""
                 
                 if ratio < 0.3:
-                    stats_text += f"• Dataset is imbalanced (ratio: {ratio:.2f})\n"
-                    stats_text += "• SMOTE will be used to balance the dataset\n"
+                    stats_text += f"• Dataset is imbalanced (ratio: {approx}{ratio:.2f})\n"
                 else:
                     stats_text += "• Dataset is relatively balanced\n"
+                if self.sampled:
+                    stats_text += "• Streaming training balances classes with class weights\n"
+                else:
+                    stats_text += f"• {get_strategy(self.imbalance_var.get()).summary(self.target_ratio())}\n"
         
-        if column_removed:
+        if isinstance(column_removed, list):
+            stats_text += f"• Columns {', '.join(repr(column) for column in column_removed)} have been removed\n"
+        elif column_removed:
             stats_text += f"• Column '{column_removed}' has been removed\n"
             
         self.info_label.configure(text=stats_text)
 
+    def target_ratio(self):
+        try:
+            ratio = float(self.ratio_entry.get())
+        except ValueError:
+            return 1.0
+        return min(max(ratio, 0.01), 1.0)
+        
     def update_column_dropdown(self):
         if self.df is not None:
             self.column_dropdown.configure(values=list(self.df.columns))
             if len(self.df.columns) > 0:
                 self.column_var.set(self.df.columns[0])
+            self.update_column_info(self.column_var.get())
+                
+    def update_column_info(self, column):
+        if self.profile is not None and column in self.profile.columns:
+            self.column_info_label.configure(text=self.profile.columns[column].describe())
+        else:
+            self.column_info_label.configure(text="")
                 
     def update_target_dropdown(self):
         if self.df is not None:
             self.target_dropdown.configure(values=["Select"] + list(self.df.columns))
-            self.target_var.set("Select")
+            # removing other columns keeps the chosen target; a new dataset has already reset it
+            if self.target_var.get() not in self.df.columns:
+                self.target_var.set("Select")
+                self.next_button.configure(state="disabled")
             
     def on_target_selected(self, choice):
         if choice != "Select":
@@ -196,23 +395,16 @@ class DataPreparationFrame(ctk.CTkFrame):
             
             response = confirm.get()
             if response == "Yes":
-                self.df.drop(columns=[column], inplace=True)
-                self.update_column_dropdown()
-                self.update_target_dropdown()
-                self.display_data_preview()
-                self.update_statistics(column_removed=column)
+                self.remove_columns([column])
+                
+    def remove_columns(self, columns):
+        self.df.drop(columns=columns, inplace=True)
+        for column in columns:
+            self.profile.drop_column(column)
+            self.preview.remove_column(column)
+        self.update_column_dropdown()
+        self.update_target_dropdown()
+        self.update_statistics(column_removed=columns[0] if len(columns) == 1 else columns)
             
     def display_data_preview(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        if self.df is not None:
-            self.tree["columns"] = list(self.df.columns)
-            self.tree["show"] = "headings"
-            
-            for column in self.df.columns:
-                self.tree.heading(column, text=column)
-                self.tree.column(column, width=100)
-                
-            for i, row in self.df.head(100).iterrows():
-                self.tree.insert("", "end", values=list(row))
+        self.preview.set_data(self.df)
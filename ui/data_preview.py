@@ -0,0 +1,250 @@
+import customtkinter as ctk
+import tkinter as tk
+import queue
+import threading
+from tkinter import ttk
+import numpy as np
+
+HEADER_HEIGHT = 25
+DEFAULT_ROW_HEIGHT = 20
+POLL_MS = 50
+
+
+class DataPreview(ctk.CTkFrame):
+    """Treeview that only holds the rows currently in view.
+
+    The scrollbar tracks a row offset into the whole frame and every scroll
+    step re-fills the same handful of items from an ``iloc`` slice, so the
+    cost of a step does not depend on the number of rows. The row order of
+    each column and direction is computed once on a background thread,
+    while the view shows that it is sorting, and then cached.
+    """
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.df = None
+        self.offset = 0
+        self.visible_rows = 1
+        self.order = None
+        self.sort_column = None
+        self.sort_ascending = True
+        self.sort_indexes = {}
+        self.sorting = None
+        self.sort_results = None
+        self.setup_widgets()
+
+    def setup_widgets(self):
+        controls = ctk.CTkFrame(self, fg_color="transparent")
+        controls.pack(fill=tk.X, pady=(0, 5))
+
+        self.position_label = ctk.CTkLabel(controls, text="")
+        self.position_label.pack(side=tk.LEFT, padx=5)
+
+        self.jump_button = ctk.CTkButton(
+            controls,
+            text="Go",
+            width=50,
+            command=self.on_jump
+        )
+        self.jump_button.pack(side=tk.RIGHT, padx=5)
+
+        self.jump_entry = ctk.CTkEntry(controls, width=120, placeholder_text="Jump to row")
+        self.jump_entry.pack(side=tk.RIGHT)
+        self.jump_entry.bind("<Return>", lambda event: self.on_jump())
+
+        table = ctk.CTkFrame(self)
+        table.pack(fill=tk.BOTH, expand=True)
+        table.grid_rowconfigure(0, weight=1)
+        table.grid_columnconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(table, show="tree headings", selectmode="browse")
+        self.tree.grid(row=0, column=0, sticky="nsew")
+
+        self.vsb = ttk.Scrollbar(table, orient="vertical", command=self.on_scrollbar)
+        self.hsb = ttk.Scrollbar(table, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.hsb.set)
+        self.vsb.grid(row=0, column=1, sticky="ns")
+        self.hsb.grid(row=1, column=0, sticky="ew")
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_to(self.offset - 3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_to(self.offset + 3))
+        self.tree.bind("<Prior>", lambda event: self.scroll_to(self.offset - self.visible_rows))
+        self.tree.bind("<Next>", lambda event: self.scroll_to(self.offset + self.visible_rows))
+        self.tree.bind("<Home>", lambda event: self.scroll_to(0))
+        self.tree.bind("<End>", lambda event: self.scroll_to(self.row_count()))
+
+    def row_count(self):
+        return 0 if self.df is None else len(self.df)
+
+    def set_data(self, df):
+        """Show a new frame, dropping any sort order and cached indexes"""
+        self.df = df
+        self.offset = 0
+        self.order = None
+        self.sort_column = None
+        self.sort_indexes = {}
+        self.end_sorting()
+        self.configure_columns()
+        self.render()
+
+    def remove_column(self, column):
+        """Refresh after a column was dropped from the current frame in place.
+
+        Row positions are unchanged, so cached sort indexes stay valid.
+        """
+        self.sort_indexes.pop((column, True), None)
+        self.sort_indexes.pop((column, False), None)
+        if self.sorting is not None and self.sorting[0] == column:
+            self.end_sorting()
+        if self.sort_column == column:
+            self.order = None
+            self.sort_column = None
+        self.configure_columns()
+        self.render()
+
+    def configure_columns(self):
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+
+        columns = [] if self.df is None else list(self.df.columns)
+        self.tree["columns"] = columns
+        self.tree.heading("#0", text="Row")
+        self.tree.column("#0", width=80, stretch=False, anchor="e")
+
+        for column in columns:
+            self.tree.heading(column, text=self.heading_text(column), command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=100, stretch=False)
+
+    def heading_text(self, column):
+        if column != self.sort_column:
+            return column
+        return f"{column} {'▲' if self.sort_ascending else '▼'}"
+
+    def sort_by(self, column):
+        if self.df is None or self.sorting is not None:
+            return
+
+        ascending = not self.sort_ascending if column == self.sort_column else True
+        if (column, ascending) in self.sort_indexes:
+            self.apply_sort(column, ascending)
+            return
+
+        # sorting millions of rows takes seconds, so it runs off the Tk thread
+        self.sorting = (column, ascending)
+        self.sort_results = queue.Queue()
+        self.tree.configure(cursor="watch")
+        threading.Thread(
+            target=sort_worker,
+            args=(self.df[column], ascending, self.sort_results),
+            daemon=True
+        ).start()
+        self.render()
+        self.after(POLL_MS, self.poll_sort, self.sort_results)
+
+    def poll_sort(self, results):
+        if results is not self.sort_results:
+            return
+        try:
+            index = results.get_nowait()
+        except queue.Empty:
+            self.after(POLL_MS, self.poll_sort, results)
+            return
+
+        column, ascending = self.sorting
+        self.sort_indexes[(column, ascending)] = index
+        self.end_sorting()
+        self.apply_sort(column, ascending)
+
+    def end_sorting(self):
+        self.sorting = None
+        self.sort_results = None
+        self.tree.configure(cursor="")
+
+    def apply_sort(self, column, ascending):
+        self.sort_column = column
+        self.sort_ascending = ascending
+        self.order = self.sort_indexes[(column, ascending)]
+
+        for name in self.df.columns:
+            self.tree.heading(name, text=self.heading_text(name))
+        self.offset = 0
+        self.render()
+
+    def on_jump(self):
+        try:
+            row = int(self.jump_entry.get().replace(",", ""))
+        except ValueError:
+            return
+        if self.order is None:
+            self.scroll_to(row - 1)
+        else:
+            # jump to where the requested row sits in the current sort order
+            positions = np.flatnonzero(self.order == row - 1)
+            if len(positions):
+                self.scroll_to(positions[0])
+
+    def on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self.scroll_to(int(float(args[0]) * self.row_count()))
+        elif action == "scroll":
+            step = self.visible_rows if args[1] == "pages" else 1
+            self.scroll_to(self.offset + int(args[0]) * step)
+
+    def on_mousewheel(self, event):
+        self.scroll_to(self.offset - int(event.delta / 120) * 3)
+
+    def on_resize(self, event):
+        row_height = ttk.Style().lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT
+        visible_rows = max(1, (event.height - HEADER_HEIGHT) // int(row_height))
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.render()
+
+    def scroll_to(self, offset):
+        offset = max(0, min(int(offset), self.row_count() - self.visible_rows))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def render(self):
+        total = self.row_count()
+        self.offset = max(0, min(self.offset, total - self.visible_rows))
+        end = min(self.offset + self.visible_rows, total)
+
+        if self.order is None:
+            positions = np.arange(self.offset, end)
+        else:
+            positions = self.order[self.offset:end]
+
+        items = self.tree.get_children()
+        for item in items[len(positions):]:
+            self.tree.delete(item)
+        items = items[:len(positions)]
+
+        if len(positions):
+            rows = self.df.iloc[positions].astype(object).to_numpy().tolist()
+            for i, (position, values) in enumerate(zip(positions, rows)):
+                text = f"{position + 1:,}"
+                if i < len(items):
+                    self.tree.item(items[i], text=text, values=values)
+                else:
+                    self.tree.insert("", "end", text=text, values=values)
+
+        if total:
+            self.vsb.set(self.offset / total, end / total)
+            text = f"Rows {self.offset + 1:,}–{end:,} of {total:,}"
+            if self.sorting is not None:
+                text += f" · sorting by {self.sorting[0]}..."
+            self.position_label.configure(text=text)
+        else:
+            self.vsb.set(0, 1)
+            self.position_label.configure(text="")
+
+
+def sort_worker(series, ascending, results):
+    """Put the row order of a column on ``results``: a stable sort that
+    keeps ties in row order and missing values last in either direction"""
+    series = series.reset_index(drop=True)
+    results.put(series.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy())
@@ -1,14 +1,17 @@
 import customtkinter as ctk
 import tkinter as tk
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import seaborn as sns
-from sklearn.metrics import roc_curve, confusion_matrix
+from CTkMessagebox import CTkMessagebox
+from core.cross_validation import summarize_folds
+from core.evaluation import DEFAULT_COSTS, DEFAULT_THRESHOLD, confusion_explanation, evaluation_curves, expected_cost
+from ui.evaluation_plot import EvaluationPlot
 
 class EvaluationFrame(ctk.CTkFrame):
     def __init__(self, parent, app):
         super().__init__(parent)
         self.app = app
+        self.curves = None
+        self.threshold = DEFAULT_THRESHOLD
+        self.importance_window = None
         self.setup_frame()
         
     def setup_frame(self):
@@ -31,9 +34,45 @@ class EvaluationFrame(ctk.CTkFrame):
         viz_frame = ctk.CTkFrame(self)
         viz_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
         
-        self.fig = Figure(figsize=(8, 4))
-        self.canvas = FigureCanvasTkAgg(self.fig, master=viz_frame)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.plot = EvaluationPlot(viz_frame)
+        
+        threshold_frame = ctk.CTkFrame(viz_frame, fg_color="transparent")
+        threshold_frame.pack(fill=tk.X, pady=(5, 0))
+        ctk.CTkLabel(threshold_frame, text="Decision threshold:").pack(side=tk.LEFT, padx=5)
+        self.threshold_slider = ctk.CTkSlider(
+            threshold_frame,
+            from_=0,
+            to=1,
+            number_of_steps=200,
+            command=self.on_threshold_changed,
+            state="disabled"
+        )
+        self.threshold_slider.set(DEFAULT_THRESHOLD)
+        self.threshold_slider.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.threshold_label = ctk.CTkLabel(threshold_frame, text="", width=420, anchor="w")
+        self.threshold_label.pack(side=tk.LEFT, padx=5)
+        
+        cost_frame = ctk.CTkFrame(viz_frame, fg_color="transparent")
+        cost_frame.pack(fill=tk.X, pady=(5, 0))
+        self.cost_entries = {}
+        for key, label in (
+            ('miss_cost', "Cost of a missed case:"),
+            ('false_alarm_cost', "Cost of a false alarm:"),
+            ('reviews_per_day', "Reviews per day:"),
+            ('cases_per_day', "Cases scored per day:")
+        ):
+            ctk.CTkLabel(cost_frame, text=label).pack(side=tk.LEFT, padx=(5, 2))
+            entry = ctk.CTkEntry(cost_frame, width=80)
+            entry.pack(side=tk.LEFT, padx=(0, 5))
+            self.cost_entries[key] = entry
+        ctk.CTkButton(
+            cost_frame,
+            text="Optimize threshold",
+            command=self.optimize_threshold,
+            width=140
+        ).pack(side=tk.LEFT, padx=5)
+        self.cost_label = ctk.CTkLabel(cost_frame, text="", anchor="w")
+        self.cost_label.pack(side=tk.LEFT, padx=5)
         
         self.nav_frame = ctk.CTkFrame(self)
         self.nav_frame.pack(fill=tk.X, pady=(10, 0), padx=20)
@@ -45,6 +84,14 @@ class EvaluationFrame(ctk.CTkFrame):
         )
         self.back_button.pack(side=tk.LEFT)
         
+        self.importance_button = ctk.CTkButton(
+            self.nav_frame,
+            text="Feature importance...",
+            command=self.show_importance,
+            state="disabled"
+        )
+        self.importance_button.pack(side=tk.LEFT, padx=10)
+        
         self.next_button = ctk.CTkButton(
             self.nav_frame,
             text="Next: Export Model →",
@@ -52,29 +99,48 @@ class EvaluationFrame(ctk.CTkFrame):
             state="disabled"
         )
         self.next_button.pack(side=tk.RIGHT)
+        
+        self.explanation_label = ctk.CTkLabel(
+            self,
+            text="",
+            font=("Arial", 12)
+        )
+        self.explanation_label.pack(pady=10)
 
-    def update_metrics(self, metrics):
+    def update_metrics(self, metrics, timer=None, on_rendered=None):
+        """Show a run's metrics; the plots render off the Tk thread, timed
+        by ``timer`` if given, and ``on_rendered`` is called when they are done"""
         metrics_text = "Model Performance Metrics:\n\n"
         
+        if 'folds' in metrics:
+            folds = metrics['folds']
+            summary = summarize_folds(folds)
+            metrics_text += f"Cross-validation over {len(folds)} folds (mean ± std):\n"
+            metrics_text += " · ".join(f"{name} {mean:.4f} ± {std:.4f}" for name, (mean, std) in summary.items()) + "\n"
+            for fold in folds:
+                metrics_text += f"Fold {fold['fold']}: precision {fold['precision']:.3f}, recall {fold['recall']:.3f}, "
+                metrics_text += f"F1 {fold['f1']:.3f}, ROC AUC {fold['roc_auc']:.3f}\n"
+            metrics_text += "The figures below are from the pooled out-of-fold predictions.\n\n"
+        
         metrics_text += "Precision (Accuracy of Positive Predictions):\n"
-        metrics_text += f"• {metrics['precision']:.4f}\n"
+        metrics_text += f"• {metrics['precision']:.4f}{self.interval_text(metrics, 'precision')}\n"
         metrics_text += "Precision shows how many of our positive predictions were actually correct.\n"
         metrics_text += f"In this case, {metrics['precision']*100:.1f}% of the cases we predicted as "
         metrics_text += "risky/fraudulent were actually risky/fraudulent.\n\n"
         
         metrics_text += "Recall (Detection Rate):\n"
-        metrics_text += f"• {metrics['recall']:.4f}\n"
+        metrics_text += f"• {metrics['recall']:.4f}{self.interval_text(metrics, 'recall')}\n"
         metrics_text += "Recall shows how many actual positive cases we caught.\n"
         metrics_text += f"Our model successfully identified {metrics['recall']*100:.1f}% of all "
         metrics_text += "actual risky/fraudulent cases.\n\n"
         
         metrics_text += "F1 Score (Overall Accuracy):\n"
-        metrics_text += f"• {metrics['f1']:.4f}\n"
+        metrics_text += f"• {metrics['f1']:.4f}{self.interval_text(metrics, 'f1')}\n"
         metrics_text += "F1 Score balances precision and recall in a single number.\n"
         metrics_text += f"A score of {metrics['f1']:.4f} indicates the model's overall effectiveness.\n\n"
         
         metrics_text += "ROC AUC Score (Discrimination Ability):\n"
-        metrics_text += f"• {metrics['roc_auc']:.4f}\n"
+        metrics_text += f"• {metrics['roc_auc']:.4f}{self.interval_text(metrics, 'roc_auc')}\n"
         metrics_text += "This score shows how well the model can distinguish between normal and risky/fraudulent cases.\n"
         metrics_text += f"Our score of {metrics['roc_auc']:.4f} means the model has "
         
@@ -87,59 +153,96 @@ class EvaluationFrame(ctk.CTkFrame):
         else:
             metrics_text += "limited discrimination ability.\n"
         
-        self.metrics_label.configure(text=metrics_text)
-        
-        self.fig.clear()
-        
-        ax1 = self.fig.add_subplot(121)
-        fpr, tpr, _ = roc_curve(metrics['y_test'], metrics['y_proba'])
-        ax1.plot(fpr, tpr, color='darkorange', lw=2, label=f'ROC curve (AUC = {metrics["roc_auc"]:.2f})')
-        ax1.plot([0, 1], [0, 1], color='navy', lw=2, linestyle='--')
-        ax1.set_xlim([0.0, 1.0])
-        ax1.set_ylim([0.0, 1.05])
-        ax1.set_xlabel('False Positive Rate')
-        ax1.set_ylabel('True Positive Rate')
-        ax1.set_title('Receiver Operating Characteristic (ROC) Curve\n' +
-                     'Shows model\'s ability to balance sensitivity and specificity')
-        ax1.legend(loc="lower right")
-        
-        ax2 = self.fig.add_subplot(122)
-        cm = confusion_matrix(metrics['y_test'], metrics['y_pred'])
-        sns.heatmap(cm, annot=True, fmt='d', ax=ax2, cmap='Blues')
-        ax2.set_xlabel('Predicted')
-        ax2.set_ylabel('Actual')
-        ax2.set_title('Confusion Matrix\n' +
-                     'Shows prediction successes and failures')
-        
-        total = cm.sum()
-        correct = cm[0,0] + cm[1,1]
-        accuracy = correct/total
-        
-        explanation = (
-            f"\nConfusion Matrix Explanation:\n"
-            f"• Total Cases: {total}\n"
-            f"• Correct Predictions: {correct} ({accuracy:.1%})\n"
-            f"• Top-left: Correct normal predictions\n"
-            f"• Bottom-right: Correct risky/fraudulent predictions\n"
-            f"• Top-right: False alarms\n"
-            f"• Bottom-left: Missed detections"
-        )
+        self.curves = evaluation_curves(metrics)
+        ks, ks_threshold = self.curves.ks
+        metrics_text += f"\nPR AUC (average precision): {self.curves.pr_auc:.4f} · "
+        metrics_text += f"KS statistic: {ks:.4f} at a score of {ks_threshold:.3f}\n"
         
-        self.explanation_label = ctk.CTkLabel(
-            self,
-            text=explanation,
-            font=("Arial", 12)
-        )
-        self.explanation_label.pack(pady=10)
+        self.metrics_label.configure(text=metrics_text)
         
-        self.fig.tight_layout()
-        self.canvas.draw()
+        self.threshold = DEFAULT_THRESHOLD
+        self.fill_default_costs()
+        self.cost_label.configure(text="")
+        self.threshold_slider.configure(state="normal")
+        self.threshold_slider.set(self.threshold)
+        self.plot.show(metrics, self.threshold, timer, on_rendered)
+        self.show_threshold(self.curves.at(self.threshold))
         
         self.next_button.configure(state="normal")
+        self.importance_button.configure(state="normal")
         
         if hasattr(self.app, 'sidebar'):
             self.app.sidebar.enable_next_step('evaluation')
 
+    def show_importance(self):
+        # imported here so the importance window's modules load only when asked for
+        from ui.importance_panel import ImportanceWindow
+        if self.importance_window is not None and self.importance_window.winfo_exists():
+            self.importance_window.focus()
+            return
+        self.importance_window = ImportanceWindow(self, self.app)
+        
+    def interval_text(self, metrics, name):
+        intervals = metrics.get('intervals')
+        if intervals is None:
+            return ""
+        low, high = intervals[name]
+        return f"  ({intervals['confidence']:.0%} CI {low:.4f} – {high:.4f}, {intervals['resamples']:,} bootstrap resamples)"
+        
+    def on_threshold_changed(self, value):
+        # the matrix comes from the precomputed cumulative counts; the plot redraws it off-thread
+        if self.curves is None:
+            return
+        self.threshold = float(value)
+        self.show_threshold(self.curves.at(self.threshold))
+        self.plot.set_threshold(self.threshold)
+        
+    def fill_default_costs(self):
+        for key, value in DEFAULT_COSTS.get(self.app.task_type, {}).items():
+            entry = self.cost_entries[key]
+            if not entry.get().strip():
+                entry.insert(0, f"{value:g}")
+                
+    def read_costs(self):
+        values = {}
+        for key, entry in self.cost_entries.items():
+            text = entry.get().strip()
+            values[key] = float(text) if text else None
+        if values['miss_cost'] is None or values['false_alarm_cost'] is None:
+            raise ValueError("Enter the cost of a missed case and of a false alarm")
+        if (values['reviews_per_day'] is None) != (values['cases_per_day'] is None):
+            raise ValueError("Enter both reviews per day and cases scored per day, or neither")
+        return values
+        
+    def optimize_threshold(self):
+        if self.curves is None:
+            return
+        try:
+            costs = self.read_costs()
+        except ValueError as e:
+            CTkMessagebox(title="Threshold Optimizer", message=str(e), icon="cancel")
+            return
+        
+        max_flag_rate = None
+        if costs['reviews_per_day'] is not None:
+            max_flag_rate = costs['reviews_per_day'] / max(costs['cases_per_day'], 1)
+        best = self.curves.optimal_threshold(costs['miss_cost'], costs['false_alarm_cost'], max_flag_rate)
+        default_cost = expected_cost(self.curves.at(DEFAULT_THRESHOLD), costs['miss_cost'], costs['false_alarm_cost'])
+        
+        self.threshold_slider.set(min(max(best['threshold'], 0), 1))
+        self.on_threshold_changed(best['threshold'])
+        capacity = "" if max_flag_rate is None else f" within {max_flag_rate:.2%} review capacity"
+        self.cost_label.configure(
+            text=f"Expected cost {best['cost']:,.0f}{capacity} (at 0.50: {default_cost:,.0f})"
+        )
+        
+    def show_threshold(self, point):
+        self.threshold_label.configure(
+            text=f"{point['threshold']:.3f}: precision {point['precision']:.3f}, recall {point['recall']:.3f}, "
+                 f"F1 {point['f1']:.3f}, {point['flagged']:,} flagged"
+        )
+        self.explanation_label.configure(text=confusion_explanation(point['confusion_matrix']))
+
     def show_frame(self, frame_name):
         if frame_name == 'data_preparation' and not self.frames['data_selection'].file_selected:
             return
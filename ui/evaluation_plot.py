@@ -0,0 +1,165 @@
+import queue
+import threading
+import tkinter as tk
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PIL import Image, ImageTk
+from core.evaluation import DEFAULT_THRESHOLD, draw_evaluation, evaluation_curves, update_confusion
+
+FIGSIZE = (8, 6)
+DPI = 100
+POLL_MS = 30
+
+
+class EvaluationPlot:
+    """The evaluation figure, rendered off the Tk thread.
+
+    A worker thread owns an Agg figure and draws the (decimated) curves
+    and the confusion matrix into it; the finished image is swapped into a
+    plain Tk canvas. Requests are coalesced: while one render runs, newer
+    ones replace each other, so dragging the threshold slider or resizing
+    the window only renders the latest state. A threshold change redraws
+    the confusion matrix artists in place instead of the whole figure.
+
+    A new run's render is timed (and profiled) by the caller's
+    ``StageTimer`` on the worker thread, where the drawing happens, and
+    ``on_rendered`` is called on the Tk thread once it is done.
+    """
+
+    def __init__(self, master):
+        self.master = master
+        self.canvas = tk.Canvas(master, highlightthickness=0, background="white")
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.image_item = self.canvas.create_image(0, 0, anchor="nw")
+        self.message_item = self.canvas.create_text(0, 0, anchor="nw", text="")
+        self.photo = None
+        self.shown = False
+        self.size = None
+
+        self.condition = threading.Condition()
+        self.pending = None
+        self.results = queue.Queue()
+        self.requested = 0
+        self.polling = False
+        self.worker = None
+
+        self.fig = Figure(figsize=FIGSIZE, dpi=DPI)
+        FigureCanvasAgg(self.fig)
+        self.artists = None
+        self.curves = None
+        self.laid_out = None
+
+        self.canvas.bind("<Configure>", self.on_resize)
+
+    def show(self, metrics, threshold=DEFAULT_THRESHOLD, timer=None, on_rendered=None):
+        """Render a new run's evaluation figure"""
+        self.shown = True
+        self.submit(threshold, metrics, timer, on_rendered)
+
+    def set_threshold(self, threshold):
+        if self.shown:
+            self.submit(threshold)
+
+    def on_resize(self, event):
+        if self.shown and (event.width, event.height) != self.size:
+            self.submit(None)
+
+    def render_size(self):
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            return FIGSIZE[0] * DPI, FIGSIZE[1] * DPI
+        return width, height
+
+    def submit(self, threshold, metrics=None, timer=None, on_rendered=None):
+        self.size = self.render_size()
+        self.requested += 1
+        with self.condition:
+            pending = self.pending or {}
+            # a newer request must not drop the data, threshold or timing of one it replaces
+            if metrics is None:
+                metrics = pending.get('metrics')
+                timer = pending.get('timer')
+                on_rendered = pending.get('on_rendered')
+            if threshold is None:
+                threshold = pending.get('threshold')
+            self.pending = {
+                'metrics': metrics,
+                'threshold': threshold,
+                'size': self.size,
+                'generation': self.requested,
+                'timer': timer,
+                'on_rendered': on_rendered
+            }
+            self.condition.notify()
+
+        if self.worker is None:
+            self.worker = threading.Thread(target=self.work, daemon=True)
+            self.worker.start()
+        if not self.polling:
+            self.polling = True
+            self.master.after(POLL_MS, self.poll)
+
+    def work(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                request, self.pending = self.pending, None
+            try:
+                timer = request['timer']
+                if timer is None:
+                    image = self.render(request)
+                else:
+                    with timer.stage("Evaluation rendering", rows=len(request['metrics']['y_test'])):
+                        image = self.render(request)
+                self.results.put(('done', request, image))
+            except Exception as e:
+                self.results.put(('error', request, str(e)))
+
+    def render(self, request):
+        width, height = request['size']
+        self.fig.set_size_inches(width / DPI, height / DPI)
+        resized = request['size'] != self.laid_out
+        self.laid_out = request['size']
+        threshold = request['threshold']
+
+        if request['metrics'] is not None:
+            self.curves = evaluation_curves(request['metrics'])
+            self.artists = draw_evaluation(self.fig, request['metrics'], threshold)
+        else:
+            if threshold is not None:
+                update_confusion(self.artists, self.curves.at(threshold)['confusion_matrix'])
+                self.artists[0].axes.set_title(f'Confusion Matrix at {threshold:.2f}')
+            if resized:
+                self.fig.tight_layout()
+
+        self.fig.canvas.draw()
+        pixels = np.asarray(self.fig.canvas.buffer_rgba())
+        return Image.fromarray(pixels.copy(), 'RGBA')
+
+    def poll(self):
+        latest = None
+        while True:
+            try:
+                latest = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if latest[1]['on_rendered'] is not None:
+                latest[1]['on_rendered']()
+
+        if latest is not None:
+            kind, request, payload = latest
+            generation = request['generation']
+            if kind == 'error':
+                self.canvas.itemconfigure(self.message_item, text=f"Could not draw the evaluation plots: {payload}")
+            else:
+                # PhotoImage must be created on the Tk thread; keep a reference or Tk drops it
+                self.photo = ImageTk.PhotoImage(payload)
+                self.canvas.itemconfigure(self.image_item, image=self.photo)
+                self.canvas.itemconfigure(self.message_item, text="")
+            if generation == self.requested:
+                self.polling = False
+                return
+
+        self.master.after(POLL_MS, self.poll)
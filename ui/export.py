@@ -2,6 +2,9 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog
 from CTkMessagebox import CTkMessagebox
+from core.evaluation import DEFAULT_THRESHOLD
+from core.export import save_model, script_unsupported, training_script
+from core.telemetry import StageTimer
 
 class ExportFrame(ctk.CTkFrame):
     def __init__(self, parent, app):
@@ -26,13 +29,19 @@ class ExportFrame(ctk.CTkFrame):
             ("Export Python code (.py)", "code")
         ]
         
+        self.option_buttons = {}
         for text, value in options:
-            ctk.CTkRadioButton(
+            button = ctk.CTkRadioButton(
                 options_frame,
                 text=text,
                 variable=self.export_var,
                 value=value
-            ).pack(pady=5, anchor="w")
+            )
+            button.pack(pady=5, anchor="w")
+            self.option_buttons[value] = button
+            
+        self.code_note = ctk.CTkLabel(options_frame, text="", wraplength=400, justify="left")
+        self.code_note.pack(anchor="w")
             
         ctk.CTkButton(
             options_frame,
@@ -57,6 +66,20 @@ class ExportFrame(ctk.CTkFrame):
         )
         self.finish_button.pack(side=tk.RIGHT)
         
+    def refresh_options(self):
+        """Offer the training script only for runs it reproduces"""
+        training = self.app.frames['training']
+        reason = None
+        if training.model is not None:
+            reason = script_unsupported(training.trained_job['mode'], training.engine_name)
+        if reason is not None:
+            self.option_buttons['code'].configure(state="disabled")
+            self.code_note.configure(text=f"Python code is not available. {reason}.")
+            self.export_var.set("model")
+        else:
+            self.option_buttons['code'].configure(state="normal")
+            self.code_note.configure(text="")
+            
     def export_model(self):
         export_type = self.export_var.get()
         
@@ -74,14 +97,20 @@ class ExportFrame(ctk.CTkFrame):
         
         if save_path:
             try:
-                if export_type == "model":
-                    self._save_model(save_path)
-                else:
-                    self._save_code(save_path)
-                    
+                timer = StageTimer(profile=self.app.profile_stages.get())
+                with timer.stage("Export"):
+                    if export_type == "model":
+                        self._save_model(save_path)
+                    else:
+                        self._save_code(save_path)
+                timer.write_log(screen="export", export_type=export_type)
+                
+                message = "Export completed successfully!"
+                if timer.profile:
+                    message += f"\n\nExport profile saved to {timer.profile_directory}"
                 tk.messagebox.showinfo(
                     "Success",
-                    "Export completed successfully!"
+                    message
                 )
                 
             except Exception as e:
@@ -90,77 +119,37 @@ class ExportFrame(ctk.CTkFrame):
                     f"An error occurred during export:\n{str(e)}"
                 )
                 
+    def decision_threshold(self):
+        """The threshold last set on the evaluation screen"""
+        if 'evaluation' in self.app.frames:
+            return self.app.frames['evaluation'].threshold
+        return DEFAULT_THRESHOLD
+        
     def _save_model(self, path):
-        import pickle
-        model = self.app.frames['training'].model
-        if model is None:
-            raise ValueError("No trained model found. Please complete training first.")
-            
+        training = self.app.frames['training']
         if not path.endswith('.pkl'):
             path = path.replace('.h5', '.pkl')
-            
-        with open(path, 'wb') as f:
-            pickle.dump(model, f)
+        save_model(path, training.model, training.preprocessors, threshold=self.decision_threshold())
         
     def _save_code(self, path):
-        data_file = self.app.frames['data_selection'].selected_file
-        target_column = self.app.frames['data_preparation'].target_var.get()
-        task_type = self.app.task_type
-        
-        code_template = f"""import pandas as pd
-import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.ensemble import RandomForestClassifier
-from imblearn.over_sampling import SMOTE
-
-# Load and prepare data
-df = pd.read_csv('{data_file}')  # Updated with actual file path
-target_column = '{target_column}'  # Updated with selected target column
-task_type = '{task_type}'  # Updated with selected task type
-
-# Encode categorical variables
-categorical_columns = df.select_dtypes(include=["object"]).columns
-for col in categorical_columns:
-    le = LabelEncoder()
-    df[col] = le.fit_transform(df[col])
-
-# Split features and target
-X = df.drop(columns=[target_column])
-y = df[target_column]
-
-# Train-test split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Apply SMOTE for fraud detection
-if task_type == "fraud_detection":
-    smote = SMOTE(random_state=42)
-    X_train, y_train = smote.fit_resample(X_train, y_train)
-
-# Scale features
-scaler = StandardScaler()
-X_train = scaler.fit_transform(X_train)
-X_test = scaler.transform(X_test)
-
-# Initialize and train model
-model = RandomForestClassifier(
-    n_estimators=50 if task_type == "fraud_detection" else 100,
-    max_depth=10 if task_type == "fraud_detection" else 15,
-    random_state=42,
-    class_weight="balanced"
-)
-
-# Train the model
-model.fit(X_train, y_train)
-
-# Save the trained model
-import pickle
-with open('model.pkl', 'wb') as f:
-    pickle.dump(model, f)
-"""
+        training = self.app.frames['training']
+        job = training.trained_job
+        reason = script_unsupported(job['mode'], training.engine_name)
+        if reason is not None:
+            raise ValueError(f"{reason}. Export the model file instead.")
         
+        code = training_script(
+            job['file_path'],
+            job['columns'],
+            job['target_column'],
+            job['task_type'],
+            training.model,
+            job['imbalance'],
+            job['ratio'],
+            threshold=self.decision_threshold()
+        )
         with open(path, 'w') as f:
-            f.write(code_template)
+            f.write(code)
 
     def on_finish(self):
         confirm = CTkMessagebox(
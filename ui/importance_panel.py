@@ -0,0 +1,194 @@
+import multiprocessing
+import queue
+import customtkinter as ctk
+import tkinter as tk
+from tkinter import ttk
+from CTkMessagebox import CTkMessagebox
+from core.importance import DEFAULT_REPEATS, DEFAULT_TIME_BUDGET, cached_importance, run_importance_process
+from core.runner import terminate_process_tree
+
+COLUMNS = (
+    ("feature", "Feature", 220),
+    ("impurity", "Impurity", 100),
+    ("permutation", "Permutation (AUC drop)", 170),
+    ("std", "± std", 80)
+)
+
+
+class ImportanceWindow(ctk.CTkToplevel):
+    """Feature importance of the last trained model, with an option to drop
+    weak columns and retrain"""
+
+    def __init__(self, parent, app):
+        super().__init__(parent)
+        self.app = app
+        self.title("Feature Importance")
+        self.geometry("640x520")
+        self.importance = None
+        self.results = None
+        self.process = None
+
+        controls = ctk.CTkFrame(self, fg_color="transparent")
+        controls.pack(fill=tk.X, padx=10, pady=(10, 5))
+        ctk.CTkLabel(controls, text="Repeats:").pack(side=tk.LEFT, padx=(0, 5))
+        self.repeats_entry = ctk.CTkEntry(controls, width=50)
+        self.repeats_entry.insert(0, str(DEFAULT_REPEATS))
+        self.repeats_entry.pack(side=tk.LEFT)
+        ctk.CTkLabel(controls, text="Time budget (s):").pack(side=tk.LEFT, padx=(15, 5))
+        self.budget_entry = ctk.CTkEntry(controls, width=60)
+        self.budget_entry.insert(0, f"{DEFAULT_TIME_BUDGET:g}")
+        self.budget_entry.pack(side=tk.LEFT)
+        self.compute_button = ctk.CTkButton(controls, text="Compute", command=self.compute, width=100)
+        self.compute_button.pack(side=tk.LEFT, padx=15)
+
+        self.status_label = ctk.CTkLabel(self, text="", anchor="w")
+        self.status_label.pack(fill=tk.X, padx=10)
+
+        self.tree = ttk.Treeview(self, columns=[key for key, _, _ in COLUMNS], show="headings", height=14)
+        for key, heading, width in COLUMNS:
+            self.tree.heading(key, text=heading)
+            self.tree.column(key, width=width, anchor="w" if key == "feature" else "e")
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        drop_frame = ctk.CTkFrame(self, fg_color="transparent")
+        drop_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ctk.CTkLabel(drop_frame, text="Drop features with permutation importance below:").pack(side=tk.LEFT)
+        self.cutoff_entry = ctk.CTkEntry(drop_frame, width=70)
+        self.cutoff_entry.insert(0, "0.001")
+        self.cutoff_entry.pack(side=tk.LEFT, padx=5)
+        self.drop_button = ctk.CTkButton(
+            drop_frame,
+            text="Drop and retrain",
+            command=self.drop_and_retrain,
+            state="disabled",
+            width=130
+        )
+        self.drop_button.pack(side=tk.LEFT, padx=5)
+
+        self.compute()
+
+    def compute(self):
+        training = self.app.frames['training']
+        if training.model is None or training.trained_job is None:
+            self.status_label.configure(text="Train a model first.")
+            return
+        try:
+            repeats = max(1, int(self.repeats_entry.get()))
+            time_budget = max(0.1, float(self.budget_entry.get()))
+        except ValueError:
+            self.status_label.configure(text="Repeats and time budget must be numbers.")
+            return
+
+        if 'pipeline' not in (training.preprocessors or {}):
+            self.status_label.configure(text="Feature importance is not available for streamed models.")
+            return
+        cached = cached_importance(training.trained_job, repeats, time_budget)
+        if cached is not None:
+            self.show(cached)
+            return
+
+        self.compute_button.configure(state="disabled")
+        self.drop_button.configure(state="disabled")
+        self.status_label.configure(text="Computing feature importance...")
+        self.cancel_process()
+        # like training, the work runs in a child process that can be killed when the window closes
+        context = multiprocessing.get_context("spawn")
+        self.results = context.Queue()
+        self.process = context.Process(
+            target=run_importance_process,
+            args=(training.trained_job, training.model, training.preprocessors, repeats, time_budget, self.results)
+        )
+        self.process.start()
+        self.poll(self.results)
+
+    def poll(self, results):
+        if results is not self.results or not self.winfo_exists():
+            return
+        try:
+            kind, payload = results.get_nowait()
+        except queue.Empty:
+            if self.process is not None and not self.process.is_alive() and results.empty():
+                kind, payload = 'error', "The feature importance process ended unexpectedly"
+            else:
+                self.after(100, self.poll, results)
+                return
+
+        self.cancel_process()
+        self.compute_button.configure(state="normal")
+        if kind == 'error':
+            self.status_label.configure(text=f"Error: {payload}")
+            return
+        self.show(payload)
+
+    def cancel_process(self):
+        if self.process is not None:
+            terminate_process_tree(self.process)
+            self.process.join(timeout=0.1)
+            self.process = None
+
+    def destroy(self):
+        self.results = None
+        self.cancel_process()
+        super().destroy()
+
+    def show(self, importance):
+        self.importance = importance
+        self.tree.delete(*self.tree.get_children())
+        impurity = importance['impurity'] or [None] * len(importance['features'])
+        rows = sorted(
+            zip(importance['features'], impurity, importance['permutation_mean'], importance['permutation_std']),
+            key=lambda row: row[2],
+            reverse=True
+        )
+        for feature, impurity_value, mean, std in rows:
+            self.tree.insert("", tk.END, values=(
+                feature,
+                "" if impurity_value is None else f"{impurity_value:.4f}",
+                f"{mean:.4f}",
+                f"{std:.4f}"
+            ))
+
+        source = "cached" if importance['cached'] else f"{importance['seconds']:.1f}s"
+        self.status_label.configure(
+            text=f"Permutation importance on {importance['rows']:,} held-out rows × {importance['repeats']} repeats "
+                 f"(baseline AUC {importance['baseline_auc']:.4f}, {source})"
+        )
+        self.drop_button.configure(state="normal")
+
+    def drop_and_retrain(self):
+        if self.importance is None:
+            return
+        try:
+            cutoff = float(self.cutoff_entry.get())
+        except ValueError:
+            self.status_label.configure(text="The cutoff must be a number.")
+            return
+
+        preparation = self.app.frames['data_preparation']
+        weak = [
+            feature for feature, mean in zip(self.importance['features'], self.importance['permutation_mean'])
+            if mean < cutoff and feature in preparation.df.columns
+        ]
+        if not weak:
+            self.status_label.configure(text="No features fall below the cutoff.")
+            return
+        if len(weak) == len(self.importance['features']):
+            self.status_label.configure(text="The cutoff would drop every feature.")
+            return
+
+        confirm = CTkMessagebox(
+            title="Drop and Retrain",
+            message=f"Drop {len(weak)} column(s) and retrain?\n\n{', '.join(weak)}",
+            icon="question",
+            option_1="Yes",
+            option_2="No"
+        )
+        if confirm.get() != "Yes":
+            return
+
+        preparation.remove_columns(weak)
+        training = self.app.frames['training']
+        self.destroy()
+        self.app.show_frame('training')
+        training.reset_training()
+        training.start_training()
@@ -0,0 +1,129 @@
+import math
+import tkinter as tk
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+SERIES = ('loss', 'val_loss', 'accuracy', 'val_accuracy')
+X_HEADROOM = 1.5
+Y_MARGIN = 0.1
+
+
+class LivePlot:
+    """Loss and accuracy curves that are cheap to extend while training.
+
+    The four lines are animated artists blitted over a cached background
+    of the axes, so a new batch of points costs one blit. Running minimum
+    and maximum values are kept per axis; the axes, and with them the
+    cached background, are only re-rendered when a point falls outside
+    the current limits, and the x axis grows with headroom so that
+    happens rarely.
+    """
+
+    def __init__(self, master):
+        self.fig, self.ax1 = plt.subplots(figsize=(6, 4))
+        self.ax2 = self.ax1.twinx()
+
+        self.ax1.set_xlabel('Trees')
+        self.ax1.set_ylabel('Loss', color='tab:blue')
+        self.ax2.set_ylabel('Accuracy', color='tab:orange')
+        self.fig.suptitle('Training Progress')
+
+        self.lines = {
+            'loss': self.ax1.plot([], [], 'b-', label='Training Loss', animated=True)[0],
+            'val_loss': self.ax1.plot([], [], 'b--', label='Validation Loss', animated=True)[0],
+            'accuracy': self.ax2.plot([], [], 'orange', label='Training Accuracy', animated=True)[0],
+            'val_accuracy': self.ax2.plot([], [], 'orange', linestyle='--', label='Validation Accuracy', animated=True)[0]
+        }
+
+        self.ax1.tick_params(axis='y', labelcolor='tab:blue')
+        self.ax2.tick_params(axis='y', labelcolor='tab:orange')
+        self.ax1.xaxis.set_major_locator(plt.MaxNLocator(integer=True))
+
+        lines1, labels1 = self.ax1.get_legend_handles_labels()
+        lines2, labels2 = self.ax2.get_legend_handles_labels()
+        self.ax2.legend(lines1 + lines2, labels1 + labels2, loc='upper right')
+
+        self.canvas = FigureCanvasTkAgg(self.fig, master=master)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.background = None
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+
+        self.fig.tight_layout()
+        self.reset()
+
+    def reset(self):
+        self.data = {'step': [], **{name: [] for name in SERIES}}
+        self.ranges = {self.ax1: [math.inf, -math.inf], self.ax2: [math.inf, -math.inf]}
+        self.max_step = 0
+        for line in self.lines.values():
+            line.set_data([], [])
+
+        self.ax1.set_xlim(0.8, 2)
+        self.ax1.set_ylim(0, 1)
+        self.ax2.set_ylim(0, 1)
+        self.canvas.draw()
+
+    def set_xlabel(self, label):
+        self.ax1.set_xlabel(label)
+        self.canvas.draw()
+
+    def extend(self, points):
+        """Append a batch of metric dicts and redraw once"""
+        if not points:
+            return
+
+        for point in points:
+            self.data['step'].append(point['step'])
+            self.max_step = max(self.max_step, point['step'])
+            for name in SERIES:
+                value = point[name]
+                self.data[name].append(value)
+                if math.isfinite(value):
+                    bounds = self.ranges[self.lines[name].axes]
+                    bounds[0] = min(bounds[0], value)
+                    bounds[1] = max(bounds[1], value)
+
+        for name, line in self.lines.items():
+            line.set_data(self.data['step'], self.data[name])
+
+        if self.update_limits():
+            self.canvas.draw()
+        else:
+            self.blit()
+
+    def update_limits(self):
+        """Widen axes that no longer fit the data; True if any changed"""
+        changed = False
+        if self.max_step + 1 > self.ax1.get_xlim()[1]:
+            self.ax1.set_xlim(0, max(self.max_step + 1, self.max_step * X_HEADROOM))
+            changed = True
+
+        for axis, upper_bound in ((self.ax1, None), (self.ax2, 1)):
+            low, high = self.ranges[axis]
+            if low > high:
+                continue
+            current_low, current_high = axis.get_ylim()
+            if low >= current_low and high <= current_high:
+                continue
+            margin = (high - low) * Y_MARGIN if high != low else Y_MARGIN
+            top = high + margin if upper_bound is None else min(upper_bound, high + margin)
+            axis.set_ylim(max(0, low - margin), top)
+            changed = True
+        return changed
+
+    def on_draw(self, event):
+        # a full draw (limits changed, window resized) renders everything but the lines
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_lines()
+
+    def blit(self):
+        if self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_lines()
+
+    def draw_lines(self):
+        for line in self.lines.values():
+            line.axes.draw_artist(line)
+        self.canvas.blit(self.fig.bbox)
@@ -0,0 +1,110 @@
+import shutil
+import customtkinter as ctk
+import tkinter as tk
+from tkinter import filedialog, ttk
+
+COLUMNS = (
+    ("stage", "Stage", 170),
+    ("wall", "Wall (s)", 80),
+    ("cpu", "CPU (s)", 80),
+    ("rss", "RSS after (MB)", 110),
+    ("peak", "Peak growth (MB)", 120),
+    ("traced", "Traced peak (MB)", 120),
+    ("rows", "Rows", 100),
+    ("columns", "Columns", 70),
+    ("threads", "Threads", 70),
+    ("processes", "Processes", 80)
+)
+
+
+def _megabytes(value):
+    return "" if value is None else f"{value / 1024 ** 2:,.0f}"
+
+
+class TelemetryPanel(ctk.CTkFrame):
+    """Table of the last run's per-stage telemetry records.
+
+    When the run was profiled, selecting a stage lists its hottest
+    functions and the run's pstats and folded stack files can be exported.
+    """
+
+    def __init__(self, parent, height=6):
+        super().__init__(parent)
+        self.records = []
+        self.profile_directory = None
+
+        header = ctk.CTkFrame(self, fg_color="transparent")
+        header.pack(fill=tk.X)
+        self.summary_label = ctk.CTkLabel(header, text="Performance breakdown: no run yet", font=("Arial", 12, "bold"))
+        self.summary_label.pack(side=tk.LEFT, padx=5)
+        self.export_button = ctk.CTkButton(
+            header,
+            text="Export profiles...",
+            command=self.export_profiles,
+            state="disabled",
+            width=130
+        )
+        self.export_button.pack(side=tk.RIGHT, padx=5)
+
+        self.tree = ttk.Treeview(self, columns=[key for key, _, _ in COLUMNS], show="headings", height=height)
+        for key, heading, width in COLUMNS:
+            self.tree.heading(key, text=heading)
+            self.tree.column(key, width=width, anchor="w" if key == "stage" else "e")
+        self.tree.pack(fill=tk.X, padx=5, pady=(0, 5))
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+
+        self.hot_functions = ctk.CTkTextbox(self, height=120, font=("Courier", 11), wrap="none")
+
+    def show(self, records, profile_directory=None):
+        self.records = list(records)
+        self.tree.delete(*self.tree.get_children())
+        for index, record in enumerate(self.records):
+            self.tree.insert("", tk.END, iid=str(index), values=(
+                record['stage'],
+                f"{record['wall']:.2f}",
+                f"{record['cpu']:.2f}",
+                _megabytes(record.get('rss_after')),
+                _megabytes(record.get('peak_rss_growth')),
+                _megabytes(record.get('traced_peak')),
+                "" if record.get('rows') is None else f"{record['rows']:,}",
+                "" if record.get('columns') is None else record['columns'],
+                record['threads'],
+                record['processes']
+            ))
+
+        wall = sum(record['wall'] for record in records)
+        cpu = sum(record['cpu'] for record in records)
+        self.summary_label.configure(text=f"Performance breakdown: {wall:.2f}s wall, {cpu:.2f}s CPU")
+
+        profiled = any('hot_functions' in record for record in self.records)
+        self.profile_directory = profile_directory if profiled else None
+        self.export_button.configure(state="normal" if profiled else "disabled")
+        self.hot_functions.pack_forget()
+        if profiled:
+            self.hot_functions.pack(fill=tk.X, padx=5, pady=(0, 5))
+            self.show_hot_functions(None)
+
+    def on_select(self, event):
+        selection = self.tree.selection()
+        if selection:
+            self.show_hot_functions(self.records[int(selection[0])])
+
+    def show_hot_functions(self, record):
+        if record is None:
+            text = "Select a stage to see its hottest functions by cumulative time."
+        elif 'hot_functions' not in record:
+            text = f"{record['stage']} was not profiled."
+        else:
+            text = f"{record['stage']}, top functions by cumulative time:\n" + "\n".join(record['hot_functions'])
+        self.hot_functions.configure(state="normal")
+        self.hot_functions.delete("1.0", tk.END)
+        self.hot_functions.insert("1.0", text)
+        self.hot_functions.configure(state="disabled")
+
+    def export_profiles(self):
+        """Copy the run's .prof (pstats) and .folded (flame graph) files to a chosen folder"""
+        if self.profile_directory is None:
+            return
+        target = filedialog.askdirectory(title="Export stage profiles to")
+        if target:
+            shutil.copytree(self.profile_directory, target, dirs_exist_ok=True)
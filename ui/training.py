@@ -1,30 +1,34 @@
 import customtkinter as ctk
 import tkinter as tk
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import numpy as np
-import threading
+import multiprocessing
 import queue
-import time
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, precision_recall_fscore_support, roc_auc_score
-from imblearn.over_sampling import SMOTE
 from CTkMessagebox import CTkMessagebox
+from core.engines import ENGINES, DEFAULT_ENGINE, get_engine
+from core.streaming import DEFAULT_EPOCHS, DEFAULT_MEMORY_BUDGET
+from core.resources import BACKENDS
+from core.telemetry import StageTimer
+from core.bootstrap import DEFAULT_RESAMPLES
+from core.cross_validation import DEFAULT_FOLDS
+from core.runner import run_job_process, terminate_process_tree
+from ui.live_plot import LivePlot
+from ui.telemetry_panel import TelemetryPanel
 
 class TrainingFrame(ctk.CTkFrame):
     def __init__(self, parent, app):
         super().__init__(parent)
         self.app = app
         self.is_training = False
-        self.training_thread = None
-        self.data_queue = queue.Queue()
-        self.training_data = {
-            'loss': [], 'accuracy': [],
-            'val_loss': [], 'val_accuracy': []
-        }
+        self.training_process = None
+        self.messages = None
         self.model = None
+        self.engine_name = None
+        self.engine_params = None
+        self.param_entries = {}
+        self.preprocessors = None
+        self.trials = None
+        self.job = None
+        self.trained_job = None
+        self.telemetry_timer = None
         self.spinner_chars = ["🌑", "🌒", "🌓", "🌔", "🌕", "🌖", "🌗", "🌘"]
         self.spinner_idx = 0
         self.setup_frame()
@@ -41,6 +45,106 @@ class TrainingFrame(ctk.CTkFrame):
         )
         self.train_button.pack(side=tk.LEFT, padx=5)
         
+        ctk.CTkLabel(controls_frame, text="Mode:").pack(side=tk.LEFT, padx=(15, 5))
+        self.mode_var = tk.StringVar(value="In-memory")
+        ctk.CTkOptionMenu(
+            controls_frame,
+            variable=self.mode_var,
+            values=["In-memory", "Streaming", "Cross-validation", "Tuning"],
+            width=140
+        ).pack(side=tk.LEFT)
+        
+        ctk.CTkLabel(controls_frame, text="Folds:").pack(side=tk.LEFT, padx=(15, 5))
+        self.folds_var = tk.StringVar(value=str(DEFAULT_FOLDS))
+        ctk.CTkOptionMenu(
+            controls_frame,
+            variable=self.folds_var,
+            values=["3", "5", "10"],
+            width=60
+        ).pack(side=tk.LEFT)
+        
+        ctk.CTkLabel(controls_frame, text="Bootstrap:").pack(side=tk.LEFT, padx=(15, 5))
+        self.bootstrap_var = tk.StringVar(value=str(DEFAULT_RESAMPLES))
+        ctk.CTkOptionMenu(
+            controls_frame,
+            variable=self.bootstrap_var,
+            values=["Off", "200", "1000", "5000"],
+            width=70
+        ).pack(side=tk.LEFT)
+        
+        ctk.CTkLabel(controls_frame, text="Memory budget (MB):").pack(side=tk.LEFT, padx=(15, 5))
+        self.budget_entry = ctk.CTkEntry(controls_frame, width=70)
+        self.budget_entry.insert(0, str(DEFAULT_MEMORY_BUDGET // 1024 ** 2))
+        self.budget_entry.pack(side=tk.LEFT)
+        
+        ctk.CTkLabel(controls_frame, text="Epochs:").pack(side=tk.LEFT, padx=(15, 5))
+        self.epochs_var = tk.StringVar(value=str(DEFAULT_EPOCHS))
+        ctk.CTkOptionMenu(
+            controls_frame,
+            variable=self.epochs_var,
+            values=["1", "2", "3", "5"],
+            width=60
+        ).pack(side=tk.LEFT)
+        
+        resources = self.app.resources
+        max_cores = len(resources.cpus)
+        
+        ctk.CTkLabel(controls_frame, text="Cores:").pack(side=tk.LEFT, padx=(15, 5))
+        self.cores_var = tk.StringVar(value="Auto")
+        ctk.CTkOptionMenu(
+            controls_frame,
+            variable=self.cores_var,
+            values=["Auto"] + [str(n) for n in range(1, max_cores + 1)],
+            width=80
+        ).pack(side=tk.LEFT)
+        
+        ctk.CTkLabel(controls_frame, text="Backend:").pack(side=tk.LEFT, padx=(15, 5))
+        self.backend_var = tk.StringVar(value=resources.backend)
+        ctk.CTkOptionMenu(
+            controls_frame,
+            variable=self.backend_var,
+            values=list(BACKENDS),
+            width=110
+        ).pack(side=tk.LEFT)
+        
+        ctk.CTkLabel(controls_frame, text="Reserve for UI:").pack(side=tk.LEFT, padx=(15, 5))
+        self.reserve_var = tk.StringVar(value=str(resources.reserve_for_ui))
+        ctk.CTkOptionMenu(
+            controls_frame,
+            variable=self.reserve_var,
+            values=[str(n) for n in range(0, min(4, max_cores))],
+            width=70
+        ).pack(side=tk.LEFT)
+        
+        engine_frame = ctk.CTkFrame(self)
+        engine_frame.pack(pady=(0, 10))
+        
+        ctk.CTkLabel(engine_frame, text="Engine:").pack(side=tk.LEFT, padx=(5, 5))
+        self.engine_var = tk.StringVar(value=DEFAULT_ENGINE)
+        ctk.CTkOptionMenu(
+            engine_frame,
+            variable=self.engine_var,
+            values=list(ENGINES),
+            command=self.build_hyperparameter_inputs,
+            width=160
+        ).pack(side=tk.LEFT)
+        
+        self.params_frame = ctk.CTkFrame(engine_frame, fg_color="transparent")
+        self.params_frame.pack(side=tk.LEFT, padx=5)
+        self.build_hyperparameter_inputs(DEFAULT_ENGINE)
+        
+        self.use_cache_var = tk.BooleanVar(value=True)
+        ctk.CTkCheckBox(
+            engine_frame,
+            text="Reuse cached results",
+            variable=self.use_cache_var
+        ).pack(side=tk.LEFT, padx=(15, 5))
+        ctk.CTkCheckBox(
+            engine_frame,
+            text="Profile stages",
+            variable=self.app.profile_stages
+        ).pack(side=tk.LEFT, padx=5)
+        
         self.plot_frame = ctk.CTkFrame(self)
         self.plot_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
@@ -51,6 +155,9 @@ class TrainingFrame(ctk.CTkFrame):
         )
         self.status_label.pack(pady=5)
         
+        self.telemetry_panel = TelemetryPanel(self)
+        self.telemetry_panel.pack(fill=tk.X, padx=20)
+        
         self.nav_frame = ctk.CTkFrame(self)
         self.nav_frame.pack(fill=tk.X, pady=(10, 0), padx=20)
         
@@ -69,81 +176,45 @@ class TrainingFrame(ctk.CTkFrame):
         self.next_button.pack(side=tk.RIGHT)
         
     def setup_plot(self):
-        self.fig, self.ax1 = plt.subplots(figsize=(6, 4))
-        self.ax2 = self.ax1.twinx()
-        
-        self.ax1.set_xlabel('Epoch')
-        self.ax1.set_ylabel('Loss', color='tab:blue')
-        self.ax2.set_ylabel('Accuracy', color='tab:orange')
-        self.fig.suptitle('Training Progress')
-        
-        self.loss_line, = self.ax1.plot([], [], 'b-', label='Training Loss')
-        self.val_loss_line, = self.ax1.plot([], [], 'b--', label='Validation Loss')
-        self.acc_line, = self.ax2.plot([], [], 'orange', label='Training Accuracy')
-        self.val_acc_line, = self.ax2.plot([], [], 'orange', linestyle='--', label='Validation Accuracy')
-        
-        self.ax1.set_xlim(0.8, 2) 
-        self.ax1.set_ylim(0, 1)
-        self.ax2.set_ylim(0, 1)
-        
-        self.ax1.tick_params(axis='y', labelcolor='tab:blue')
-        self.ax2.tick_params(axis='y', labelcolor='tab:orange')
+        self.plot = LivePlot(self.plot_frame)
         
-        self.ax1.xaxis.set_major_locator(plt.MaxNLocator(integer=True))
+    def build_hyperparameter_inputs(self, engine_name):
+        for child in self.params_frame.winfo_children():
+            child.destroy()
         
-        lines1, labels1 = self.ax1.get_legend_handles_labels()
-        lines2, labels2 = self.ax2.get_legend_handles_labels()
-        self.ax2.legend(lines1 + lines2, labels1 + labels2, loc='upper right')
-        
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.plot_frame)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.param_entries = {}
+        for param in get_engine(engine_name).hyperparameters:
+            ctk.CTkLabel(self.params_frame, text=f"{param.label}:").pack(side=tk.LEFT, padx=(10, 5))
+            entry = ctk.CTkEntry(
+                self.params_frame,
+                width=70,
+                placeholder_text="auto" if isinstance(param.default, dict) else str(param.default)
+            )
+            entry.pack(side=tk.LEFT)
+            self.param_entries[param.name] = entry
+    
+    def fill_hyperparameter_inputs(self, params):
+        for name, value in params.items():
+            entry = self.param_entries.get(name)
+            if entry is not None:
+                entry.delete(0, tk.END)
+                entry.insert(0, str(value))
+    
+    def read_engine_params(self, engine):
+        return {
+            param.name: param.parse(self.param_entries[param.name].get(), self.app.task_type)
+            for param in engine.hyperparameters
+        }
         
-        self.fig.tight_layout()
+    def apply_resource_settings(self):
+        resources = self.app.resources
+        resources.cores = None if self.cores_var.get() == "Auto" else int(self.cores_var.get())
+        resources.backend = self.backend_var.get()
+        resources.reserve_for_ui = int(self.reserve_var.get())
         
-    def prepare_data(self):
-        df = self.app.frames['data_preparation'].df
-        target_column = self.app.frames['data_preparation'].target_var.get()
-        task_type = self.app.task_type
-
-        if target_column == "Select":
-            raise ValueError("Please select a target column before training")
-
-        categorical_columns = df.select_dtypes(include=["object"]).columns
-        for col in categorical_columns:
-            le = LabelEncoder()
-            df[col] = le.fit_transform(df[col])
-
-        X = df.drop(columns=[target_column])
-        y = df[target_column]
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-        if task_type == "fraud_detection":
-            smote = SMOTE(random_state=42)
-            X_train, y_train = smote.fit_resample(X_train, y_train)
-
-        scaler = StandardScaler()
-        X_train = scaler.fit_transform(X_train)
-        X_test = scaler.transform(X_test)
-
-        return X_train, X_test, y_train, y_test, task_type
-
     def reset_training(self):
         self.model = None
-        self.training_data = {
-            'loss': [], 'accuracy': [],
-            'val_loss': [], 'val_accuracy': []
-        }
-        
-        self.loss_line.set_data([], [])
-        self.val_loss_line.set_data([], [])
-        self.acc_line.set_data([], [])
-        self.val_acc_line.set_data([], [])
-        
-        self.ax1.set_xlim(0.8, 2)
-        self.ax1.set_ylim(0, 1)
-        self.ax2.set_ylim(0, 1)
-        
-        self.canvas.draw()
+        self.plot.reset()
         
         self.status_label.configure(text="")
         
@@ -158,11 +229,65 @@ class TrainingFrame(ctk.CTkFrame):
         else:
             self.stop_training()
             
+    def build_job(self):
+        """Everything the training process needs, read from the widgets up front"""
+        preparation = self.app.frames['data_preparation']
+        if preparation.df is None:
+            raise ValueError("Please load a dataset before training")
+        if preparation.target_var.get() == "Select":
+            raise ValueError("Please select a target column before training")
+        if preparation.sampled and self.mode_var.get() != "Streaming":
+            raise ValueError("This dataset was opened to stream from disk; choose Streaming mode or reload it without streaming")
+        
+        engine = get_engine(self.engine_var.get())
+        return {
+            'file_path': self.app.frames['data_selection'].selected_file,
+            'columns': list(preparation.df.columns),
+            'target_column': preparation.target_var.get(),
+            'task_type': self.app.task_type,
+            'imbalance': preparation.imbalance_var.get(),
+            'ratio': preparation.target_ratio(),
+            'mode': self.mode_var.get(),
+            'engine': engine.name,
+            'params': self.read_engine_params(engine),
+            'folds': int(self.folds_var.get()),
+            'bootstrap': 0 if self.bootstrap_var.get() == "Off" else int(self.bootstrap_var.get()),
+            'memory_budget': int(float(self.budget_entry.get()) * 1024 ** 2),
+            'epochs': int(self.epochs_var.get()),
+            'use_cache': self.use_cache_var.get(),
+            'profile': self.app.profile_stages.get(),
+            'resources': self.app.resources
+        }
+        
     def start_training(self):
+        self.apply_resource_settings()
+        try:
+            job = self.build_job()
+            self.job = job
+        except ValueError as e:
+            CTkMessagebox(
+                title="Training Error",
+                message=str(e),
+                icon="cancel"
+            )
+            return
+        
         self.is_training = True
         self.train_button.configure(text="Stop Training")
-        self.training_thread = threading.Thread(target=self.training_loop)
-        self.training_thread.start()
+        mode = self.mode_var.get()
+        if mode == "Streaming":
+            self.plot.set_xlabel('Chunks')
+        elif mode == "Cross-validation":
+            self.plot.set_xlabel('Folds')
+        else:
+            self.plot.set_xlabel(get_engine(self.engine_var.get()).progress_unit)
+        
+        # a separate process keeps the fit off the UI's GIL and can be killed at any point
+        context = multiprocessing.get_context("spawn")
+        self.messages = context.Queue()
+        self.training_process = context.Process(target=run_job_process, args=(job, self.messages))
+        self.training_process.start()
+        self.status_label.configure(text="Starting training process     ")
         self.update_plot()
         self.update_spinner()
         
@@ -170,172 +295,124 @@ class TrainingFrame(ctk.CTkFrame):
         self.is_training = False
         self.train_button.configure(text="Start Training")
         self.status_label.configure(text="Training Stopped")
-        if self.training_thread:
-            self.training_thread.join()
+        self.cancel_process()
+        
+    def cancel_process(self):
+        if self.training_process is not None:
+            terminate_process_tree(self.training_process)
+            self.training_process.join(timeout=0.1)
+        if self.messages is not None:
+            self.messages.close()
+        self.training_process = None
+        self.messages = None
     
-    def training_loop(self):
+    def next_message(self):
+        try:
+            return self.messages.get_nowait()
+        except queue.Empty:
+            if self.training_process.is_alive():
+                return None
+        # the process has exited; anything it sent is already in the pipe
         try:
-            X_train, X_test, y_train, y_test, task_type = self.prepare_data()
+            return self.messages.get(timeout=1)
+        except queue.Empty:
+            return ('error', f"The training process exited unexpectedly (exit code {self.training_process.exitcode})")
+        
+    def finish_training(self, run):
+        self.cancel_process()
+        self.is_training = False
+        self.train_button.configure(text="Start Training")
+        if run is None:
+            self.status_label.configure(text="Training Stopped")
+            return
+        
+        self.model = run['model']
+        self.preprocessors = run['preprocessors']
+        self.engine_name = run['engine_name']
+        self.engine_params = run['engine_params']
+        self.trials = run['trials']
+        self.trained_job = self.job
+        if self.engine_params is not None:
+            self.fill_hyperparameter_inputs(self.engine_params)
+        
+        # the child's run id keeps both processes' profiles in one directory
+        timer = StageTimer(profile=self.app.profile_stages.get())
+        timer.run_id = run['run_id']
+        timer.records = list(run['telemetry'])
+        self.telemetry_timer = timer
+        context = dict(
+            screen="training",
+            mode=self.mode_var.get(),
+            engine=self.engine_name,
+            task_type=self.app.task_type,
+            cores=self.app.resources.n_jobs
+        )
+        # the plots render on the evaluation screen's worker thread, which adds the rendering stage
+        self.app.frames['evaluation'].update_metrics(
+            run['final_metrics'],
+            timer=timer,
+            on_rendered=lambda: self.log_telemetry(timer, context)
+        )
+        self.telemetry_panel.show(timer.records, timer.profile_directory)
+        
+        completion_reason = run['completion_reason']
+        completion_reason += f"\n\nUsing {self.app.resources.describe()}:\n{timer.report()}"
+        if any('profile' in record for record in timer.records):
+            completion_reason += f"\n\nStage profiles saved to {timer.profile_directory}"
+        
+        CTkMessagebox(
+            title="Training Complete",
+            message=completion_reason,
+            icon="info"
+        )
+        
+        self.status_label.configure(text="Training Complete! You can now proceed to Evaluation")
+        self.is_training_complete = True
+        self.next_button.configure(state="normal")
+        
+        if hasattr(self.app, 'sidebar'):
+            self.app.sidebar.enable_next_step('training')
             
-            model = RandomForestClassifier(
-                n_estimators=50 if task_type == "fraud_detection" else 100,
-                max_depth=10 if task_type == "fraud_detection" else 15,
-                random_state=42,
-                class_weight="balanced"
-            )
-            self.model = model
-
-            batch_size = 512
-            max_epochs = 30
-            early_stopping_patience = 3
-            improvement_threshold = 0.01
-            epochs_without_improvement = 0
-            previous_val_accuracy = 0
-            epsilon = 1e-10
-
-            for epoch in range(max_epochs):
-                if not self.is_training:
-                    break
-
-                self.status_label.configure(text=f"Training Epoch {epoch + 1}/{max_epochs}     ")
-
-                indices = np.random.permutation(len(X_train))
-                epoch_metrics = {'loss': 0, 'accuracy': 0, 'val_loss': 0, 'val_accuracy': 0}
-                batch_count = 0
-
-                for start_idx in range(0, len(X_train), batch_size):
-                    if not self.is_training:
-                        break
-
-                    end_idx = min(start_idx + batch_size, len(X_train))
-                    batch_indices = indices[start_idx:end_idx]
-
-                    X_batch = X_train[batch_indices]
-                    y_batch = y_train.iloc[batch_indices]
-
-                    model.fit(X_batch, y_batch)
-
-                    train_pred = model.predict(X_batch)
-                    val_pred = model.predict(X_test)
-
-                    batch_train_acc = accuracy_score(y_batch, train_pred)
-                    batch_val_acc = accuracy_score(y_test, val_pred)
-
-                    batch_train_loss = -np.mean(y_batch * np.log(np.clip(train_pred.astype(float), epsilon, 1 - epsilon)))
-                    batch_val_loss = -np.mean(y_test * np.log(np.clip(val_pred.astype(float), epsilon, 1 - epsilon)))
-
-                    epoch_metrics['loss'] += batch_train_loss
-                    epoch_metrics['accuracy'] += batch_train_acc
-                    epoch_metrics['val_loss'] += batch_val_loss
-                    epoch_metrics['val_accuracy'] += batch_val_acc
-                    batch_count += 1
-
-                for key in epoch_metrics:
-                    epoch_metrics[key] /= batch_count
-
-                self.data_queue.put(epoch_metrics)
-
-                improvement = epoch_metrics['val_accuracy'] - previous_val_accuracy
-                if improvement < improvement_threshold:
-                    epochs_without_improvement += 1
-                else:
-                    epochs_without_improvement = 0
-
-                if epochs_without_improvement >= early_stopping_patience:
-                    break
-
-                previous_val_accuracy = epoch_metrics['val_accuracy']
-                time.sleep(0.1)
-
-            if self.is_training:
-                y_test_pred = model.predict(X_test)
-                y_test_proba = model.predict_proba(X_test)[:, 1]
-                
-                precision, recall, f1, _ = precision_recall_fscore_support(y_test, y_test_pred, average='binary')
-                roc_auc = roc_auc_score(y_test, y_test_proba)
-                
-                final_metrics = {
-                    'precision': precision,
-                    'recall': recall,
-                    'f1': f1,
-                    'roc_auc': roc_auc,
-                    'y_test': y_test,
-                    'y_pred': y_test_pred,
-                    'y_proba': y_test_proba
-                }
-                
-                self.app.frames['evaluation'].update_metrics(final_metrics)
-                
-                completion_reason = ""
-                if epochs_without_improvement >= early_stopping_patience:
-                    completion_reason = f"Training stopped after {epoch + 1} epochs due to no improvement in validation accuracy for {early_stopping_patience} epochs."
-                else:
-                    completion_reason = f"Training completed successfully after {epoch + 1} epochs."
-
-                CTkMessagebox(
-                    title="Training Complete",
-                    message=completion_reason,
-                    icon="info"
-                )
-                
-                self.status_label.configure(text="Training Complete! You can now proceed to Evaluation")
-                self.train_button.configure(text="Start Training")
-                self.is_training = False
-                self.is_training_complete = True
-                self.next_button.configure(state="normal")
-                
-                if hasattr(self.app, 'sidebar'):
-                    self.app.sidebar.enable_next_step('training')
-
-        except Exception as e:
-            self.status_label.configure(text=f"Error: {str(e)}")
-            self.train_button.configure(text="Start Training")
-            self.is_training = False
-            CTkMessagebox(
-                title="Training Error",
-                message=str(e),
-                icon="cancel"
-            )
+    def log_telemetry(self, timer, context):
+        """Show and log a run's telemetry once its evaluation plots have rendered"""
+        if timer is self.telemetry_timer:
+            self.telemetry_panel.show(timer.records, timer.profile_directory)
+        timer.write_log(**context)
+            
+    def training_failed(self, message):
+        self.cancel_process()
+        self.status_label.configure(text=f"Error: {message}")
+        self.train_button.configure(text="Start Training")
+        self.is_training = False
+        CTkMessagebox(
+            title="Training Error",
+            message=message,
+            icon="cancel"
+        )
 
     def update_plot(self):
-        if self.is_training:
-            while not self.data_queue.empty():
-                data = self.data_queue.get()
-                
-                if isinstance(data, tuple) and data[0] == 'final_metrics':
-                    metrics = data[1]
-                    continue
-                    
-                for key, value in data.items():
-                    self.training_data[key].append(value)
-                    
-            if self.training_data['loss']: 
-                x = [i + 1 for i in range(len(self.training_data['loss']))]
-                
-                self.loss_line.set_data(x, self.training_data['loss'])
-                self.val_loss_line.set_data(x, self.training_data['val_loss'])
-                self.acc_line.set_data(x, self.training_data['accuracy'])
-                self.val_acc_line.set_data(x, self.training_data['val_accuracy'])
-                
-                self.ax1.set_xlim(0.8, max(x) + 0.2)
-                
-                all_loss_values = self.training_data['loss'] + self.training_data['val_loss']
-                all_acc_values = self.training_data['accuracy'] + self.training_data['val_accuracy']
-                
-                if all_loss_values:
-                    loss_min = min(all_loss_values)
-                    loss_max = max(all_loss_values)
-                    margin = (loss_max - loss_min) * 0.1 if loss_max != loss_min else 0.1
-                    self.ax1.set_ylim(max(0, loss_min - margin), loss_max + margin)
-                
-                if all_acc_values:
-                    acc_min = min(all_acc_values)
-                    acc_max = max(all_acc_values)
-                    margin = (acc_max - acc_min) * 0.1 if acc_max != acc_min else 0.1
-                    self.ax2.set_ylim(max(0, acc_min - margin), min(1, acc_max + margin))
-                
-                self.canvas.draw()
+        # every point that arrived since the last tick goes into a single redraw
+        points = []
+        while self.is_training and self.messages is not None:
+            message = self.next_message()
+            if message is None:
+                break
             
+            kind, payload = message
+            if kind == 'progress':
+                points.append(payload)
+            elif kind == 'status':
+                self.status_label.configure(text=f"{payload}     ")
+            elif kind == 'done':
+                self.plot.extend(points)
+                points = []
+                self.finish_training(payload)
+            elif kind == 'error':
+                self.training_failed(payload)
+        
+        self.plot.extend(points)
+        
+        if self.is_training:
             self.after(100, self.update_plot)
 
     def update_spinner(self):